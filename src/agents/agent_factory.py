@@ -18,9 +18,15 @@ from typing import Any, Dict, List, Optional
 from src.agents.agent_models import AgentSpec
 from src.agents.base_agent import BaseAgent
 from src.config import Config
+from src.core.context_budget import ContextBudgeter
+from src.core.event_bus import emit_nowait
+from src.core.models import EventType, SessionEvent
+from src.core.run_budget import RunBudget
+from src.core.tools import run_tool_calls
 from src.providers.base_provider import StructuredResponse, ToolCall
 from src.providers.provider_pool import get_pool
 from src.utils.logger import logger
+from src.utils.tracing import current_ids
 
 MAX_TOOL_TURNS = 8
 MAX_AGENT_DEPTH = 2
@@ -38,12 +44,12 @@ async def build_system_context(
 ) -> str:
     """Build a token-efficient system message.
 
-    Injects:
+    Injects, stable parts first so providers can cache the prefix:
     - base_system_prompt (soul + tools + mandates)
     - pinned memories (max 5, always relevant)
-    - semantically relevant memories (top 4 for this specific message)
     - skill names only (not skill content — lazy-loaded via use_skill tool)
     - dependency outputs from teammate agents (if any)
+    - semantically relevant memories (top 4 for this specific message)
 
     Does NOT inject:
     - all memories as a JSON dump
@@ -64,15 +70,6 @@ async def build_system_context(
         pinned_lines = "\n".join(f"  {k}: {v}" for k, v in pinned.items())
         parts.append(f"[PINNED CONTEXT]\n{pinned_lines}")
 
-    # Semantically relevant memories — retrieved for this specific message
-    if current_message:
-        relevant = await get_relevant_memories(user_id, current_message, limit=4)
-        # Remove any that were already in pinned
-        relevant = {k: v for k, v in relevant.items() if k not in pinned}
-        if relevant:
-            rel_lines = "\n".join(f"  {k}: {v}" for k, v in relevant.items())
-            parts.append(f"[RELEVANT MEMORY]\n{rel_lines}")
-
     # Skill names only — agent calls use_skill to load content
     skill_names = await list_skill_names(user_id)
     if skill_names:
@@ -87,6 +84,16 @@ async def build_system_context(
         if non_empty:
             parts.append("[TEAMMATE CONTEXT]\n" + json.dumps(non_empty, indent=2))
 
+    # Semantically relevant memories — retrieved for this specific message,
+    # so they go last to keep the part above cacheable across requests
+    if current_message:
+        relevant = await get_relevant_memories(user_id, current_message, limit=4)
+        # Remove any that were already in pinned
+        relevant = {k: v for k, v in relevant.items() if k not in pinned}
+        if relevant:
+            rel_lines = "\n".join(f"  {k}: {v}" for k, v in relevant.items())
+            parts.append(f"[RELEVANT MEMORY]\n{rel_lines}")
+
     return "\n\n".join(parts)
 
 
@@ -147,7 +154,7 @@ class ConcreteAgent(BaseAgent):
 
     async def _get_tool_schemas(self, user_id: int):
         from src.db.chat_store import list_skill_names
-        from src.tools.schemas import get_schemas_for_tools, SCHEMA_MAP
+        from src.tools.schemas import get_schemas_for_tools, with_overlays
 
         if not self.spec.tools:
             return []
@@ -159,20 +166,30 @@ class ConcreteAgent(BaseAgent):
 
         schemas = get_schemas_for_tools(all_tools)
 
-        # Inject skill names into use_skill description dynamically
+        # Inject skill names into use_skill description dynamically —
+        # as a per-request overlay, the shared schemas stay untouched
         skill_names = await list_skill_names(user_id)
-        for s in schemas:
-            if s.name == "use_skill" and skill_names:
-                s.description = s.description + f" Available: {', '.join(skill_names[:20])}"
+        if skill_names:
+            schemas = with_overlays(schemas, {
+                "use_skill": f" Available: {', '.join(skill_names[:20])}",
+            })
         return schemas
 
     async def _request_structured(
-        self, user_id: int, messages: list, schemas: list
+        self, user_id: int, messages: list, schemas: list,
+        budgeter: Optional[ContextBudgeter] = None,
     ) -> StructuredResponse:
         cfg = Config.get()
         pool = get_pool()
-        payload = {"model": cfg.default_model, "messages": messages}
-        for provider in (cfg.default_provider_priority or ["gemini", "groq", "openrouter"]):
+        payload = {
+            "model": cfg.default_model,
+            "messages": messages,
+            "parallel_tool_calls": getattr(cfg, "parallel_tool_calls", True),
+        }
+        priorities = cfg.default_provider_priority or ["gemini", "groq", "openrouter"]
+        for provider in pool.order_providers(user_id, priorities):
+            if budgeter is not None:
+                payload["messages"] = budgeter.fit(messages, provider)
             try:
                 resp = await asyncio.wait_for(
                     pool.request_with_key_structured(user_id, provider, payload, schemas),
@@ -212,23 +229,46 @@ class ConcreteAgent(BaseAgent):
         ]
         tool_used: Optional[str] = None
         send_files: List[Dict] = []
+        budgeter = ContextBudgeter(cfg)
+        # The synthesis call after the tool turns is the budget's last turn
+        budget = RunBudget(cfg, user_id, max_turns=MAX_TOOL_TURNS + 1)
+
+        def _charge(resp: StructuredResponse, turn: int) -> None:
+            session_id = current_ids().get("session_id")
+            payload = budget.charge(resp, budgeter.last_tokens)
+            if session_id is not None:
+                emit_nowait(session_id, SessionEvent(EventType.BUDGET, payload=payload, turn=turn), create=False)
 
         for _turn in range(MAX_TOOL_TURNS):
+            if budget.exhausted():
+                break
             try:
-                response = await self._request_structured(user_id, messages, schemas)
+                response = await self._request_structured(user_id, messages, schemas, budgeter)
             except Exception as exc:
                 return {"id": self.spec.id, "output": f"Error: {exc}"}
+            _charge(response, _turn)
 
             # Function calling path
             if response.has_tool_calls:
-                tool_results = []
-                for tc in response.tool_calls:
+                async def _run_call(tc) -> str:
                     if self.bubble:
                         self.bubble.update(self.spec.id, f"calling {tc.name}...")
-                    result_str = await execute_tool(
+                    return await execute_tool(
                         tc.name, tc.arguments, user_id,
                         depth=self.depth, system_prompt=sys_msg, bubble=self.bubble,
                     )
+
+                # Independent calls run concurrently; results keep call order.
+                # Calls beyond the tool budget are answered without running.
+                allowed = budget.allow_tools(len(response.tool_calls))
+                results = await run_tool_calls(
+                    response.tool_calls[:allowed], _run_call, getattr(cfg, "max_parallel_tools", 4),
+                )
+                results += ["Skipped: this request's tool-call budget is used up."] * (
+                    len(response.tool_calls) - allowed
+                )
+                tool_results = []
+                for tc, result_str in zip(response.tool_calls, results):
                     tool_used = tc.name
                     if result_str.startswith("__SEND_FILE__:"):
                         parts = result_str[len("__SEND_FILE__:"):].split(":", 1)
@@ -269,7 +309,7 @@ class ConcreteAgent(BaseAgent):
             # Text-protocol fallback
             if schemas:
                 t_name, t_args = _parse_text_tool_call(response.content)
-                if t_name:
+                if t_name and budget.allow_tools(1):
                     if self.bubble:
                         self.bubble.update(self.spec.id, f"using {t_name}...")
                     result_str = await execute_tool(
@@ -299,9 +339,12 @@ class ConcreteAgent(BaseAgent):
                 "send_files": send_files,
             }
 
-        # Turn limit — synthesize
+        # Turn limit or budget hit — synthesize without tools
+        if budget.exhausted():
+            messages.append(budget.final_answer_message())
         try:
-            final = await self._request_structured(user_id, messages, [])
+            final = await self._request_structured(user_id, messages, [], budgeter)
+            _charge(final, MAX_TOOL_TURNS)
             return {
                 "id": self.spec.id,
                 "output": final.content,
@@ -25,6 +25,7 @@ from src.agents.background.watchers import (
     ProcessWatcher, SystemWatcher, URLWatcher, WatcherBase,
 )
 from src.agents.background.script_watcher import ScriptWatcher
+from src.agents.background.timer import WatcherScheduler
 from src.config import Config
 from src.db.background_store import (
     disable_background_agent, list_user_background_agents,
@@ -48,7 +49,12 @@ class BackgroundAgentManager:
 
     def __init__(self, bot) -> None:
         self._bot = bot
-        self._tasks: Dict[str, asyncio.Task] = {}
+        cfg = Config.get()
+        self._scheduler = WatcherScheduler(
+            workers=getattr(cfg, "watcher_workers", 32),
+            jitter=getattr(cfg, "watcher_jitter", 0.1),
+            check_timeout=getattr(cfg, "watcher_check_timeout", 120),
+        )
         self._wake_queue: asyncio.Queue[WakeSignal] = asyncio.Queue(maxsize=512)
         self._processor: Optional[asyncio.Task] = None
         self._started = False
@@ -73,11 +79,12 @@ class BackgroundAgentManager:
         self._processor = asyncio.create_task(
             self._wake_processor_loop(), name="wake_processor"
         )
+        self._scheduler.start()
         agents = await load_all_background_agents()
         for cfg in agents:
             if cfg.enabled:
                 await self._spawn_watcher(cfg)
-        logger.info("background_manager_started", active=len(self._tasks))
+        logger.info("background_manager_started", active=len(self._scheduler))
 
     async def register(self, cfg: BackgroundAgentConfig) -> None:
         await save_background_agent(cfg)
@@ -191,14 +198,8 @@ Respond with ONLY the JSON array, no explanation."""
         return created
 
     async def stop_agent(self, agent_id: str) -> bool:
-        task = self._tasks.pop(agent_id, None)
-        if task is None:
+        if not self._scheduler.remove(agent_id):
             return False
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
         await disable_background_agent(agent_id)
         logger.info("background_agent_stopped", id=agent_id)
         return True
@@ -206,6 +207,9 @@ Respond with ONLY the JSON array, no explanation."""
     async def list_for_user(self, user_id: int) -> list:
         return await list_user_background_agents(user_id)
 
+    def scheduler_stats(self) -> Dict:
+        return self._scheduler.stats()
+
     # ------------------------------------------------------------------
     # Internal — watcher spawning
     # ------------------------------------------------------------------
@@ -258,35 +262,23 @@ Respond with ONLY the JSON array, no explanation."""
         watcher = self._build_watcher(cfg)
         if watcher is None:
             return
-        old = self._tasks.pop(cfg.id, None)
-        if old and not old.done():
-            old.cancel()
-        task = asyncio.create_task(
-            self._watcher_loop(cfg, watcher),
-            name=f"watcher_{cfg.id}",
-        )
-        self._tasks[cfg.id] = task
+        self._scheduler.add(cfg.id, cfg.interval_seconds, lambda: self._check_watcher(cfg, watcher))
+        logger.info("watcher_scheduled", id=cfg.id, type=cfg.watcher_type, interval=cfg.interval_seconds)
 
-    async def _watcher_loop(self, cfg: BackgroundAgentConfig, watcher: WatcherBase) -> None:
-        logger.info("watcher_loop_started", id=cfg.id, type=cfg.watcher_type, interval=cfg.interval_seconds)
-        while True:
-            try:
-                signal = await watcher.check()
-                if signal is not None:
-                    signal.agent_id = cfg.id
-                    signal.user_id = cfg.user_id
-                    signal.chat_id = cfg.chat_id
-                    signal.ai_context = cfg.description
-                    try:
-                        self._wake_queue.put_nowait(signal)
-                    except asyncio.QueueFull:
-                        logger.warning("wake_queue_full_dropping", agent_id=cfg.id)
-                    await update_agent_trigger_count(cfg.id)
-            except asyncio.CancelledError:
-                break
-            except Exception as exc:
-                logger.error("watcher_loop_error", agent_id=cfg.id, error=str(exc))
-            await asyncio.sleep(cfg.interval_seconds)
+    async def _check_watcher(self, cfg: BackgroundAgentConfig, watcher: WatcherBase) -> None:
+        """One check, run by a scheduler worker; errors are logged by the scheduler."""
+        signal = await watcher.check()
+        if signal is None:
+            return
+        signal.agent_id = cfg.id
+        signal.user_id = cfg.user_id
+        signal.chat_id = cfg.chat_id
+        signal.ai_context = cfg.description
+        try:
+            self._wake_queue.put_nowait(signal)
+        except asyncio.QueueFull:
+            logger.warning("wake_queue_full_dropping", agent_id=cfg.id)
+        await update_agent_trigger_count(cfg.id)
 
     # ------------------------------------------------------------------
     # Internal — wake signal processing
@@ -357,13 +349,18 @@ Respond with ONLY the JSON array, no explanation."""
                    "wikipedia_search", "save_memory", "send_file", "list_workspace"],
         )
 
+        from src.core.admission import get_admission
+
         try:
             agent = ConcreteAgent(spec, depth=0)
-            result = await asyncio.wait_for(
-                agent.run({"user_id": signal.user_id, "message": task_msg,
-                           "full_context": task_msg}),
-                timeout=120,
-            )
+            # Background lane: yields to interactive work; queue time is not
+            # counted against the 2-minute run timeout
+            async with get_admission().slot(signal.user_id, "background"):
+                result = await asyncio.wait_for(
+                    agent.run({"user_id": signal.user_id, "message": task_msg,
+                               "full_context": task_msg}),
+                    timeout=120,
+                )
             output = result.get("output", "").strip() or "Task completed."
 
             # Handle any file sends the agent queued
@@ -420,15 +417,18 @@ Respond with ONLY the JSON array, no explanation."""
             ],
         }
 
+        from src.core.admission import get_admission
+
         analysis = ""
-        for provider in (cfg.default_provider_priority or ["gemini", "groq", "openrouter"]):
-            try:
-                resp = await pool.request_with_key(signal.user_id, provider, payload)
-                analysis = resp.get("output", "").strip()
-                if analysis:
-                    break
-            except Exception as exc:
-                logger.warning("wake_llm_failed", provider=provider, error=str(exc))
+        async with get_admission().slot(signal.user_id, "background"):
+            for provider in (cfg.default_provider_priority or ["gemini", "groq", "openrouter"]):
+                try:
+                    resp = await pool.request_with_key(signal.user_id, provider, payload)
+                    analysis = resp.get("output", "").strip()
+                    if analysis:
+                        break
+                except Exception as exc:
+                    logger.warning("wake_llm_failed", provider=provider, error=str(exc))
 
         if not analysis:
             analysis = context_str[:400]
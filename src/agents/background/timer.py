@@ -0,0 +1,227 @@
+"""WatcherScheduler — one timer heap and a bounded worker pool for all watchers.
+
+Replaces one asyncio task per watcher (`while True: check(); sleep()`):
+
+  - a single dispatcher task sleeps until the earliest due time in a heap
+    of (due, seq, key) entries; add() is O(log n), remove() is O(1) (the
+    heap entry becomes a tombstone, compacted once tombstones outnumber
+    live entries)
+  - due checks go to `workers` worker tasks, so at most that many checks
+    run at once however many watchers exist
+  - ticks follow a fixed grid (previous nominal time + interval), so slow
+    checks or a busy loop do not make the schedule drift; each tick is
+    moved by up to +/- jitter * interval so watchers sharing an interval
+    spread out instead of firing together
+  - a check still running when its next tick comes due is an overrun: the
+    tick is skipped, counted and logged, and checks of one watcher never
+    run concurrently
+  - ticks missed entirely (loop stalled, process suspended) are dropped,
+    not replayed
+  - a check is cancelled after 3 intervals, at most check_timeout seconds,
+    and counted as a failed check, so hung checks cannot occupy the whole
+    worker pool
+
+    sched = WatcherScheduler(workers=32, jitter=0.1)
+    sched.start()
+    sched.add("sys_1a2b3c", 60, lambda: watcher_check(cfg, watcher))
+    sched.remove("sys_1a2b3c")
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.utils.logger import logger
+from src.utils.tracing import record
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class _Entry:
+    __slots__ = ("key", "interval", "job", "nominal", "seq")
+
+    def __init__(self, key: str, interval: float, job: Job, nominal: float, seq: int):
+        self.key = key
+        self.interval = interval
+        self.job = job
+        self.nominal = nominal
+        self.seq = seq
+
+
+class WatcherScheduler:
+    """Heap-based periodic scheduler; see the module docstring."""
+
+    def __init__(self, workers: int = 32, jitter: float = 0.1, check_timeout: float = 120.0,
+                 seed: Optional[int] = None):
+        self.workers = max(1, int(workers))
+        self.jitter = min(max(float(jitter), 0.0), 0.5)
+        self.check_timeout = max(float(check_timeout), 0.001)
+        self._rng = random.Random(seed)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, _Entry] = {}
+        self._seq = itertools.count()
+        self._queue: asyncio.Queue[Tuple[_Entry, float]] = asyncio.Queue()
+        self._running: Dict[str, Optional[asyncio.Task]] = {}  # key -> worker running it
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._counts = dict.fromkeys(("checks", "failed", "timeouts", "overruns", "missed"), 0)
+        self._max_late_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def add(self, key: str, interval: float, job: Job, first_delay: Optional[float] = None) -> None:
+        """Schedule job every interval seconds (replaces key's previous job).
+
+        The first run is after first_delay, by default a random share of
+        jitter * interval, so a fleet loaded at startup does not fire at once.
+        """
+        self.remove(key, cancel_running=False)
+        interval = max(float(interval), 0.001)
+        if first_delay is None:
+            first_delay = self._rng.uniform(0, self.jitter * interval)
+        entry = _Entry(key, interval, job, time.monotonic() + first_delay, next(self._seq))
+        self._entries[key] = entry
+        self._push(entry, entry.nominal)
+
+    def remove(self, key: str, cancel_running: bool = True) -> bool:
+        """Stop scheduling key; its in-flight check is cancelled too by default."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        worker = self._running.get(key)
+        if cancel_running and worker is not None:
+            worker.cancel()  # the worker drops the check and carries on
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._compact()
+        return True
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        self._tasks.append(asyncio.create_task(self._dispatch(), name="watcher_dispatch"))
+        self._tasks += [
+            asyncio.create_task(self._worker(), name=f"watcher_worker_{i}") for i in range(self.workers)
+        ]
+        logger.info("watcher_scheduler_started", workers=self.workers, jitter=self.jitter)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._running.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watchers": len(self._entries),
+            "running": len(self._running),
+            "queued": self._queue.qsize(),
+            "workers": self.workers,
+            "max_late_ms": round(self._max_late_ms, 1),
+            **self._counts,
+        }
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _push(self, entry: _Entry, due: float) -> None:
+        earliest = not self._heap or due < self._heap[0][0]
+        heapq.heappush(self._heap, (due, entry.seq, entry.key))
+        if earliest:
+            self._wakeup.set()  # the dispatcher is sleeping towards a later deadline
+
+    def _compact(self) -> None:
+        self._heap = [item for item in self._heap if self._live(item)]
+        heapq.heapify(self._heap)
+
+    def _live(self, item: Tuple[float, int, str]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry.seq == item[1]
+
+    def _next_due(self, entry: _Entry, now: float) -> float:
+        entry.nominal += entry.interval
+        if entry.nominal < now:  # whole ticks missed: realign to the grid, do not replay
+            skipped = int((now - entry.nominal) // entry.interval) + 1
+            entry.nominal += skipped * entry.interval
+            self._counts["missed"] += skipped
+        return entry.nominal + self._rng.uniform(-self.jitter, self.jitter) * entry.interval
+
+    async def _dispatch(self) -> None:
+        while True:
+            while self._heap and not self._live(self._heap[0]):
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due = self._heap[0][0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            entry = self._entries[key]
+            now = time.monotonic()
+            self._push(entry, self._next_due(entry, now))
+            if key in self._running:
+                self._counts["overruns"] += 1
+                logger.warning("watcher_check_overrun", agent_id=key, interval=entry.interval)
+                continue
+            self._running[key] = None  # queued; the worker fills in itself
+            self._queue.put_nowait((entry, due))
+
+    async def _worker(self) -> None:
+        while True:
+            entry, due = await self._queue.get()
+            start = time.monotonic()
+            if self._entries.get(entry.key) is not entry:  # removed while queued
+                self._running.pop(entry.key, None)
+                continue
+            late_ms = max(0.0, (start - due) * 1000)
+            self._max_late_ms = max(self._max_late_ms, late_ms)
+            me = asyncio.current_task()
+            self._running[entry.key] = me
+            ok = True
+            timeout = min(self.check_timeout, 3 * entry.interval)
+            try:
+                await asyncio.wait_for(entry.job(), timeout)
+            except asyncio.TimeoutError:
+                ok = False
+                self._counts["failed"] += 1
+                self._counts["timeouts"] += 1
+                logger.warning("watcher_check_timeout", agent_id=entry.key, timeout=round(timeout, 1))
+            except asyncio.CancelledError:
+                ok = False
+                if self._stopping or self._entries.get(entry.key) is entry:
+                    raise
+                me.uncancel()  # remove() cancelled this check, not the worker
+            except Exception as exc:
+                ok = False
+                self._counts["failed"] += 1
+                logger.error("watcher_loop_error", agent_id=entry.key, error=str(exc))
+            finally:
+                if self._running.get(entry.key) is me:
+                    del self._running[entry.key]
+            self._counts["checks"] += 1
+            record("watcher_check", (time.monotonic() - start) * 1000, ok)
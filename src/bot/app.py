@@ -17,8 +17,9 @@ import asyncio
 import json
 import os
 import re
+import time
 import uuid
-from typing import Dict, Optional
+from typing import Optional, Set, Tuple
 
 from dotenv import load_dotenv
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
@@ -30,6 +31,7 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
+from telegram.request import HTTPXRequest
 
 try:
     from src.config import Config
@@ -50,22 +52,71 @@ from src.core import (
     ToolResult,
     classify_complexity,
 )
+from src.core.complexity import classify_llm, classify_tiers
 
+from src.bot.coalesce import BurstCoalescer
 from src.utils.logger import logger
-
-# Per-user semaphore map — limits concurrent orchestration tasks
-_USER_SEMAPHORES: Dict[int, asyncio.Semaphore] = {}
+from src.utils.registry import Registry, registry_sizes
+from src.utils.tracing import bind_trace, perf_summary, span, trace_scope
+
+# Per-user semaphore map — limits concurrent orchestration tasks.
+# All per-user maps are bounded registries: idle users are evicted, live entries kept.
+_USER_SEMAPHORES: Registry[int, asyncio.BoundedSemaphore] = Registry(
+    "user_semaphores",
+    in_use=lambda sem: sem._value < sem._bound_value or bool(sem._waiters),  # type: ignore[attr-defined]
+)
 
 # Active task tracking — for stop button
-_ACTIVE_TASKS: Dict[int, asyncio.Task] = {}  # user_id → task
-_CANCEL_FLAGS: Dict[int, bool] = {}  # user_id → cancel flag
+_ACTIVE_TASKS: Registry[int, Set[asyncio.Task]] = Registry(  # user_id → running orchestration tasks
+    "active_tasks", in_use=lambda tasks: any(not t.done() for t in tasks),
+)
+_CANCEL_FLAGS: Registry[int, bool] = Registry("cancel_flags")  # user_id → cancel flag
+_COMPLEXITY_LOGS: Registry[int, asyncio.Task] = Registry(  # user_id → pending complexity_log insert
+    "complexity_logs", in_use=lambda t: not t.done(),
+)
+# (chat_id, user_id) → follow-up inbox of the in-process run working there;
+# removed by the run itself when it finishes, evictable once its task is done
+_RUN_INBOXES: Registry[tuple, dict] = Registry(
+    "run_inboxes", in_use=lambda inbox: not inbox["task"].done(),
+)
+_BURSTS = BurstCoalescer()
+# Queue-position edits per waiting run: at most one per interval. Every slot
+# release moves every waiter, so unthrottled that is one Bot API edit per
+# queued user per release
+_QUEUE_EDIT_INTERVAL_S = 3.0
 
-def _get_semaphore(user_id: int) -> asyncio.Semaphore:
+def _get_semaphore(user_id: int) -> asyncio.BoundedSemaphore:
     cfg = Config.get()
     limit = cfg.max_concurrent_orchestrations_per_user or 2
-    if user_id not in _USER_SEMAPHORES:
-        _USER_SEMAPHORES[user_id] = asyncio.Semaphore(limit)
-    return _USER_SEMAPHORES[user_id]
+    return _USER_SEMAPHORES.get_or_create(user_id, lambda: asyncio.BoundedSemaphore(limit))
+
+
+def _track_task(user_id: int, task: asyncio.Task) -> None:
+    """Register an orchestration task so /stop and the Stop button can cancel it."""
+    tasks = _ACTIVE_TASKS.setdefault(user_id, set())
+    tasks.add(task)
+
+    def _done(t: asyncio.Task) -> None:
+        tasks.discard(t)
+        if not tasks and _ACTIVE_TASKS.get(user_id) is tasks:
+            _ACTIVE_TASKS.pop(user_id, None)
+    task.add_done_callback(_done)
+
+
+def _stop_user_tasks(user_id: int) -> int:
+    """Cancel every running orchestration of a user; returns how many were stopped.
+
+    Cancellation reaches whatever the task is awaiting: provider HTTP requests
+    close their connections, shell commands get their process group killed,
+    and the per-user semaphore is released as the task unwinds.
+    """
+    _CANCEL_FLAGS[user_id] = True  # direct replies still poll the flag
+    stopped = 0
+    for task in list(_ACTIVE_TASKS.get(user_id, ())):
+        if not task.done():
+            task.cancel()
+            stopped += 1
+    return stopped
 
 
 # ---------------------------------------------------------------------------
@@ -143,6 +194,7 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "/status — Key status, model, active agents\n"
         "/providers — All providers and connectivity status\n"
         "/reload — Reload config + tool registry from disk (owner only)\n"
+        "/perf [minutes] — Latency percentiles per span type (owner only)\n"
         "/memory — List stored memories and skills\n"
         "/pinmemory &lt;key&gt; — Always inject this memory (max 5)\n"
         "/unpinmemory &lt;key&gt; — Remove from always-injected list\n"
@@ -260,6 +312,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if manager:
         agents = await manager.list_for_user(user_id)
         bg_count = sum(1 for a in agents if a.enabled)
+        ws = manager.scheduler_stats()
     logger.info("status_handler_sending_response")
 
     msg = (
@@ -270,6 +323,48 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         f"Current model: <code>{cfg.default_model}</code>\n"
         f"Background agents: {bg_count} active"
     )
+    if manager and ws["checks"]:
+        msg += (
+            f"\nWatchers: {ws['watchers']} scheduled, {ws['running']}/{ws['workers']} checking, "
+            f"{ws['overruns']} overruns, max start delay {ws['max_late_ms']:.0f} ms"
+        )
+    from src.core.context_budget import budget_stats
+    budget = budget_stats()
+    if budget["tokens_saved"]:
+        msg += (
+            f"\nContext budget: ~{budget['tokens_saved']} tokens saved "
+            f"({budget['compressed_calls']}/{budget['calls']} calls compressed)"
+        )
+    from src.tools.result_cache import cache_stats
+    tc = cache_stats()
+    served = tc["hits"] + tc["shared"] + tc["revalidated"]
+    if served + tc["misses"]:
+        msg += (
+            f"\nTool cache: {served}/{served + tc['misses']} hits "
+            f"({tc['revalidated']} revalidated), {tc['entries']} entries, {tc['bytes'] // 1024} KB"
+        )
+    if _WEBHOOK is not None:
+        wh = _WEBHOOK.stats()
+        msg += (
+            f"\nWebhook: {wh['accepted']} updates, queue {wh['queued']}/{wh['max_queue']}, "
+            f"{wh['queue_full']} deferred, {wh['unauthorized']} rejected"
+        )
+    from src.core.admission import get_admission
+    adm = get_admission().stats()
+    if adm["admitted"]:
+        waits = perf_summary(getattr(cfg, "perf_window_minutes", 15) * 60).get("queue_wait")
+        msg += f"\nAdmission: {adm['running']}/{adm['max'] or '∞'} running, {adm['queued']} queued"
+        if waits:
+            msg += f", wait p50 {waits['p50']:.0f} ms / p95 {waits['p95']:.0f} ms"
+    from src.utils.loop_monitor import get_loop_monitor
+    monitor = get_loop_monitor()
+    lag = perf_summary(getattr(cfg, "perf_window_minutes", 15) * 60).get("loop_lag")
+    if monitor is not None and lag:
+        mon = monitor.stats()
+        msg += (
+            f"\nEvent loop ({mon['loop']}): lag p50 {lag['p50']:.1f} ms / p99 {lag['p99']:.1f} ms"
+            f" / max {lag['max']:.0f} ms, {mon['stalls']} stalls > {mon['threshold_ms']:.0f} ms"
+        )
     await update.message.reply_html(msg)
     logger.info("status_handler_response_sent")
 
@@ -635,6 +730,38 @@ async def broadcast_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await update.message.reply_text(f"Broadcast sent to {count} users.")
 
 
+# ---------------------------------------------------------------------------
+# /perf (owner only)
+# ---------------------------------------------------------------------------
+
+async def perf_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """/perf [minutes] — span latency percentiles (key selection, providers, tools, DB, ...)."""
+    owner = os.environ.get("OWNER_USER_ID")
+    if not owner or str(update.effective_user.id) != str(owner):
+        await update.message.reply_text("Unauthorized.")
+        return
+    cfg = Config.get()
+    try:
+        minutes = float(context.args[0]) if context.args else float(cfg.perf_window_minutes)
+    except ValueError:
+        await update.message.reply_text("Usage: /perf [minutes]")
+        return
+    summary = perf_summary(minutes * 60)
+    if not summary:
+        await update.message.reply_text(f"No spans recorded in the last {minutes:g} minutes.")
+        return
+    rows = [f"{'span':<14}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+    for kind, s in sorted(summary.items()):
+        rows.append(
+            f"{kind:<14}{s['count']:>6}{s['p50']:>9.1f}{s['p95']:>9.1f}{s['p99']:>9.1f}{s['max']:>9.1f}"
+        )
+    sizes = ", ".join(f"{name} {n}" for name, n in registry_sizes().items())
+    await update.message.reply_html(
+        f"<b>Spans — last {minutes:g} min (ms)</b>\n<pre>{_escape_html(chr(10).join(rows))}</pre>"
+        f"\nRegistries: {_escape_html(sizes)}"
+    )
+
+
 # ---------------------------------------------------------------------------
 # Callback query (inline buttons)
 # ---------------------------------------------------------------------------
@@ -663,44 +790,69 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
 
 async def stop_task_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle stop button click — cancels current task for user."""
+    from src.db.key_store import upsert_user
+
     query = update.callback_query
-    user_id = query.from_user.id
-    
-    # Set cancel flag
-    _CANCEL_FLAGS[user_id] = True
-    
-    # Cancel the active task
-    if user_id in _ACTIVE_TASKS:
-        task = _ACTIVE_TASKS[user_id]
-        if not task.done():
-            task.cancel()
-            await query.answer("Stopping task...")
-            logger.info("task_cancelled_by_user", user_id=user_id)
-            return
-    
+    user_id = await upsert_user(query.from_user.id, query.from_user.username)
+    # The button carries the owner's users.id; in groups only they may stop it
+    owner = (query.data or "").partition(":")[2]
+    if owner and owner != str(user_id):
+        await query.answer("Only the requester can stop this task.")
+        return
+
+    if _stop_user_tasks(user_id):
+        await query.answer("Stopping task...")
+        logger.info("task_cancelled_by_user", user_id=user_id)
+        return
+
     await query.answer("No active task to stop.")
 
 
+async def resume_run_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Resume / Discard buttons offered for runs interrupted by a restart."""
+    from src.db import checkpoints
+    from src.db.key_store import upsert_user
+
+    query = update.callback_query
+    action, _, run_id = (query.data or "").partition(":")
+    user_id = await upsert_user(query.from_user.id, query.from_user.username)
+    cp = await checkpoints.load(run_id)
+    if cp is None:
+        await query.answer("This task is no longer available.")
+        await _edit_quietly(context.bot, query.message.chat_id, query.message.message_id,
+                            "This interrupted task is no longer available.")
+        return
+    if cp["user_id"] != user_id:
+        await query.answer("Only the requester can resume this task.")
+        return
+    if not await checkpoints.claim(run_id):  # double tap, or another client was first
+        await query.answer("This task was already resumed.")
+        return
+    await query.answer()
+    if action == "discard_run":
+        await checkpoints.delete(run_id)
+        await _edit_quietly(context.bot, query.message.chat_id, query.message.message_id,
+                            "Interrupted task discarded.")
+        return
+    await _resume_run(context.bot, cp, Config.get(), message_id=query.message.message_id)
+
+
 # ---------------------------------------------------------------------------
 # /stop command — cancel current task
 # ---------------------------------------------------------------------------
 
 async def stop_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /stop command — cancels current task for user."""
-    user_id = update.effective_user.id
-    
-    # Set cancel flag
-    _CANCEL_FLAGS[user_id] = True
-    
-    # Cancel the active task
-    if user_id in _ACTIVE_TASKS:
-        task = _ACTIVE_TASKS[user_id]
-        if not task.done():
-            task.cancel()
-            logger.info("task_cancelled_by_command", user_id=user_id)
-            await update.message.reply_text("✅ Task stopped.")
-            return
-    
+    from src.db.key_store import upsert_user
+
+    tg_user = update.effective_user
+    user_id = await upsert_user(tg_user.id, tg_user.username)
+
+    if _stop_user_tasks(user_id):
+        logger.info("task_cancelled_by_command", user_id=user_id)
+        await update.message.reply_text("✅ Task stopped.")
+        return
+
     await update.message.reply_text("No active task to stop.")
 
 
@@ -746,7 +898,7 @@ def _agent_name(cfg=None) -> str:
 
 
 def _build_runtime_context(tg_user, cfg) -> str:
-    """Build a compact runtime context block injected at the top of every request.
+    """Build a compact runtime context block injected into the last message of every request.
     
     Wrapper around core ContextBuilder for backward compatibility.
     """
@@ -766,10 +918,35 @@ async def _process_message(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     override_text: Optional[str] = None,
+) -> None:
+    # Spans of this message, and of the tasks it spawns, carry the chat id
+    with trace_scope(session_id=update.effective_chat.id):
+        text = override_text or (update.message.text or "").strip()
+        window_ms = getattr(Config.get(), "message_coalesce_ms", 0)
+        if window_ms > 0 and text:
+            from src.utils.parse_keys import parse_keys
+            if not parse_keys(text):
+                async def flush(merged: str) -> None:
+                    await _handle_message(update, context, merged)
+
+                cfg = Config.get()
+                _BURSTS.submit(
+                    (update.effective_chat.id, update.effective_user.id), text, window_ms / 1000,
+                    getattr(cfg, "message_coalesce_max_ms", 3000) / 1000, flush,
+                )
+                return
+        await _handle_message(update, context, override_text)
+
+
+async def _handle_message(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    override_text: Optional[str] = None,
 ) -> None:
     from src.db.chat_store import (
         add_chat_message,
         get_chat_history,
+        get_pinned_memories,
         get_summary_data,
         count_messages_since,
     )
@@ -784,6 +961,7 @@ async def _process_message(
     tg_user = update.effective_user
     cfg = Config.get()  # FIXED: cfg loaded before any branch uses it
     user_id = await upsert_user(tg_user.id, tg_user.username)
+    bind_trace(user_id=user_id)
     keys_list = await list_api_keys(user_id)
 
     env_keys: list = [
@@ -800,6 +978,12 @@ async def _process_message(
         await _handle_key_submission(update, context, user_id, parsed_keys, cfg)
         return
 
+    # A run is already working on this chat's request: give it the message
+    if getattr(cfg, "append_to_active_run", True) and _append_to_active_run(
+        update.effective_chat.id, user_id, text
+    ):
+        return
+
     # No keys — check availability
     if not keys_list and not env_keys:
         await update.message.reply_text(
@@ -808,29 +992,60 @@ async def _process_message(
         )
         return
 
-    # Load context
+    # Complexity check — tiers 1-2 and the local model are instant. When they
+    # cannot decide, the LLM tier runs concurrently with context prep (history, vector search)
+    # and, in "reply" mode, a speculative direct reply; the losing path is
+    # cancelled once the classification arrives.
     pool = get_pool()
+    is_complex, tier, confidence = classify_tiers(text, cfg)
+    speculation = getattr(cfg, "speculative_classification", "reply")
+    classify_task = fragments_task = reply_task = None
+    if is_complex is None and speculation != "off":
+        classify_task = asyncio.create_task(classify_llm(text, cfg, pool, user_id))
+    if is_complex is not False and speculation != "off":
+        from src.db.vector_store import vector_store
+        fragments_task = asyncio.create_task(vector_store.search_memories(user_id, text, limit=3))
+
+    # Load context
     summary_data = await get_summary_data(user_id)
     summary = summary_data["summary"] if summary_data else None
     last_msg_id = summary_data["last_msg_id"] if summary_data else 0
     history = await get_chat_history(user_id, limit=cfg.max_context_messages, after_id=last_msg_id)
 
-    context_parts = []
-    context_parts.append(_build_runtime_context(tg_user, cfg))
-    if summary:
-        context_parts.append(f"[Earlier context summary]\n{summary}")
-    for m in history[:-1]:
-        context_parts.append(f"{m['role']}: {m['content']}")
-    context_parts.append(f"user: {text}")
-    context_str = "\n".join(context_parts)
+    # Stable prefix (system prompt, pinned memories, summary, earlier turns)
+    # first, volatile runtime context last — keeps provider prompt caches warm
+    pinned = await get_pinned_memories(user_id)
+    prompt_messages = ContextBuilder.build_messages(
+        cfg.system_prompt,
+        _build_runtime_context(tg_user, cfg),
+        text,
+        summary=summary,
+        history=history[:-1],
+        pinned=pinned,
+    )
 
-    # Complexity check — LLM-based routing
-    is_complex = await _classify_complexity(text, cfg, pool, user_id)
-    logger.debug("complexity_routing", is_complex=is_complex, text_len=len(text))
+    if classify_task is not None:
+        if speculation == "reply":
+            reply_task = asyncio.create_task(_direct_reply_text(user_id, prompt_messages, cfg, pool))
+        try:
+            is_complex = await classify_task
+        except BaseException:
+            _cancel_speculative(fragments_task, reply_task)
+            raise
+    elif is_complex is None:
+        is_complex = await _classify_complexity(text, cfg, pool, user_id)
+    if classify_task is not None or tier in ("ambiguous", "model_unsure"):
+        tier = "llm"
+    logger.debug("complexity_routing", is_complex=is_complex, text_len=len(text), tier=tier,
+                 speculative=classify_task is not None)
+    _log_complexity(user_id, text, cfg, is_complex, tier, confidence)
 
     if not is_complex:
-        await _handle_direct_reply(update, context, user_id, text, context_str, history, summary, cfg, pool, last_msg_id)
+        _cancel_speculative(fragments_task)
+        await _handle_direct_reply(update, context, user_id, text, prompt_messages, history, summary, cfg, pool, last_msg_id,
+                                   pending_reply=reply_task)
     else:
+        _cancel_speculative(reply_task)
         # Create stop button with proper InlineKeyboardMarkup
         from telegram import InlineKeyboardButton, InlineKeyboardMarkup
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("⏹ Stop", callback_data=f"stop_task:{user_id}")]])
@@ -848,15 +1063,69 @@ async def _process_message(
         task = asyncio.create_task(
             _run_orchestration_guarded(
                 sem, context.bot, update.effective_chat.id, sent.message_id,
-                user_id, context_str, text, history, summary, cfg, keyboard
+                user_id, prompt_messages, text, history, summary, cfg, keyboard,
+                fragments_task=fragments_task,
             )
         )
-        _ACTIVE_TASKS[user_id] = task
-        
-        # Clean up task tracking when done
-        def cleanup(t):
-            _ACTIVE_TASKS.pop(user_id, None)
-        task.add_done_callback(cleanup)
+        _track_task(user_id, task)
+
+
+def _append_to_active_run(chat_id: int, user_id: int, text: str) -> bool:
+    """Queue text for the run active in this chat; False when there is none."""
+    inbox = _RUN_INBOXES.get((chat_id, user_id))
+    if inbox is None or inbox["task"].done():  # a run that died without cleaning up
+        return False
+    inbox["messages"].append(text)
+    inbox["bubble"].update("Follow-up", f"{len(inbox['messages'])} new message(s), reading them next...")
+    logger.info("message_appended_to_run", user_id=user_id, queued=len(inbox["messages"]))
+    return True
+
+
+def _drain_inbox(inbox: dict, thought_history: list) -> int:
+    """Move follow-ups queued by _append_to_active_run into the run's context."""
+    messages, inbox["messages"] = inbox["messages"], []
+    for text in messages:
+        thought_history.append({"role": "user", "content": text})
+    if messages:
+        inbox["bubble"].update("Follow-up", f"added {len(messages)} message(s)")
+    return len(messages)
+
+
+def _cancel_speculative(*tasks: Optional[asyncio.Task]) -> None:
+    """Cancel speculative work that lost the race against classification."""
+    for t in tasks:
+        if t is not None and not t.done():
+            t.cancel()
+            t.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+def _log_complexity(user_id: int, text: str, cfg: Config, decision: bool, tier: str,
+                    confidence: Optional[float]) -> None:
+    """Record the routing decision in the background (classifier training data)."""
+    if not getattr(cfg, "complexity_log_enabled", True):
+        return
+    from src.db.complexity_log import log_decision
+    task = asyncio.create_task(log_decision(user_id, text, decision, tier, confidence))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    _COMPLEXITY_LOGS[user_id] = task
+
+
+def _record_complexity_outcome(user_id: int, tools, cfg: Config) -> None:
+    """Label the user's last routing decision with the tools the reply really used.
+
+    tools=None (direct replies, which cannot use tools) leaves it unlabeled.
+    """
+    if not getattr(cfg, "complexity_log_enabled", True):
+        return
+    from src.db.complexity_log import record_outcome
+
+    async def _record(pending: Optional[asyncio.Task]) -> None:
+        if pending is not None:
+            await asyncio.wait([pending])
+        await record_outcome(user_id, tools)
+
+    task = asyncio.create_task(_record(_COMPLEXITY_LOGS.pop(user_id, None)))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
 
 async def _classify_complexity(text: str, cfg: Config, pool, user_id: int) -> bool:
@@ -867,27 +1136,32 @@ async def _classify_complexity(text: str, cfg: Config, pool, user_id: int) -> bo
     return await classify_complexity(text, cfg, pool, user_id)
 
 
-async def _handle_direct_reply(
-    update, context, user_id, text, context_str, history, summary, cfg, pool, last_msg_id
-) -> None:
-    logger.info("direct_reply_handler", user_id=user_id, text_len=len(text), context_len=len(context_str))
-    from src.db.chat_store import add_chat_message
+async def _direct_reply_text(user_id, prompt_messages, cfg, pool) -> Tuple[str, str]:
+    """Run the direct-reply provider loop without sending anything.
+
+    Returns (reply, error_message); reply is empty when no provider answered
+    and error_message is then ready to show the user. Safe to run
+    speculatively and cancel.
+    """
+    from src.core.admission import get_admission
+    async with get_admission().slot(user_id, "direct"):
+        return await _direct_reply_loop(user_id, prompt_messages, cfg, pool)
+
+
+async def _direct_reply_loop(user_id, prompt_messages, cfg, pool) -> Tuple[str, str]:
     payload = {
         "model": cfg.default_model,
-        "messages": [
-            {"role": "system", "content": cfg.system_prompt},
-            {"role": "user", "content": context_str},
-        ],
+        "messages": prompt_messages,
     }
     # Filter priorities to only providers with valid keys
     all_priorities = cfg.default_provider_priority or ["gemini", "groq", "openrouter"]
     available = await pool.get_available_providers(user_id)
-    priorities = [p for p in all_priorities if p in available]
+    # Sticky provider first — its prompt cache is warm for this conversation
+    priorities = pool.order_providers(user_id, [p for p in all_priorities if p in available])
     
     if not priorities:
         logger.error("direct_reply_no_available_providers", available=available, configured=all_priorities)
-        await update.message.reply_text("No API keys configured. Add one with /addkey provider:\"key\"")
-        return
+        return "", "No API keys configured. Add one with /addkey provider:\"key\""
     
     logger.info("direct_reply_starting", user_id=user_id, priorities=priorities, available=available)
     reply = None
@@ -899,8 +1173,7 @@ async def _handle_direct_reply(
         if _CANCEL_FLAGS.get(user_id, False):
             logger.info("direct_reply_cancelled_before_provider", provider=p)
             _CANCEL_FLAGS[user_id] = False
-            await update.message.reply_text(f"{_agent_name(cfg)} task cancelled.")
-            return
+            return "", f"{_agent_name(cfg)} task cancelled."
         
         try:
             logger.info("direct_reply_try_provider", provider=p, user_id=user_id)
@@ -928,6 +1201,23 @@ async def _handle_direct_reply(
         if last_error:
             error_msg += f" Last error: {last_error}"
         error_msg += " Check your API keys with /status or add one with /addkey"
+        return "", error_msg
+    return reply, ""
+
+
+async def _handle_direct_reply(
+    update, context, user_id, text, prompt_messages, history, summary, cfg, pool, last_msg_id,
+    pending_reply: Optional[asyncio.Task] = None,
+) -> None:
+    logger.info("direct_reply_handler", user_id=user_id, text_len=len(text), messages=len(prompt_messages),
+                speculative=pending_reply is not None)
+    from src.db.chat_store import add_chat_message
+    # A speculative reply started while the message was being classified
+    if pending_reply is not None:
+        reply, error_msg = await pending_reply
+    else:
+        reply, error_msg = await _direct_reply_text(user_id, prompt_messages, cfg, pool)
+    if not reply:
         await update.message.reply_text(error_msg)
         return
 
@@ -943,15 +1233,17 @@ async def _handle_direct_reply(
         logger.info("direct_reply_reroute_to_orchestration")
         sent = await update.message.reply_text(f"{_agent_name(cfg)} is processing...")
         sem = _get_semaphore(user_id)
-        asyncio.create_task(
+        _CANCEL_FLAGS[user_id] = False
+        _track_task(user_id, asyncio.create_task(
             _run_orchestration_guarded(
                 sem, context.bot, update.effective_chat.id, sent.message_id,
-                user_id, context_str, text, history, summary, cfg
+                user_id, prompt_messages, text, history, summary, cfg
             )
-        )
+        ))
         return
 
     await add_chat_message(user_id, "assistant", reply)
+    _record_complexity_outcome(user_id, None, cfg)
     logger.info("direct_reply_sending", reply_len=len(reply))
     try:
         await update.message.reply_html(reply)
@@ -962,9 +1254,11 @@ async def _handle_direct_reply(
 
 async def _run_orchestration_guarded(
     sem: asyncio.Semaphore, bot, chat_id, message_id, user_id,
-    context_str, original_text, history, summary, cfg, keyboard=None
+    prompt_messages, original_text, history, summary, cfg, keyboard=None,
+    fragments_task: Optional[asyncio.Task] = None, resume: Optional[dict] = None,
 ) -> None:
     if sem.locked() and sem._value == 0:  # type: ignore[attr-defined]
+        _cancel_speculative(fragments_task)
         try:
             await bot.edit_message_text(
                 chat_id=chat_id, message_id=message_id,
@@ -974,11 +1268,49 @@ async def _run_orchestration_guarded(
         except Exception:
             pass
         return
+    from src.core.admission import get_admission
+
+    notice = {"task": None, "shown": 0, "at": 0.0, "admitted": False}
+
+    def on_position(position: int) -> None:
+        # The thinking message doubles as the live bubble; the bubble
+        # overwrites this once the run is admitted
+        pending = notice["task"]
+        now = time.monotonic()
+        if (notice["admitted"] or position == notice["shown"]
+                or (pending is not None and not pending.done())
+                or now - notice["at"] < _QUEUE_EDIT_INTERVAL_S):
+            return
+        notice.update(shown=position, at=now)
+        notice["task"] = asyncio.create_task(_edit_quietly(
+            bot, chat_id, message_id,
+            f"{_agent_name(cfg)} is queued (position {position}). "
+            "It starts as soon as a slot frees up.",
+            keyboard,
+        ))
+
+    from src.core.workers import get_worker_pool
+    run = run_orchestration_remote if get_worker_pool() is not None else run_orchestration_background
+
     async with sem:
-        await run_orchestration_background(
-            bot, chat_id, message_id, user_id,
-            context_str, original_text, history, summary, keyboard
-        )
+        async with get_admission().slot(user_id, "interactive", on_position=on_position):
+            notice["admitted"] = True
+            if notice["task"] is not None and not notice["task"].done():
+                # Let a queued-position edit land before the bubble's first one
+                await asyncio.wait({notice["task"]}, timeout=3)
+                notice["task"].cancel()
+            await run(
+                bot, chat_id, message_id, user_id,
+                prompt_messages, original_text, history, summary, keyboard,
+                fragments_task=fragments_task, resume=resume,
+            )
+
+
+async def _edit_quietly(bot, chat_id, message_id, text, keyboard=None) -> None:
+    try:
+        await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text, reply_markup=keyboard)
+    except Exception:
+        pass
 
 
 async def _handle_key_submission(update, context, user_id, keys, cfg) -> None:
@@ -1026,11 +1358,56 @@ async def _handle_key_submission(update, context, user_id, keys, cfg) -> None:
 # Orchestration background loop
 # ---------------------------------------------------------------------------
 
+async def _with_fragments(prompt_messages: list, user_id: int, original_text: str,
+                          fragments_task: Optional[asyncio.Task] = None) -> list:
+    """Append semantic memory fragments (usually prefetched while classifying).
+
+    Same cache-friendly prefix as the direct reply; fragments are volatile,
+    so they only extend the last message.
+    """
+    fragments = None
+    if fragments_task is not None:
+        try:
+            fragments = await fragments_task
+        except Exception as exc:
+            logger.warning("fragments_prefetch_failed", user_id=user_id, error=str(exc))
+    if fragments is None:
+        from src.db.vector_store import vector_store
+        fragments = await vector_store.search_memories(user_id, original_text, limit=3)
+
+    thought_history = list(prompt_messages)
+    if fragments:
+        fragment_str = "\n\nRELEVANT PAST CONTEXT:\n" + "\n".join(
+            f"- {f['text']}" for f in fragments
+        )
+        last = thought_history[-1]
+        thought_history[-1] = {**last, "content": last["content"] + fragment_str}
+    return thought_history
+
+
+async def _send_final(bot, chat_id: int, message_id: int, full_response: str) -> None:
+    """Replace the bubble with the answer; overflow goes out as new messages."""
+    for i, chunk in enumerate(_split_message(full_response, 4000)):
+        if i == 0:
+            try:
+                await bot.edit_message_text(
+                    chat_id=chat_id, message_id=message_id, text=chunk, parse_mode="HTML"
+                )
+            except Exception:
+                await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=chunk)
+        else:
+            try:
+                await bot.send_message(chat_id=chat_id, text=chunk, parse_mode="HTML")
+            except Exception:
+                await bot.send_message(chat_id=chat_id, text=chunk)
+
+
 async def run_orchestration_background(
     bot, chat_id: int, message_id: int, user_id: int,
-    context_str: str, original_text: str, history: list, summary: Optional[str],
-    keyboard=None
+    prompt_messages: list, original_text: str, history: list, summary: Optional[str],
+    keyboard=None, fragments_task: Optional[asyncio.Task] = None, resume: Optional[dict] = None,
 ) -> None:
+    """In-process orchestration; resume is a checkpoint (src/db/checkpoints.py) to continue from."""
     from src.db.chat_store import add_chat_message
     from src.live.live_bubble import LiveBubble
 
@@ -1049,43 +1426,56 @@ async def run_orchestration_background(
             pass
 
     await bubble.start(flush)
-
-    # Semantic memory fragments
-    from src.db.vector_store import vector_store
-    fragments = await vector_store.search_memories(user_id, original_text, limit=3)
-    fragment_str = ""
-    if fragments:
-        fragment_str = "\n\nRELEVANT PAST CONTEXT:\n" + "\n".join(
-            f"- {f['text']}" for f in fragments
-        )
-
-    thought_history = [
-        {"role": "system", "content": cfg.system_prompt},
-        {
-            "role": "user",
-            "content": f"Request: {original_text}{fragment_str}\n\nContext:\n{context_str}",
-        },
-    ]
-
-    agent_results: dict = {}
+    if resume:
+        thought_history, agent_results = resume["thought_history"], resume["agent_results"]
+    else:
+        thought_history = await _with_fragments(prompt_messages, user_id, original_text, fragments_task)
+        agent_results = {}
     narrative_chunks: list = []
-    priorities = cfg.default_provider_priority or ["gemini", "groq", "openrouter"]
+    priorities = pool.order_providers(
+        user_id, cfg.default_provider_priority or ["gemini", "groq", "openrouter"]
+    )
+    # Compresses older tool results so each provider call fits its context budget
+    from src.core.context_budget import ContextBudgeter
+    budgeter = ContextBudgeter(cfg)
+    # Caps tokens / turns / wall time / tool calls; a hit limit forces a final answer
+    from src.core.event_bus import emit_nowait
+    from src.core.models import EventType, SessionEvent
+    from src.core.run_budget import RunBudget
+    budget = RunBudget(cfg, user_id)
+    # Saved after every tool turn; dropped when the run ends, kept only when a
+    # restart interrupts it (_resume_interrupted_runs picks it up)
+    run_id = resume["run_id"] if resume else uuid.uuid4().hex
+    checkpointing = getattr(cfg, "checkpoint_resume", "ask") != "off"
+    checkpointed = keep_checkpoint = False
+    if resume:
+        budget.restore(resume.get("budget") or {})
+    # Messages sent to this chat while the run works join it (_append_to_active_run)
+    inbox_key = (chat_id, user_id)
+    inbox = {"messages": [], "bubble": bubble, "task": asyncio.current_task()}
+    _RUN_INBOXES[inbox_key] = inbox
 
     try:
-        for turn in range(10):
+        for turn in range(resume["turn"] if resume else 0, budget.max_turns):
+            bind_trace(turn=turn)
             # Check cancel flag
             if _CANCEL_FLAGS.get(user_id, False):
                 await flush(f"{_agent_name(cfg)} task stopped by user.")
                 _CANCEL_FLAGS[user_id] = False  # Reset flag
                 return
             
+            _drain_inbox(inbox, thought_history)
             bubble.update("Thinking", f"turn {turn + 1}...")
+            limit = budget.exhausted()
+            if limit:
+                bubble.update("Budget", f"{limit} limit reached, answering...")
             
-            # Get tool schemas for JSON function calling
+            # Get tool schemas for JSON function calling (none once over budget)
             from src.tools.schemas import get_all_schemas
-            tool_schemas = get_all_schemas()
+            tool_schemas = [] if limit else get_all_schemas()
+            messages = thought_history + [budget.final_answer_message()] if limit else thought_history
             logger.info("tool_schemas_loaded", count=len(tool_schemas))
-            # Pass ToolSchema objects - providers will call to_openai() themselves
+            # Pass ToolSchema objects - providers serialize them (memoized per tool set)
             openai_schemas = tool_schemas
             
             # Use provider-specific models from config (with fallbacks)
@@ -1109,7 +1499,8 @@ async def run_orchestration_background(
                 # Build payload with correct model for this provider
                 payload = {
                     "model": model_map.get(p_name, cfg.default_model),
-                    "messages": thought_history,
+                    "messages": budgeter.fit(messages, p_name),
+                    "parallel_tool_calls": getattr(cfg, "parallel_tool_calls", True),
                 }
                 
                 try:
@@ -1137,21 +1528,22 @@ async def run_orchestration_background(
                 await bubble.stop()
                 await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=msg)
                 return
+            emit_nowait(chat_id, SessionEvent(
+                EventType.BUDGET, payload=budget.charge(resp, budgeter.last_tokens), turn=turn,
+            ), create=False)
             
             # Handle tool calls from JSON response
-            if resp.has_tool_calls:
-                for tool_call in resp.tool_calls:
+            if resp.has_tool_calls and not limit:
+                from src.agents.agent_factory import execute_tool
+                from src.core.tools import run_tool_calls
+
+                async def _run_call(tool_call) -> str:
                     t_name = tool_call.name
                     t_args = tool_call.arguments  # Already parsed as dict!
                     
                     logger.info("tool_call_received", tool=t_name, arguments=t_args)
                     
-                    preamble = ""  # No preamble for tool calls
-                    if preamble and len(preamble) > 5:
-                        narrative_chunks.append(preamble)
-                    
                     bubble.update("Tool", f"running {t_name}...")
-                    from src.agents.agent_factory import execute_tool
                     tool_result = await execute_tool(t_name, t_args, user_id, system_prompt=cfg.system_prompt, bubble=bubble)
                     
                     logger.info("tool_result", tool=t_name, result_preview=tool_result[:100] if tool_result else None)
@@ -1164,14 +1556,39 @@ async def run_orchestration_background(
                         if file_path:
                             sent = await _send_agent_file(bot, chat_id, cfg.workspace_path, file_path, file_caption)
                             tool_result = f"File sent: {file_path}" if sent else f"Failed to send file: {file_path}"
-                    
-                    thought_history.append({"role": "assistant", "content": None, "tool_calls": [{"id": tool_call.call_id, "type": "function", "function": {"name": t_name, "arguments": json.dumps(t_args)}}]})
+                    return tool_result
+
+                # Independent calls run concurrently; results keep call order.
+                # Calls beyond the tool budget are answered without running.
+                allowed = budget.allow_tools(len(resp.tool_calls))
+                results = await run_tool_calls(
+                    resp.tool_calls[:allowed], _run_call, getattr(cfg, "max_parallel_tools", 4),
+                )
+                results += ["Skipped: this request's tool-call budget is used up."] * (len(resp.tool_calls) - allowed)
+
+                thought_history.append({"role": "assistant", "content": None, "tool_calls": [
+                    {"id": tc.call_id, "type": "function", "function": {"name": tc.name, "arguments": json.dumps(tc.arguments)}}
+                    for tc in resp.tool_calls
+                ]})
+                for i, (tool_call, tool_result) in enumerate(zip(resp.tool_calls, results)):
                     thought_history.append({"role": "tool", "content": tool_result, "tool_call_id": tool_call.call_id})
-                    agent_results[f"turn_{turn}"] = {"output": tool_result, "tool_used": t_name}
+                    agent_results[f"turn_{turn}" if i == 0 else f"turn_{turn}.{i}"] = {"output": tool_result, "tool_used": tool_call.name}
+                if checkpointing:
+                    await _save_checkpoint(run_id, user_id, chat_id, original_text, turn + 1,
+                                           thought_history, agent_results, budget)
+                    checkpointed = True
                 continue  # Continue to next turn with tool results in history
             
             # No tool calls - LLM returned final content
             output = resp.content
+            if inbox["messages"] and not limit:
+                # Follow-ups arrived during this call: one more turn answers them too
+                thought_history.append({"role": "assistant", "content": output})
+                continue
+            if _RUN_INBOXES.get(inbox_key) is inbox:
+                del _RUN_INBOXES[inbox_key]  # later messages start a new request
+            if limit and not (output or "").strip():
+                output = budget.cut_short_text()
 
             # Final response turn - no tool calls
             bubble.update("Thinking", "done")
@@ -1204,22 +1621,9 @@ async def run_orchestration_background(
 
             full_response = full_text + findings_block
             await add_chat_message(user_id, "assistant", full_text, metadata=agent_results)
+            _record_complexity_outcome(user_id, [r.get("tool_used", "") for r in agent_results.values()], cfg)
 
-            # Send in chunks if too long
-            chunks = _split_message(full_response, 4000)
-            for i, chunk in enumerate(chunks):
-                if i == 0:
-                    try:
-                        await bot.edit_message_text(
-                            chat_id=chat_id, message_id=message_id, text=chunk, parse_mode="HTML"
-                        )
-                    except Exception:
-                        await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=chunk)
-                else:
-                    try:
-                        await bot.send_message(chat_id=chat_id, text=chunk, parse_mode="HTML")
-                    except Exception:
-                        await bot.send_message(chat_id=chat_id, text=chunk)
+            await _send_final(bot, chat_id, message_id, full_response)
 
             if len(history) >= cfg.max_context_messages:
                 asyncio.create_task(_trigger_summarization(user_id, history, summary, pool, cfg))
@@ -1233,14 +1637,189 @@ async def run_orchestration_background(
         )
 
     except asyncio.CancelledError:
-        # Task was cancelled by stop button
+        # Stop button / /stop: the in-flight provider call or tool was cancelled
+        # with us. Re-raise right away so the semaphore slot frees now; the
+        # "stopped" edit goes out in the background.
         logger.info("orchestration_cancelled", user_id=user_id)
+        # No stop flag: the process is shutting down, not the user stopping
+        keep_checkpoint = not _CANCEL_FLAGS.get(user_id, False)
+        _CANCEL_FLAGS[user_id] = False
+        asyncio.create_task(_announce_stop(bubble, bot, chat_id, message_id, cfg))
+        raise
+
+    except Exception as exc:
+        logger.exception("orchestration_loop_failed", error=str(exc))
         await bubble.stop()
-        # Message already updated by cancel flag check
+        await bot.send_message(chat_id=chat_id, text=f"A fatal error occurred: {_escape_html(str(exc))}")
+
+    finally:
+        budgeter.finish(user_id)
+        if _RUN_INBOXES.get(inbox_key) is inbox:
+            del _RUN_INBOXES[inbox_key]
+        if (checkpointed or resume) and not keep_checkpoint:
+            await _drop_checkpoint(run_id)
+
+
+async def _save_checkpoint(run_id: str, user_id: int, chat_id: int, text: str, next_turn: int,
+                           thought_history: list, agent_results: dict, budget) -> None:
+    from src.db import checkpoints
+    try:
+        await checkpoints.save(run_id, user_id, chat_id, text, next_turn, {
+            "thought_history": thought_history,
+            "agent_results": agent_results,
+            "budget": budget.snapshot(),
+        })
+    except Exception as exc:
+        logger.warning("checkpoint_save_failed", run_id=run_id, error=str(exc))
+
+
+async def _drop_checkpoint(run_id: str) -> None:
+    from src.db import checkpoints
+    try:
+        await checkpoints.delete(run_id)
+    except Exception as exc:
+        logger.warning("checkpoint_delete_failed", run_id=run_id, error=str(exc))
+
+
+async def _resume_interrupted_runs(bot, cfg) -> None:
+    """Startup: continue runs a restart cut off, or offer them (checkpoint_resume)."""
+    from src.db import checkpoints
+
+    mode = getattr(cfg, "checkpoint_resume", "ask")
+    if mode == "off":
+        return
+    try:
+        pending = await checkpoints.interrupted(getattr(cfg, "checkpoint_max_age_hours", 24))
+    except Exception as exc:
+        logger.warning("checkpoint_scan_failed", error=str(exc))
         return
+    for cp in pending:
+        logger.info("run_interrupted", run_id=cp["run_id"], user_id=cp["user_id"], turn=cp["turn"], mode=mode)
+        preview = _escape_html(cp["text"][:200])
+        try:
+            if mode == "auto":
+                if await checkpoints.claim(cp["run_id"]):
+                    await _resume_run(bot, cp, cfg)
+                continue
+            keyboard = InlineKeyboardMarkup([[
+                InlineKeyboardButton("▶ Resume", callback_data=f"resume_run:{cp['run_id']}"),
+                InlineKeyboardButton("✖ Discard", callback_data=f"discard_run:{cp['run_id']}"),
+            ]])
+            await bot.send_message(
+                chat_id=cp["chat_id"], parse_mode="HTML", reply_markup=keyboard,
+                text=(f"A restart interrupted your task after {cp['turn']} turn(s):\n"
+                      f"<i>{preview}</i>\n\nResume it where it stopped?"),
+            )
+        except Exception as exc:
+            logger.warning("checkpoint_resume_failed", run_id=cp["run_id"], error=str(exc))
+
+
+async def _resume_run(bot, cp: dict, cfg, message_id: Optional[int] = None) -> None:
+    """Start a checkpointed run again from its next turn; message_id is reused as the bubble."""
+    user_id, chat_id = cp["user_id"], cp["chat_id"]
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("⏹ Stop", callback_data=f"stop_task:{user_id}")]])
+    text = f"{_agent_name(cfg)} is resuming your task from turn {cp['turn'] + 1}..."
+    if message_id is None:
+        message_id = (await bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard)).message_id
+    else:
+        await _edit_quietly(bot, chat_id, message_id, text, keyboard)
+    _CANCEL_FLAGS[user_id] = False
+    task = asyncio.create_task(_run_orchestration_guarded(
+        _get_semaphore(user_id), bot, chat_id, message_id, user_id,
+        [], cp["text"], [], None, cfg, keyboard, resume=cp,
+    ))
+    _track_task(user_id, task)
+
+
+async def _announce_stop(bubble, bot, chat_id: int, message_id: int, cfg) -> None:
+    await bubble.stop()
+    await _edit_quietly(bot, chat_id, message_id, f"{_agent_name(cfg)} task stopped by user.")
+
+
+async def run_orchestration_remote(
+    bot, chat_id: int, message_id: int, user_id: int,
+    prompt_messages: list, original_text: str, history: list, summary: Optional[str],
+    keyboard=None, fragments_task: Optional[asyncio.Task] = None, resume: Optional[dict] = None,
+) -> None:
+    """Worker mode: the orchestration runs in a worker process (src/core/workers.py).
+
+    This process renders the streamed SessionEvents in the live bubble, sends
+    files the agent queued and delivers the final answer. The worker writes
+    the run's checkpoints; a stop by the user drops them here.
+    """
+    from src.core.event_bus import emit_nowait
+    from src.core.models import EventType
+    from src.core.workers import get_worker_pool
+    from src.db.chat_store import add_chat_message
+    from src.live.live_bubble import LiveBubble
+    from src.utils.tracing import record
+
+    cfg = Config.get()
+    bubble = LiveBubble(throttle_ms=cfg.live_bubble_throttle_ms)
+
+    async def flush(text: str) -> None:
+        try:
+            await bot.edit_message_text(
+                chat_id=chat_id, message_id=message_id,
+                text=text, parse_mode="HTML", reply_markup=keyboard,
+            )
+        except Exception:
+            pass
+
+    await bubble.start(flush)
+    tools_used: list = []
+
+    def on_event(event) -> None:
+        payload = event.payload
+        if event.type == EventType.THINKING:
+            bubble.update("Thinking", f"turn {event.turn + 1}...")
+        elif event.type == EventType.TOOL_CALL:
+            tools_used.append(payload.get("tool", ""))
+            bubble.update("Tool", f"running {payload.get('tool')}...")
+        elif event.type == EventType.TOOL_RESULT and str(payload.get("result", "")).startswith("__SEND_FILE__:"):
+            parts = payload["result"].split(":", 2)
+            if len(parts) > 1 and parts[1]:
+                asyncio.create_task(_send_agent_file(
+                    bot, chat_id, cfg.workspace_path, parts[1], parts[2] if len(parts) > 2 else "",
+                ))
+        elif event.type == EventType.BUDGET and payload.get("limit"):
+            bubble.update("Budget", f"{payload['limit']} limit reached, answering...")
+        elif event.type == EventType.SPAN:
+            # Worker spans count in this process's /perf too
+            record(payload.get("span", "unknown"), payload.get("ms", 0.0), payload.get("ok", True))
+            return
+        emit_nowait(chat_id, event, create=False)
+
+    run_id = resume["run_id"] if resume else uuid.uuid4().hex
+    try:
+        thought_history = [] if resume else await _with_fragments(
+            prompt_messages, user_id, original_text, fragments_task)
+        full_response = await get_worker_pool().run({
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "message": original_text,
+            "prompt_messages": thought_history,
+            "system_prompt": cfg.system_prompt,
+            "run_id": run_id if getattr(cfg, "checkpoint_resume", "ask") != "off" else None,
+            "resume": resume,
+        }, on_event)
+        await bubble.stop()
+        await add_chat_message(user_id, "assistant", full_response)
+        _record_complexity_outcome(user_id, tools_used, cfg)
+        await _send_final(bot, chat_id, message_id, full_response)
+        if len(history) >= cfg.max_context_messages:
+            asyncio.create_task(_trigger_summarization(user_id, history, summary, get_pool(), cfg))
+
+    except asyncio.CancelledError:
+        logger.info("orchestration_cancelled", user_id=user_id)
+        if _CANCEL_FLAGS.get(user_id, False):
+            asyncio.create_task(_drop_checkpoint(run_id))
+        _CANCEL_FLAGS[user_id] = False
+        asyncio.create_task(_announce_stop(bubble, bot, chat_id, message_id, cfg))
+        raise
 
     except Exception as exc:
-        logger.exception("orchestration_loop_failed", error=str(exc))
+        logger.exception("orchestration_remote_failed", error=str(exc))
         await bubble.stop()
         await bot.send_message(chat_id=chat_id, text=f"A fatal error occurred: {_escape_html(str(exc))}")
 
@@ -1291,15 +1870,17 @@ async def _trigger_summarization(user_id, history, old_summary, pool, cfg) -> No
         ],
     }
     priorities = cfg.default_provider_priority or ["gemini", "groq", "openrouter"]
-    for p in priorities:
-        try:
-            resp = await pool.request_with_key(user_id, p, payload)
-            new_summary = resp.get("output")
-            if new_summary:
-                await update_summary(user_id, new_summary, history[-1]["id"])
-                return
-        except Exception:
-            continue
+    from src.core.admission import get_admission
+    async with get_admission().slot(user_id, "maintenance"):
+        for p in priorities:
+            try:
+                resp = await pool.request_with_key(user_id, p, payload)
+                new_summary = resp.get("output")
+                if new_summary:
+                    await update_summary(user_id, new_summary, history[-1]["id"])
+                    return
+            except Exception:
+                continue
 
 
 
@@ -1635,6 +2216,17 @@ async def cmdhistory_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
 # App factory and main
 # ---------------------------------------------------------------------------
 
+class _TracedRequest(HTTPXRequest):
+    """Bot API transport that times every call (sends, edits) as a "telegram" span.
+
+    getUpdates long-polling uses its own request object and is not traced.
+    """
+
+    async def do_request(self, url, method, *args, **kwargs):
+        async with span("telegram", method=url.rsplit("/", 1)[-1]):
+            return await super().do_request(url, method, *args, **kwargs)
+
+
 def build_application(config: Config):
     token = os.environ.get("TELEGRAM_BOT_TOKEN")
     if not token:
@@ -1654,6 +2246,10 @@ def build_application(config: Config):
         except Exception as exc:
             logger.warning("workspace_init_failed", error=str(exc))
 
+        # Vector memory is lazy — warm it off-loop so the first message doesn't wait
+        from src.db.vector_store import get_vector_store_async
+        asyncio.create_task(get_vector_store_async())
+
         # Background schedulers
         try:
             from src.providers.unblacklist_scheduler import unblacklist_loop
@@ -1671,7 +2267,31 @@ def build_application(config: Config):
         manager = BackgroundAgentManager.initialize(application.bot)
         await manager.start()
 
-    app = ApplicationBuilder().token(token).post_init(_post_init).build()
+        from src.utils.loop_monitor import start_loop_monitor
+        start_loop_monitor(config)
+
+        # Runs a restart cut off mid-orchestration: resume them or ask their users
+        asyncio.create_task(_resume_interrupted_runs(application.bot, config))
+
+        # Worker mode: orchestrations run in separate processes
+        workers = int(getattr(config, "orchestration_workers", 0) or 0)
+        if workers > 0:
+            from src.core.workers import start_worker_pool
+            start_worker_pool(workers, getattr(config, "worker_jobs_per_process", 4))
+
+    async def _post_shutdown(application) -> None:
+        from src.core.workers import stop_worker_pool
+        from src.utils.loop_monitor import stop_loop_monitor
+        await stop_worker_pool()
+        await stop_loop_monitor()
+
+    app = (
+        ApplicationBuilder().token(token)
+        .request(_TracedRequest(connection_pool_size=256))
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
     app.add_handler(CommandHandler("start", start_handler))
     app.add_handler(CommandHandler("help", help_handler))
     app.add_handler(CommandHandler("addkey", addkey_handler))
@@ -1692,9 +2312,11 @@ def build_application(config: Config):
     app.add_handler(CommandHandler("cleanworkspace", cleanworkspace_handler))
     app.add_handler(CommandHandler("cmdhistory", cmdhistory_handler))
     app.add_handler(CommandHandler("broadcast", broadcast_handler))
+    app.add_handler(CommandHandler("perf", perf_handler))
     app.add_handler(CommandHandler("delete_me", delete_me_handler))
     app.add_handler(CallbackQueryHandler(callback_query_handler, pattern="^(confirm_delete|confirm_cleanws)$"))
     app.add_handler(CallbackQueryHandler(stop_task_handler, pattern="^stop_task:"))
+    app.add_handler(CallbackQueryHandler(resume_run_handler, pattern="^(resume_run|discard_run):"))
     app.add_handler(MessageHandler(filters.PHOTO, photo_handler))
     app.add_handler(MessageHandler(filters.Document.ALL, document_handler))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, key_submission_handler))
@@ -1710,8 +2332,14 @@ def build_application(config: Config):
 def main() -> None:
     load_dotenv()
     config = Config.get()
-
-    if config.enable_telegram:
+    # Before PTB / asyncio.run create the loop
+    from src.utils.loop_monitor import install_event_loop
+    install_event_loop(getattr(config, "event_loop", "asyncio"))
+
+    if config.enable_telegram and getattr(config, "telegram_mode", "polling") == "webhook":
+        print(f"Starting {config.bot_name} (Telegram webhook)")
+        asyncio.run(_run_webhook(config))
+    elif config.enable_telegram:
         print(f"Starting {config.bot_name} (Telegram polling)")
         app = build_application(config)
         app.run_polling()
@@ -1720,9 +2348,67 @@ def main() -> None:
         asyncio.run(_run_background_only(config))
 
 
+_WEBHOOK = None  # running WebhookServer, for /status
+
+
+async def _run_webhook(config: Config) -> None:
+    """Webhook mode: PTB without its updater, fed by src/bot/webhook.py."""
+    import secrets
+    import signal
+    from urllib.parse import urlparse
+
+    from src.bot.webhook import WebhookServer, ssl_context
+
+    global _WEBHOOK
+    url = getattr(config, "webhook_url", "")
+    if not url:
+        raise RuntimeError("telegram_mode is 'webhook' but webhook_url is not set")
+    # A random secret works too: set_webhook registers it on every start
+    secret = os.environ.get("TELEGRAM_WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+
+    app = build_application(config)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    async with app:
+        if app.post_init:
+            await app.post_init(app)
+        _WEBHOOK = WebhookServer(
+            app.update_queue, app.bot, secret,
+            path=urlparse(url).path or "/",
+            max_queue=getattr(config, "webhook_queue_size", 1000),
+            read_timeout=getattr(config, "webhook_read_timeout", 5.0),
+            idle_timeout=getattr(config, "webhook_idle_timeout", 60.0),
+        )
+        await _WEBHOOK.start(
+            getattr(config, "webhook_listen", "0.0.0.0"), getattr(config, "webhook_port", 8443),
+            ssl_context(getattr(config, "webhook_cert", ""), getattr(config, "webhook_key", "")),
+        )
+        await app.bot.set_webhook(
+            url=url, secret_token=secret, allowed_updates=Update.ALL_TYPES,
+            max_connections=getattr(config, "webhook_max_connections", 40),
+        )
+        await app.start()
+        try:
+            await stop.wait()
+        finally:
+            await _WEBHOOK.close()
+            _WEBHOOK = None
+            await app.stop()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+
+
 async def _run_background_only(config: Config) -> None:
     from src.db.key_store import init_db
+    from src.utils.loop_monitor import start_loop_monitor
     await init_db()
+    start_loop_monitor(config)
     try:
         from src.providers.unblacklist_scheduler import unblacklist_loop
         from src.scheduler import start_scheduler
@@ -0,0 +1,69 @@
+"""Burst coalescing — one request for a thought sent as several quick messages.
+
+PTB hands updates to the handlers one at a time, so the debounce must not
+block the handler. The first message of a burst schedules flush() window_s
+later and returns. Every message that arrives before then joins the burst
+and pushes the deadline back by another window_s, but never past max_wait_s
+after the first one. flush() then gets the parts joined by newlines and runs
+the normal pipeline once: one classification, one run, one set of DB writes,
+with replies going to the first message.
+
+    if _BURSTS.submit((chat_id, tg_user_id), text, 0.6, 3.0, flush):
+        return  # joined a burst; the first message's flush carries it
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable
+
+from src.utils.logger import logger
+from src.utils.registry import Registry
+
+
+class BurstCoalescer:
+    """Per-key debounce of incoming message texts."""
+
+    def __init__(self, name: str = "message_bursts"):
+        # A burst lives for at most max_wait_s and is removed when it flushes
+        self._bursts: Registry[Hashable, Dict] = Registry(name, in_use=lambda burst: True)
+        self.merged = 0
+
+    def submit(self, key: Hashable, text: str, window_s: float, max_wait_s: float,
+               flush: Callable[[str], Awaitable[None]]) -> bool:
+        """Add text to key's burst; True when it joined one already pending.
+
+        On False a new burst was started and flush(merged_text) runs once
+        it has been quiet for window_s.
+        """
+        now = time.monotonic()
+        burst = self._bursts.get(key)
+        if burst is not None:
+            burst["parts"].append(text)
+            burst["deadline"] = min(now + window_s, burst["started"] + max(max_wait_s, window_s))
+            self.merged += 1
+            return True
+        burst = {"parts": [text], "started": now, "deadline": now + window_s}
+        self._bursts[key] = burst
+        asyncio.create_task(self._flush_when_quiet(key, burst, flush))
+        return False
+
+    def pending(self, key: Hashable) -> int:
+        burst = self._bursts.get(key)
+        return len(burst["parts"]) if burst else 0
+
+    async def _flush_when_quiet(self, key: Hashable, burst: Dict,
+                                flush: Callable[[str], Awaitable[None]]) -> None:
+        try:
+            while (delay := burst["deadline"] - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+        finally:
+            if self._bursts.get(key) is burst:
+                del self._bursts[key]
+        if len(burst["parts"]) > 1:
+            logger.info("message_burst_coalesced", parts=len(burst["parts"]),
+                        waited_ms=round((time.monotonic() - burst["started"]) * 1000))
+        try:
+            await flush("\n".join(burst["parts"]))
+        except Exception as exc:
+            logger.exception("message_burst_flush_failed", error=str(exc))
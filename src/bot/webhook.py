@@ -0,0 +1,163 @@
+"""Webhook ingestion — a small asyncio HTTP/1.1 server for Telegram updates.
+
+Used when telegram_mode is "webhook" instead of run_polling(): Telegram
+pushes each update over up to 40 keep-alive connections, so there is no
+getUpdates round trip and no polling delay.
+
+The handler does as little as possible before answering, because Telegram
+waits for the response before it sends that connection's next update. It
+checks the path and the X-Telegram-Bot-Api-Secret-Token header, parses
+the JSON into an Update, puts it on PTB's update_queue and answers 200.
+Handlers run later, in PTB's normal update loop.
+When webhook_queue_size updates are already waiting it answers 503 instead,
+and Telegram retries later — the backlog stays bounded.
+
+Reads are timed: once a request has started, its head and body must arrive
+within read_timeout, and a keep-alive connection with no new request for
+idle_timeout is closed. Slow or silent clients cannot hold connections
+(and handler coroutines) open on a public listener.
+
+No extra dependency: plain asyncio streams, optional TLS via webhook_cert /
+webhook_key (or terminate TLS in a reverse proxy).
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import ssl
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from telegram import Update
+
+from src.utils.logger import logger
+from src.utils.tracing import record
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY = 1 << 20  # Telegram updates are far smaller
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+            503: "Service Unavailable"}
+
+
+class WebhookServer:
+    """Accepts Telegram webhook POSTs and feeds them to an update queue."""
+
+    def __init__(self, update_queue: asyncio.Queue, bot: Any = None, secret: str = "",
+                 path: str = "/telegram", max_queue: int = 1000,
+                 read_timeout: float = 5.0, idle_timeout: float = 60.0):
+        self.update_queue = update_queue
+        self.bot = bot
+        self.secret = secret
+        self.path = path or "/"
+        self.max_queue = max(1, int(max_queue))
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._counts: Dict[str, int] = dict.fromkeys(
+            ("accepted", "unauthorized", "queue_full", "bad_request", "not_found", "timed_out"), 0)
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8443,
+                    ssl_context: Optional[ssl.SSLContext] = None) -> int:
+        """Start listening; returns the bound port (useful with port=0)."""
+        self._server = await asyncio.start_server(self._handle, host, port, ssl=ssl_context)
+        bound = self._server.sockets[0].getsockname()[1]
+        logger.info("webhook_listening", host=host, port=bound, path=self.path, max_queue=self.max_queue)
+        return bound
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counts, "queued": self.update_queue.qsize(), "max_queue": self.max_queue}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(reader.readexactly(1), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return  # idle keep-alive connection, or the client went away
+                try:
+                    head = first + await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.read_timeout)
+                except asyncio.TimeoutError:
+                    self._counts["timed_out"] += 1
+                    return
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                start = time.perf_counter()
+                method, target, version, headers = _parse_head(head)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = headers.get("content-length")
+                if length is None or not length.isdigit():
+                    status = 411 if method == "POST" else self._route(method, target, headers, b"")
+                elif int(length) > MAX_BODY:
+                    status, keep_alive = 413, False
+                else:
+                    try:
+                        body = await asyncio.wait_for(reader.readexactly(int(length)), self.read_timeout)
+                    except asyncio.TimeoutError:
+                        self._counts["timed_out"] += 1
+                        return
+                    status = self._route(method, target, headers, body)
+                retry = "Retry-After: 1\r\n" if status == 503 else ""
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Length: 0\r\n{retry}"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                )
+                await writer.drain()
+                record("webhook_ack", (time.perf_counter() - start) * 1000, status == 200)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> int:
+        if target.split("?", 1)[0] != self.path:
+            self._counts["not_found"] += 1
+            return 404
+        if method != "POST":
+            return 405
+        if self.secret and not hmac.compare_digest(
+            headers.get(SECRET_HEADER, "").encode(), self.secret.encode()
+        ):
+            self._counts["unauthorized"] += 1
+            return 403
+        if self.update_queue.qsize() >= self.max_queue:
+            self._counts["queue_full"] += 1
+            return 503
+        try:
+            update = Update.de_json(json.loads(body), self.bot)
+        except Exception as exc:
+            self._counts["bad_request"] += 1
+            logger.warning("webhook_bad_update", error=str(exc))
+            return 400
+        self.update_queue.put_nowait(update)
+        self._counts["accepted"] += 1
+        return 200
+
+
+def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    method, target, version = (parts + ["", "", ""])[:3]
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def ssl_context(cert: str, key: str) -> Optional[ssl.SSLContext]:
+    if not cert:
+        return None
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(cert, key or None)
+    return ctx
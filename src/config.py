@@ -8,7 +8,7 @@ from __future__ import annotations
 import json
 import time
 from pathlib import Path
-from typing import ClassVar, List, Optional
+from typing import Any, ClassVar, Dict, List, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, ConfigDict
@@ -76,6 +76,164 @@ class Config(BaseModel):
 
     # Tool execution timeout in seconds
     tool_timeout_seconds: int = 10
+    # Parallel-safe tool calls of one turn run concurrently, at most this many at once
+    max_parallel_tools: int = 4
+    # Let OpenAI-compatible providers (Groq, OpenRouter) return several tool calls per turn
+    parallel_tool_calls: bool = True
+
+    # Context budget for the tool loop (src/core/context_budget.py): target prompt
+    # tokens per provider call, capped by the provider's context window below
+    context_budget_tokens: int = 12000
+    context_window_tokens: Dict[str, int] = {
+        "groq": 131072, "openrouter": 131072, "gemini": 1048576, "ollama": 8192, "g4f": 32768,
+    }
+    # Tokens kept free for the model's answer
+    context_output_reserve: int = 2048
+    # Newest tool results always kept in full; older ones cut to this many chars, then elided
+    context_keep_recent_tools: int = 2
+    context_tool_truncate_chars: int = 600
+    # Prompt caching: a conversation sticks to the provider/key that last served it
+    # for this long (0 = always rotate). Gemini caches system prompt + tools
+    # server-side (context caching) once they reach gemini_cache_min_tokens
+    sticky_provider_ttl_seconds: int = 600
+    gemini_context_cache: bool = True
+    gemini_cache_min_tokens: int = 4096
+    gemini_cache_ttl_seconds: int = 900
+    # Ambiguous messages: overlap the LLM complexity check with context prep
+    # ("prep"), plus a speculative direct reply ("reply"), or run it first ("off")
+    speculative_classification: str = "reply"
+    # Local complexity classifier (rk-agent-train-classifier): decides messages the
+    # regex/keyword tiers cannot; the LLM is asked only below this confidence
+    complexity_model_path: str = "data/complexity_model.json"
+    complexity_model_threshold: float = 0.8
+    # Log routing decisions and the tools each reply used (classifier training data)
+    complexity_log_enabled: bool = True
+    # Tool result cache for web_search / wikipedia_search / curl: TTLs come from
+    # the tool schemas (tool_cache_ttl overrides them; 0 disables one tool).
+    # Memory is an LRU bounded in bytes; tool_cache_persist also keeps results in
+    # SQLite across restarts. Expired pages with an ETag / Last-Modified are kept
+    # tool_cache_stale_seconds longer and revalidated with a conditional GET
+    tool_cache_enabled: bool = True
+    tool_cache_ttl: Dict[str, int] = {}
+    tool_cache_max_bytes: int = 8_000_000
+    tool_cache_persist: bool = False
+    tool_cache_stale_seconds: int = 86400
+    # Spans (src/utils/tracing.py) around key selection, provider calls, tools, DB,
+    # vector search and Telegram sends; /perf reports percentiles over
+    # perf_window_minutes from the last perf_max_samples spans of each type
+    tracing_enabled: bool = True
+    perf_window_minutes: int = 15
+    perf_max_samples: int = 5000
+    # Per-run budgets for orchestrations (0 = unlimited). When one is hit the agent
+    # gets a last tool-free turn to answer with what it has gathered.
+    # run_budget_per_user overrides them by user id, e.g. {"12": {"max_tokens": 200000}}
+    run_budget: Dict[str, float] = {
+        "max_tokens": 60000, "max_turns": 10, "max_seconds": 120, "max_tool_calls": 16,
+    }
+    run_budget_per_user: Dict[str, Dict[str, float]] = {}
+    # Global cap on concurrent provider-bound runs across all users (0 = unlimited).
+    # Lanes: interactive > direct reply > background agent > maintenance; users
+    # share each lane fairly, admission_user_weights gives a user id a bigger share.
+    admission_max_concurrent: int = 16
+    admission_user_weights: Dict[str, float] = {}
+    # Per-user / per-session in-memory state (semaphores, key locks, event buses, ...):
+    # entries beyond registry_max_entries or idle for registry_idle_ttl_seconds are
+    # evicted, except ones still in use. Sizes are listed by /perf.
+    registry_max_entries: int = 10000
+    registry_idle_ttl_seconds: int = 3600
+    # Event loop: "asyncio" or "uvloop" (pip install 'rk-agent[uvloop]'). The lag
+    # monitor samples loop lag every loop_lag_interval_ms (/status, /perf) and logs
+    # the blocking stack when it exceeds loop_lag_threshold_ms; loop_debug also
+    # enables asyncio debug mode's slow-callback log (costly, for investigations)
+    event_loop: str = "asyncio"
+    loop_monitor_enabled: bool = True
+    loop_lag_interval_ms: int = 100
+    loop_lag_threshold_ms: int = 250
+    loop_debug: bool = False
+    # Burst coalescing: messages a user sends within message_coalesce_ms of each
+    # other become one request (capped at message_coalesce_max_ms after the first;
+    # 0 = off). With append_to_active_run, a message sent while a run is working in
+    # the chat is added to that run's context instead of starting another run
+    message_coalesce_ms: int = 0
+    message_coalesce_max_ms: int = 3000
+    append_to_active_run: bool = True
+    # Orchestration checkpoints: state saved to SQLite after every tool turn. After a
+    # restart, interrupted runs (younger than checkpoint_max_age_hours) are resumed
+    # ("auto"), offered to their user with Resume / Discard buttons ("ask"), or not
+    # checkpointed at all ("off")
+    checkpoint_resume: str = "ask"
+    checkpoint_max_age_hours: int = 24
+    # Background watchers share one timer heap: at most watcher_workers checks run
+    # at once, and each tick is shifted by up to +/- watcher_jitter * interval so
+    # watchers with the same interval do not all fire together. A check running
+    # longer than 3 intervals (at most watcher_check_timeout seconds) is cancelled
+    watcher_workers: int = 32
+    watcher_jitter: float = 0.1
+    watcher_check_timeout: int = 120
+    # Worker mode: run orchestrations in N separate processes (0 = in the bot process);
+    # the bot process keeps Telegram I/O and renders the streamed events
+    orchestration_workers: int = 0
+    worker_jobs_per_process: int = 4
+    # "polling" | "webhook". Webhook mode listens on webhook_listen:webhook_port and
+    # registers webhook_url (its path is the route); secret from TELEGRAM_WEBHOOK_SECRET
+    # (random per start if unset). Beyond webhook_queue_size waiting updates Telegram gets 503.
+    telegram_mode: str = "polling"
+    webhook_url: str = ""
+    webhook_listen: str = "0.0.0.0"
+    webhook_port: int = 8443
+    webhook_queue_size: int = 1000
+    webhook_max_connections: int = 40
+    # A started request must be read within webhook_read_timeout seconds; keep-alive
+    # connections without a new request for webhook_idle_timeout seconds are closed
+    webhook_read_timeout: float = 5.0
+    webhook_idle_timeout: float = 60.0
+    # TLS for the webhook listener; leave empty behind a TLS-terminating proxy
+    webhook_cert: str = ""
+    webhook_key: str = ""
+
+    # Vector memory backend: "auto" (Qdrant, NumPy fallback) | "qdrant" | "numpy"
+    vector_backend: str = "auto"
+    # Embedder for the NumPy index: "auto" (fastembed, else hashing) | "fastembed" | "hashing"
+    vector_embedder: str = "auto"
+    # NumPy index: rows per append-only segment; sealed segments of one size tier
+    # merged together
+    vector_segment_rows: int = 512
+    vector_max_segments: int = 8
+    # NumPy index: build IVF lists on compacted segments this large; lists probed per search
+    vector_ivf_min_rows: int = 4096
+    vector_ivf_nprobe: int = 8
+    # Vector quantization: "none" | "int8" (Qdrant scalar quantization + rescoring;
+    # int8 compacted segments in the NumPy index). See tests/perf/bench_vector_memory.py
+    vector_quantization: str = "none"
+    # Keep Qdrant vectors, HNSW graph and payloads on disk (memory-mapped) instead of RAM
+    vector_on_disk: bool = False
+    # Qdrant HNSW: graph degree, build-time and query-time beam width
+    vector_hnsw_m: int = 16
+    vector_hnsw_ef_construct: int = 100
+    vector_hnsw_ef: int = 64
+    # Qdrant server URL. Empty = embedded mode (./data/vector_db), which stores
+    # the index settings above but always searches brute force
+    vector_qdrant_url: str = ""
+    # Ingest dedup: exact repeats are skipped, cosine >= threshold merges into
+    # the existing vector (dup_count += 1). 0 disables both
+    vector_dedup_threshold: float = 0.97
+    # Hours between sweeps that drop vectors whose user or memory row is gone
+    vector_orphan_sweep_hours: int = 6
+    # Chat indexing policy (src/db/index_policy.py). Roles missing here are never
+    # indexed; per-role min_chars / max_chunks / strip_code override the defaults
+    vector_index_roles: Dict[str, Dict[str, Any]] = {
+        "user": {"min_chars": 12},
+        "assistant": {"min_chars": 40, "max_chunks": 6, "strip_code": True},
+    }
+    vector_index_min_chars: int = 20
+    # Messages matching any of these (case-insensitive) are not indexed
+    vector_index_skip_patterns: List[str] = [
+        r"^\W*(ok(ay)?|k|thx|thanks?( you)?|ty|yes|no|yep|nope|sure|cool|nice|lol|got it|done)\W*$",
+        r"^/\w+",  # bot commands
+    ]
+    # Long messages are split into overlapping chunks of about this many chars
+    vector_chunk_chars: int = 800
+    vector_chunk_overlap: int = 120
 
     TECHNICAL_MANDATES: ClassVar[str] = (
         "\n\n--- OPERATIONAL RULES ---\n"
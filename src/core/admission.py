@@ -0,0 +1,195 @@
+"""Admission control — one global cap on concurrent provider-bound work.
+
+Per-user semaphores only stop a single user from flooding the bot; this bounds
+the whole process (admission_max_concurrent). Waiting work sits in lanes that
+are served in strict priority order:
+
+    interactive > direct > background > maintenance
+
+so background agents and summaries yield while users are waiting. Inside a
+lane, users get weighted fair queuing (start-time fair queuing): every queued
+run is tagged max(lane clock, the user's last finish tag) and the user's
+finish tag grows by 1/weight, so a user with ten queued runs does not starve
+one who just arrived. admission_user_weights (keyed by users.id) gives a
+user a larger share.
+
+Queue wait is recorded as the "queue_wait" span (visible in /perf), and
+slot(on_position=...) reports the caller's queue position whenever it changes.
+
+    async with get_admission().slot(user_id, "interactive"):
+        ...
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.utils.logger import logger
+from src.utils.tracing import record
+
+LANES = ("interactive", "direct", "background", "maintenance")
+_RANK = {lane: i for i, lane in enumerate(LANES)}
+_PRUNE_AT = 4096  # finish tags kept before stale ones are dropped
+
+
+@dataclass
+class _Waiter:
+    user_id: int
+    lane: str
+    tag: float
+    seq: int
+    future: asyncio.Future
+    on_position: Optional[Callable[[int], Any]] = None
+    position: int = 0
+
+    def order(self) -> Tuple[int, float, int]:
+        return (_RANK[self.lane], self.tag, self.seq)
+
+
+class AdmissionController:
+    """Global slot pool with priority lanes and per-user fair queuing."""
+
+    def __init__(self, max_concurrent: int = 16, user_weights: Optional[Dict[Any, float]] = None):
+        self.max_concurrent = sys.maxsize
+        self.user_weights: Dict[str, float] = {}
+        self.configure(max_concurrent, user_weights)
+        self.running: Dict[str, int] = dict.fromkeys(LANES, 0)
+        self._waiters: List[_Waiter] = []
+        self._clock: Dict[str, float] = dict.fromkeys(LANES, 0.0)
+        self._finish: Dict[Tuple[str, int], float] = {}
+        self._seq = itertools.count()
+        self._counters = {"admitted": 0, "waited": 0, "abandoned": 0}
+
+    def configure(self, max_concurrent: int, user_weights: Optional[Dict[Any, float]] = None) -> None:
+        """Apply new limits; a raised cap admits waiters right away."""
+        self.max_concurrent = int(max_concurrent) if max_concurrent and int(max_concurrent) > 0 else sys.maxsize
+        self.user_weights = {str(k): float(v) for k, v in (user_weights or {}).items() if float(v) > 0}
+        if hasattr(self, "_waiters"):
+            self._dispatch()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self.running.values())
+
+    def _tag(self, user_id: int, lane: str) -> float:
+        key = (lane, user_id)
+        start = max(self._clock[lane], self._finish.get(key, 0.0))
+        self._finish[key] = start + 1.0 / self.user_weights.get(str(user_id), 1.0)
+        if len(self._finish) > _PRUNE_AT:
+            # Tags at or behind their lane clock no longer affect ordering
+            self._finish = {k: v for k, v in self._finish.items() if v > self._clock[k[0]]}
+        return start
+
+    def _admit(self, lane: str, tag: float) -> None:
+        self._clock[lane] = max(self._clock[lane], tag)
+        self.running[lane] += 1
+        self._counters["admitted"] += 1
+
+    async def acquire(self, user_id: int, lane: str = "interactive",
+                      on_position: Optional[Callable[[int], Any]] = None) -> float:
+        """Wait for a slot; returns the seconds spent queued. Pair with release()."""
+        if lane not in _RANK:
+            raise ValueError(f"Unknown admission lane: {lane!r}")
+        start = time.monotonic()
+        tag = self._tag(user_id, lane)
+        if not self._waiters and self.in_flight < self.max_concurrent:
+            self._admit(lane, tag)
+        else:
+            waiter = _Waiter(user_id, lane, tag, next(self._seq),
+                             asyncio.get_running_loop().create_future(), on_position)
+            self._waiters.append(waiter)
+            self._counters["waited"] += 1
+            self._notify_positions()
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    self.release(lane)  # admitted just as we were cancelled: pass the slot on
+                else:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    self._counters["abandoned"] += 1
+                    self._notify_positions()
+                raise
+        waited = time.monotonic() - start
+        record("queue_wait", waited * 1000, lane=lane)
+        if waited >= 1.0:
+            logger.info("admission_waited", user_id=user_id, lane=lane, seconds=round(waited, 2))
+        return waited
+
+    def release(self, lane: str) -> None:
+        self.running[lane] = max(0, self.running[lane] - 1)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: int, lane: str = "interactive",
+                   on_position: Optional[Callable[[int], Any]] = None) -> AsyncIterator[None]:
+        await self.acquire(user_id, lane, on_position)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def _dispatch(self) -> None:
+        admitted = False
+        while self._waiters and self.in_flight < self.max_concurrent:
+            waiter = min(self._waiters, key=_Waiter.order)
+            self._waiters.remove(waiter)
+            if waiter.future.done():  # cancelled while queued
+                continue
+            self._admit(waiter.lane, waiter.tag)
+            waiter.future.set_result(None)
+            admitted = True
+        if admitted:
+            self._notify_positions()
+
+    def _notify_positions(self) -> None:
+        for position, waiter in enumerate(sorted(self._waiters, key=_Waiter.order), 1):
+            if position == waiter.position:
+                continue
+            waiter.position = position
+            if waiter.on_position is not None:
+                try:
+                    waiter.on_position(position)
+                except Exception as exc:
+                    logger.warning("admission_position_callback_failed", error=str(exc))
+
+    def stats(self) -> Dict[str, Any]:
+        queued = dict.fromkeys(LANES, 0)
+        for waiter in self._waiters:
+            queued[waiter.lane] += 1
+        return {
+            "running": self.in_flight,
+            "max": self.max_concurrent if self.max_concurrent != sys.maxsize else 0,
+            "running_by_lane": dict(self.running),
+            "queued_by_lane": queued,
+            "queued": len(self._waiters),
+            **self._counters,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """Process-wide controller; picks up config edits on each call."""
+    global _controller
+    cfg = Config.get()
+    limit = getattr(cfg, "admission_max_concurrent", 16)
+    weights = getattr(cfg, "admission_user_weights", None)
+    if _controller is None:
+        _controller = AdmissionController(limit, weights)
+    else:
+        _controller.configure(limit, weights)
+    return _controller
+
+
+def reset_admission() -> None:
+    global _controller
+    _controller = None
@@ -1,17 +1,53 @@
 """Complexity classifier — determines if message needs orchestration.
 
-Extracted from app.py _classify_complexity() function.
-Same logic, just wrapped in a function for reusability.
+Extracted from app.py _classify_complexity() function. The pattern tiers are
+compiled once at import; the learned tier lives in complexity_model.py.
 """
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List
+from typing import Optional, Tuple
 
 from src.config import Config
+from src.core.complexity_model import load_model
 from src.utils.logger import logger
 
 
+# Tier 1 — definitely simple (no LLM call)
+_SIMPLE_PATTERNS = (
+    r"^(hi|hello|hey|yo|sup|greetings|good morning|good evening|good night|what's up|whats up)[\s!?.]*$",
+    r"^(thanks|thank you|thx|ty|ok|okay|yes|no|sure|np|nice|cool|great|perfect|got it|understood)[\s!?.]*$",
+    r"^(who are you|what are you|what can you do|help me|what's your name)[\s?]*$",
+)
+
+# Tier 2 — definitely complex (no LLM call); substring matches
+_COMPLEX_KEYWORDS = (
+    # web / network
+    "search", "find", "fetch", "curl ", "wikipedia", "browse", "lookup",
+    "scrape", "download ", "latest news", "what is the price",
+    "who is the ceo", "current", "today", "weather", "stock", "news",
+    # code / system
+    "run ", "execute", "shell", "install ", "git ", "docker ",
+    "systemctl", "grep ", "ls ", "pwd", "cat ", "write a script",
+    "write a program", "create a file", "build", "compile", "deploy",
+    "python", "bash", "script", "code",
+    # agent / memory
+    "memory", "remember ", "delegate", "save", "skill", "workspace",
+    "uptime", "disk usage", "monitor", "check ", "analyze", "research",
+    "calculate",
+    # tool-testing phrases that triggered the bug
+    "test", "try", "demo", "show me", "use the", "use your",
+    "tool", "tools", "capability", "capabilities",
+    "what can you", "can you", "try to", "attempt",
+    # file operations
+    "read file", "write file", "list file", "create", "modify",
+)
+
+# Compiled once, one alternation per tier
+_SIMPLE_RE = re.compile("|".join(f"(?:{p})" for p in _SIMPLE_PATTERNS))
+_COMPLEX_RE = re.compile("|".join(re.escape(k) for k in _COMPLEX_KEYWORDS))
+
+
 async def classify_complexity(
     text: str,
     cfg: Config,
@@ -20,60 +56,67 @@ async def classify_complexity(
 ) -> bool:
     """Classify whether a message requires tools / orchestration.
     
-    Same logic as app.py _classify_complexity() - three-tier approach:
+    Tiered approach:
     1. Obvious simple: short greeting/question → False immediately
-    2. Obvious complex: contains explicit tool keywords → True immediately
-    3. Ambiguous: single cheap LLM classification call
+    2. Obvious complex: long, or contains explicit tool keywords → True immediately
+    2.5 Local model (complexity_model.py), if trained and confident
+    3. Still ambiguous: single cheap LLM classification call
+    
+    Callers that want to overlap tier 3 with other work use classify_tiers()
+    and classify_llm() directly.
     
     Returns:
         True if complex (needs orchestration), False if simple (direct reply)
     """
+    fast = classify_fast(text)
+    if fast is not None:
+        return fast
+    return await classify_llm(text, cfg, pool, user_id)
+
+
+def classify_tiers(text: str, cfg: Optional[Config] = None) -> Tuple[Optional[bool], str, Optional[float]]:
+    """Tiers 1, 2 and the local model (no network I/O).
+
+    Returns:
+        (decision, tier, probability) — decision is None when no tier is
+        confident enough; probability is the model's P(complex) if it ran.
+    """
     t = text.lower().strip()
     logger.debug("complexity_check", text=text[:50], lower=t[:50])
 
-    # Tier 1 — definitely simple (no LLM call)
-    _SIMPLE_PATTERNS = (
-        r"^(hi|hello|hey|yo|sup|greetings|good morning|good evening|good night|what's up|whats up)[\s!?.]*$",
-        r"^(thanks|thank you|thx|ty|ok|okay|yes|no|sure|np|nice|cool|great|perfect|got it|understood)[\s!?.]*$",
-        r"^(who are you|what are you|what can you do|help me|what's your name)[\s?]*$",
-    )
-    for i, p in enumerate(_SIMPLE_PATTERNS):
-        if re.match(p, t):
-            logger.debug("complexity_simple_match", pattern=i, text=text[:50])
-            return False
-
-    # Tier 2 — definitely complex (no LLM call)
-    _COMPLEX_KEYWORDS = [
-        # web / network
-        "search", "find", "fetch", "curl ", "wikipedia", "browse", "lookup",
-        "scrape", "download ", "latest news", "what is the price",
-        "who is the ceo", "current", "today", "weather", "stock", "news",
-        # code / system
-        "run ", "execute", "shell", "install ", "git ", "docker ",
-        "systemctl", "grep ", "ls ", "pwd", "cat ", "write a script",
-        "write a program", "create a file", "build", "compile", "deploy",
-        "python", "bash", "script", "code",
-        # agent / memory
-        "memory", "remember ", "delegate", "save", "skill", "workspace",
-        "uptime", "disk usage", "monitor", "check ", "analyze", "research",
-        "calculate",
-        # tool-testing phrases that triggered the bug
-        "test", "try", "demo", "show me", "use the", "use your",
-        "tool", "tools", "capability", "capabilities",
-        "what can you", "can you", "try to", "attempt",
-        # file operations
-        "read file", "write file", "list file", "create", "modify",
-    ]
+    if _SIMPLE_RE.match(t):
+        logger.debug("complexity_simple_match", text=text[:50])
+        return False, "simple_pattern", None
     # Messages longer than 80 chars are almost always non-trivial
     if len(text) > 80:
         logger.debug("complexity_length_match", text=text[:50])
-        return True
-    if any(kw in t for kw in _COMPLEX_KEYWORDS):
+        return True, "length", None
+    if _COMPLEX_RE.search(t):
         logger.debug("complexity_keyword_match", text=text[:50])
-        return True
+        return True, "keyword", None
+
+    # Tier 2.5 — local learned model, trusted only above the confidence threshold
+    cfg = cfg or Config.get()
+    model = load_model(getattr(cfg, "complexity_model_path", ""))
+    if model is not None:
+        p = model.predict_proba(text)
+        if max(p, 1 - p) >= float(getattr(cfg, "complexity_model_threshold", 0.8)):
+            logger.debug("complexity_model_match", text=text[:50], p=round(p, 3))
+            return p >= 0.5, "model", p
+        logger.debug("complexity_ambiguous", text=text[:50], p=round(p, 3))
+        return None, "model_unsure", p
 
-    # Tier 3 — ambiguous: ask the LLM
     logger.debug("complexity_ambiguous", text=text[:50])
+    return None, "ambiguous", None
+
+
+def classify_fast(text: str, cfg: Optional[Config] = None) -> Optional[bool]:
+    """All local tiers: False/True when decided, None when the LLM is needed."""
+    return classify_tiers(text, cfg)[0]
+
+
+async def classify_llm(text: str, cfg: Config, pool, user_id: int) -> bool:
+    """Tier 3 — ambiguous: ask the LLM (one cheap round trip)."""
     try:
         payload = {
             "model": cfg.default_model,
@@ -0,0 +1,185 @@
+"""Local complexity model — hashed n-gram logistic regression stored as JSON.
+
+Replaces the LLM round trip for messages the regex/keyword tiers cannot
+decide. Features are word unigrams, word bigrams and character trigrams,
+hashed (crc32) into `dim` buckets; the model is a sparse weight map plus a
+bias, so scoring one message is a few dozen dict lookups.
+
+Trained from the complexity_log table (src/db/complexity_log.py): the label
+is whether the run actually used a tool, not what the router decided.
+
+    rk-agent-train-classifier            # train from the DB, write the JSON
+    python tests/perf/eval_complexity.py # offline accuracy + p99 latency
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+DEFAULT_DIM = 1 << 18
+
+
+def features(text: str, dim: int = DEFAULT_DIM) -> Dict[int, float]:
+    """Hashed, L2-normalised binary n-gram features of one message."""
+    t = text.lower().strip()[:300]
+    words = _WORD_RE.findall(t)
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {' '.join(words)} "
+    grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    grams.append(f"len:{min(len(t) // 20, 8)}")
+    idx = {zlib.crc32(g.encode()) % dim for g in grams}
+    if not idx:
+        return {}
+    norm = 1.0 / math.sqrt(len(idx))
+    return {i: norm for i in idx}
+
+
+class ComplexityModel:
+    """Logistic regression over hashed features; p = P(message needs tools)."""
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, bias: float = 0.0,
+                 dim: int = DEFAULT_DIM, meta: Optional[Dict] = None):
+        self.weights = weights or {}
+        self.bias = bias
+        self.dim = dim
+        self.meta = meta or {}
+
+    def predict_proba(self, text: str) -> float:
+        z = self.bias
+        w = self.weights
+        for i, v in features(text, self.dim).items():
+            z += w.get(i, 0.0) * v
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+    @classmethod
+    def train(
+        cls,
+        examples: Sequence[Tuple[str, bool]],
+        dim: int = DEFAULT_DIM,
+        epochs: int = 15,
+        lr: float = 0.5,
+        l2: float = 1e-6,
+        seed: int = 0,
+    ) -> "ComplexityModel":
+        """Plain SGD; classes are re-weighted so a skewed log does not bias the model."""
+        data = [(features(t, dim), 1.0 if y else 0.0) for t, y in examples]
+        pos = sum(y for _, y in data) or 1.0
+        neg = (len(data) - pos) or 1.0
+        cw = {1.0: len(data) / (2 * pos), 0.0: len(data) / (2 * neg)}
+        w: Dict[int, float] = {}
+        b = 0.0
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = lr / (1 + epoch * 0.5)
+            for x, y in data:
+                z = b + sum(w.get(i, 0.0) * v for i, v in x.items())
+                p = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+                g = (p - y) * cw[y]
+                b -= step * g
+                for i, v in x.items():
+                    w[i] = w.get(i, 0.0) * (1 - step * l2) - step * g * v
+        w = {i: round(v, 5) for i, v in w.items() if abs(v) > 1e-4}
+        meta = {
+            "examples": len(data),
+            "positives": int(sum(y for _, y in data)),
+            "trained_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return cls(w, b, dim, meta)
+
+    def to_json(self) -> Dict:
+        return {
+            "version": 1,
+            "dim": self.dim,
+            "bias": self.bias,
+            "weights": {str(i): v for i, v in self.weights.items()},
+            "meta": self.meta,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "ComplexityModel":
+        return cls(
+            {int(i): float(v) for i, v in data.get("weights", {}).items()},
+            float(data.get("bias", 0.0)),
+            int(data.get("dim", DEFAULT_DIM)),
+            data.get("meta", {}),
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_json(), f)
+        os.replace(tmp, path)
+
+
+# (path, mtime, model) — reloaded only when the file changes
+_loaded: Tuple[str, float, Optional[ComplexityModel]] = ("", 0.0, None)
+
+
+def load_model(path: str) -> Optional[ComplexityModel]:
+    """Model at path, cached until the file changes; None if absent or invalid."""
+    global _loaded
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if _loaded[0] == path and _loaded[1] == mtime:
+        return _loaded[2]
+    try:
+        with open(path) as f:
+            model = ComplexityModel.from_json(json.load(f))
+    except (OSError, ValueError):
+        model = None
+    _loaded = (path, mtime, model)
+    return model
+
+
+def accuracy(model: ComplexityModel, examples: Sequence[Tuple[str, bool]]) -> float:
+    if not examples:
+        return 0.0
+    hits = sum((model.predict_proba(t) >= 0.5) == y for t, y in examples)
+    return hits / len(examples)
+
+
+async def _train_from_db(out: str, holdout: float) -> None:
+    from src.config import Config
+    from src.db.complexity_log import labeled_examples
+    from src.db.key_store import init_db
+
+    await init_db()
+    examples = await labeled_examples()
+    if len(examples) < 20:
+        print(f"Only {len(examples)} labeled decisions in complexity_log — need at least 20.")
+        return
+    random.Random(0).shuffle(examples)
+    cut = int(len(examples) * (1 - holdout))
+    model = ComplexityModel.train(examples[:cut])
+    if holdout:
+        print(f"held-out accuracy: {accuracy(model, examples[cut:]):.3f} on {len(examples) - cut} examples")
+    model = ComplexityModel.train(examples)
+    model.save(out or Config.get().complexity_model_path)
+    print(f"trained on {len(examples)} examples, {len(model.weights)} weights -> "
+          f"{out or Config.get().complexity_model_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the local complexity classifier from complexity_log.")
+    parser.add_argument("--out", default="", help="model path (default: config complexity_model_path)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction held out to report accuracy")
+    args = parser.parse_args()
+    asyncio.run(_train_from_db(args.out, args.holdout))
+
+
+if __name__ == "__main__":
+    main()
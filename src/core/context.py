@@ -2,14 +2,21 @@
 
 Extracted from app.py _build_runtime_context() function.
 Same logic, just wrapped in a class for reusability.
+
+build_messages() lays a request out for provider prompt caching: the stable
+part (system prompt, pinned memories, summary, earlier turns) comes first and
+stays byte-identical between turns; volatile data (runtime context with the
+clock, retrieved fragments, the new message) goes into the last message only.
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 import platform
 import socket
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from src.config import Config
 from src.utils.logger import logger
@@ -92,3 +99,59 @@ class ContextBuilder:
             context_parts.append(f"user: {user_message}")
         
         return "\n".join(context_parts)
+
+    @staticmethod
+    def build_messages(
+        system_prompt: str,
+        runtime_context: str,
+        user_message: str,
+        summary: Optional[str] = None,
+        history: Optional[List[Dict]] = None,
+        pinned: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Build the prompt-cache friendly message list for one request.
+
+        Args:
+            system_prompt: soul.md + tools prompt + mandates (Config.system_prompt)
+            runtime_context: [CTX] line — changes every minute, so it goes last
+            user_message: The new message
+            summary: Rolling conversation summary
+            history: Earlier messages, oldest first, excluding the new one
+            pinned: Pinned memories, injected into the system block
+
+        Returns:
+            [system, *earlier turns, user] — every message but the last is
+            identical to the previous request's, apart from newly added turns.
+        """
+        system_parts = [system_prompt]
+        if pinned:
+            system_parts.append(
+                "[PINNED CONTEXT]\n" + "\n".join(f"  {k}: {v}" for k, v in pinned.items())
+            )
+        if summary:
+            system_parts.append(f"[Earlier context summary]\n{summary}")
+        messages: List[Dict[str, Any]] = [{"role": "system", "content": "\n\n".join(system_parts)}]
+        for m in history or []:
+            if m.get("role") in ("user", "assistant") and m.get("content"):
+                messages.append({"role": m["role"], "content": m["content"]})
+        messages.append({"role": "user", "content": f"{runtime_context}\n\n{user_message}"})
+        return messages
+
+
+def prefix_hash(
+    messages: Sequence[Dict[str, Any]],
+    tools: Optional[Sequence[Any]] = None,
+    upto: Optional[int] = None,
+) -> str:
+    """Hash of what providers see as the cacheable prefix of a request.
+
+    Covers the serialized tools plus messages[:upto] (default: all but the
+    last message). Two requests share a provider cache hit only if this
+    matches for the shorter one's prefix.
+    """
+    end = len(messages) - 1 if upto is None else upto
+    h = hashlib.sha256()
+    h.update(json.dumps(list(tools or []), sort_keys=True, default=str).encode())
+    for m in messages[:end]:
+        h.update(json.dumps(m, sort_keys=True, default=str).encode())
+    return h.hexdigest()
@@ -0,0 +1,155 @@
+"""Context budget — keeps the prompt of tool-heavy runs inside a token budget.
+
+Every tool result is appended to the thought history, so by turn 8 each
+provider call re-sends tens of KB of stale output. Before each call,
+ContextBudgeter.fit() returns a copy of the history that fits the budget:
+
+  1. the newest `context_keep_recent_tools` tool results are always kept in full
+  2. older tool results are cut to head + tail, oldest first
+  3. if that is still not enough, they are elided to a one-line stub
+
+The budget is context_budget_tokens, capped by the provider's context window
+minus context_output_reserve. Tokens are estimated at ~4 chars each, the same
+heuristic chat_store uses. The thought history itself is never modified.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.config import Config
+from src.utils.logger import logger
+
+_totals: Dict[str, int] = {"runs": 0, "calls": 0, "compressed_calls": 0, "tokens_saved": 0}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Rough token count of one chat message, including tool call arguments."""
+    content = message.get("content") or ""
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    tokens = 4 + estimate_tokens(content)
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"], default=str))
+    return tokens
+
+
+def budget_stats() -> Dict[str, int]:
+    """Process-wide totals since start (shown in /status)."""
+    with _totals_lock:
+        return dict(_totals)
+
+
+class ContextBudgeter:
+    """Fits one run's message history to the provider's context budget.
+
+    Create one per run; tokens_saved accumulates over all provider calls of
+    that run and is reported by finish(). Process totals update on every fit().
+    """
+
+    def __init__(self, config: Optional[Config] = None):
+        cfg = config or Config.get()
+        self.budget_tokens = int(getattr(cfg, "context_budget_tokens", 12000))
+        self.windows: Dict[str, int] = dict(getattr(cfg, "context_window_tokens", {}) or {})
+        self.output_reserve = int(getattr(cfg, "context_output_reserve", 2048))
+        self.keep_recent = max(0, int(getattr(cfg, "context_keep_recent_tools", 2)))
+        self.truncate_chars = max(80, int(getattr(cfg, "context_tool_truncate_chars", 600)))
+        self.tokens_saved = 0
+        self.calls = 0
+        self.compressed_calls = 0
+        self.last_tokens = 0
+
+    def budget_for(self, provider: str) -> int:
+        budget = self.budget_tokens
+        window = self.windows.get(provider)
+        if window:
+            budget = min(budget, window - self.output_reserve)
+        return max(budget, 1)
+
+    def _truncate(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        content = message.get("content") or ""
+        if not isinstance(content, str) or len(content) <= self.truncate_chars:
+            return message
+        head = self.truncate_chars * 2 // 3
+        tail = self.truncate_chars - head
+        cut = len(content) - head - tail
+        return {
+            **message,
+            "content": f"{content[:head]}\n[... {cut} chars truncated ...]\n{content[-tail:]}",
+        }
+
+    @staticmethod
+    def _elide(message: Dict[str, Any]) -> Dict[str, Any]:
+        content = message.get("content") or ""
+        if isinstance(content, str) and content.startswith("[elided"):
+            return message
+        first = str(content).strip().splitlines()[0][:80] if str(content).strip() else ""
+        return {**message, "content": f"[elided older tool result: {first}]"}
+
+    def fit(self, messages: List[Dict[str, Any]], provider: str) -> List[Dict[str, Any]]:
+        """Return messages, or a compressed copy when they exceed the budget."""
+        self.calls += 1
+        budget = self.budget_for(provider)
+        sizes = [message_tokens(m) for m in messages]
+        before = total = sum(sizes)
+        if total <= budget:
+            self.last_tokens = total
+            with _totals_lock:
+                _totals["calls"] += 1
+            return messages
+
+        tool_idx = [i for i, m in enumerate(messages) if m.get("role") == "tool"]
+        older = tool_idx[:-self.keep_recent] if self.keep_recent else tool_idx
+        out = list(messages)
+        for stage in (self._truncate, self._elide):
+            for i in older:
+                if total <= budget:
+                    break
+                new = stage(out[i])
+                if new is out[i]:
+                    continue
+                size = message_tokens(new)
+                total -= sizes[i] - size
+                sizes[i] = size
+                out[i] = new
+            if total <= budget:
+                break
+
+        saved = before - total
+        with _totals_lock:
+            _totals["calls"] += 1
+            if saved > 0:
+                _totals["compressed_calls"] += 1
+                _totals["tokens_saved"] += saved
+        if saved > 0:
+            self.tokens_saved += saved
+            self.compressed_calls += 1
+            logger.info(
+                "context_budget_applied",
+                provider=provider,
+                budget=budget,
+                tokens_before=before,
+                tokens_after=total,
+            )
+        self.last_tokens = total
+        return out
+
+    def finish(self, user_id: int = 0) -> int:
+        """Count the run and log its savings; returns tokens saved by this run."""
+        with _totals_lock:
+            _totals["runs"] += 1
+        if self.tokens_saved:
+            logger.info(
+                "context_budget_run",
+                user_id=user_id,
+                calls=self.calls,
+                compressed_calls=self.compressed_calls,
+                tokens_saved=self.tokens_saved,
+            )
+        return self.tokens_saved
@@ -7,28 +7,36 @@ Design:
 - One asyncio.Queue per session (keyed by chat_id / session integer).
 - The queue is bounded (200 items). If the consumer falls behind, the
   oldest event is dropped rather than blocking the orchestrator.
-- teardown() must be called when a session ends to release memory.
+- teardown() should be called when a session ends to release memory;
+  sessions that never call it are evicted once idle (src/utils/registry.py),
+  unless a consumer is waiting on the queue or a fan-out subscriber remains.
 - thread-safe: all operations are async, no locks needed.
 """
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
 from typing import AsyncIterator
 
 from src.core.models import EventType, SessionEvent
 from src.utils.logger import logger
+from src.utils.registry import Registry
 
-_buses: dict[int, asyncio.Queue[SessionEvent]] = defaultdict(
-    lambda: asyncio.Queue(maxsize=200)
+_buses: Registry[int, asyncio.Queue[SessionEvent]] = Registry(
+    "event_buses", in_use=lambda q: bool(getattr(q, "_getters", None)),
+)
+
+_fanout: Registry[int, list[asyncio.Queue[SessionEvent]]] = Registry(
+    "event_fanout", in_use=bool,
 )
 
-_fanout: dict[int, list[asyncio.Queue[SessionEvent]]] = defaultdict(list)
+
+def _new_bus() -> asyncio.Queue[SessionEvent]:
+    return asyncio.Queue(maxsize=200)
 
 
 def get_bus(session_id: int) -> asyncio.Queue[SessionEvent]:
     """Return the primary event queue for a session."""
-    return _buses[session_id]
+    return _buses.get_or_create(session_id, _new_bus)
 
 
 async def emit(session_id: int, event: SessionEvent) -> None:
@@ -37,7 +45,17 @@ async def emit(session_id: int, event: SessionEvent) -> None:
     Non-blocking: if the queue is full, the oldest item is dropped
     before inserting the new one. The orchestrator never blocks on emit.
     """
-    q = _buses[session_id]
+    emit_nowait(session_id, event)
+
+
+def emit_nowait(session_id: int, event: SessionEvent, create: bool = True) -> None:
+    """Synchronous emit(), for callers outside a coroutine (e.g. span exits).
+
+    With create=False the event is dropped unless the session already has a bus.
+    """
+    if not create and session_id not in _buses and session_id not in _fanout:
+        return
+    q = get_bus(session_id)
     if q.full():
         try:
             q.get_nowait()
@@ -64,21 +82,21 @@ def subscribe(session_id: int) -> asyncio.Queue[SessionEvent]:
     the primary Telegram consumer.
     """
     q: asyncio.Queue[SessionEvent] = asyncio.Queue(maxsize=200)
-    _fanout[session_id].append(q)
+    _fanout.get_or_create(session_id, list).append(q)
     return q
 
 
 def unsubscribe(session_id: int, q: asyncio.Queue[SessionEvent]) -> None:
     """Remove a subscriber queue."""
     try:
-        _fanout[session_id].remove(q)
+        _fanout.get(session_id, []).remove(q)
     except ValueError:
         pass
 
 
 async def drain(session_id: int, timeout: float = 0.1) -> list[SessionEvent]:
     """Drain all currently queued events for a session (non-blocking)."""
-    q = _buses[session_id]
+    q = get_bus(session_id)
     events: list[SessionEvent] = []
     try:
         while True:
@@ -93,7 +111,7 @@ async def iter_events(
     sentinel_type: EventType = EventType.MESSAGE,
 ) -> AsyncIterator[SessionEvent]:
     """Async generator that yields events until a MESSAGE(final=True) event."""
-    q = _buses[session_id]
+    q = get_bus(session_id)
     while True:
         event = await q.get()
         yield event
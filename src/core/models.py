@@ -115,6 +115,7 @@ class EventType(Enum):
     ERROR         = "error"          # unrecoverable error in orchestration
     CANCELLED     = "cancelled"      # user cancelled the task
     BUDGET        = "budget"         # token budget update
+    SPAN          = "span"           # timed span finished (src/utils/tracing.py)
 
 
 @dataclass
@@ -134,7 +135,11 @@ class SessionEvent:
                    TOOL_RESULT:   {"tool": str, "result": str, "success": bool}
                    MESSAGE:       {"text": str, "final": bool}
                    ERROR:         {"reason": str}
-                   BUDGET:        {"input": int, "output": int, "total": int}
+                   BUDGET:        {"input": int, "output": int, "total": int, "turns": int,
+                                   "tool_calls": int, "elapsed": float, "limit": str|None}
+                                  after each provider call (run_budget.py); at run end
+                                  {"context_tokens": int, "tokens_saved": int, ...same totals}
+                   SPAN:          {"span": str, "ms": float, "ok": bool, "user_id": int, ...tags}
         turn:    Orchestration turn number this event belongs to.
         ts:      Monotonic timestamp at creation.
     """
@@ -13,11 +13,14 @@ from typing import Any, Callable, Dict, List, Optional
 from src.config import Config
 from src.core.complexity import classify_complexity
 from src.core.context import ContextBuilder
+from src.core.context_budget import ContextBudgeter
 from src.core.models import AgentState, AgentStatus, ToolCall, ToolResult
-from src.core.tools import ToolExecutor
+from src.core.run_budget import RunBudget
+from src.core.tools import ToolExecutor, run_tool_calls
 from src.providers.provider_pool import get_pool
 from src.tools.schemas import get_all_schemas
 from src.utils.logger import logger
+from src.utils.tracing import bind_trace
 from src.core.event_bus import emit as _emit_event
 from src.core.models import EventType, SessionEvent
 
@@ -79,6 +82,10 @@ class Orchestrator:
         history: Optional[List[Dict]] = None,
         summary: Optional[str] = None,
         max_turns: int = 10,
+        prompt_messages: Optional[List[Dict]] = None,
+        run_id: Optional[str] = None,
+        resume: Optional[Dict] = None,
+        reply_chat_id: Optional[int] = None,
     ) -> str:
         """Run the orchestration loop.
         
@@ -93,6 +100,13 @@ class Orchestrator:
             history: Chat history
             summary: Conversation summary
             max_turns: Maximum reasoning turns
+            prompt_messages: Prebuilt prompt (system, history, user turn); replaces
+                the system_prompt + message pair (worker mode passes the bot's prompt)
+            run_id: Checkpoint the run under this id after every tool turn
+                (src/db/checkpoints.py); the checkpoint is dropped when the run ends
+            resume: A loaded checkpoint to continue from instead of turn 0
+            reply_chat_id: Chat stored with checkpoints when chat_id is a
+                worker session id rather than the chat
             
         Returns:
             Final AI response
@@ -104,21 +118,31 @@ class Orchestrator:
         )
         
         # Build message history
-        thought_history = [
+        thought_history = list(prompt_messages) if prompt_messages else [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": message},
         ]
+        if resume:
+            thought_history = list(resume["thought_history"])
         
         # Get tool schemas for function calling
+        # (ToolSchema objects — each provider serializes them to its own format)
         tool_schemas = get_all_schemas()
-        openai_schemas = [s.to_openai() for s in tool_schemas]
         
         priorities = self.config.default_provider_priority or ["gemini", "groq", "openrouter"]
-        agent_results: dict = {}
+        agent_results: dict = dict(resume["agent_results"]) if resume else {}
         narrative_chunks: list = []
+        budgeter = ContextBudgeter(self.config)
+        budget = RunBudget(self.config, user_id, max_turns=max_turns)
+        if resume:
+            budget.restore(resume.get("budget") or {})
+        if resume and not run_id:
+            run_id = resume["run_id"]
+        checkpointed = keep_checkpoint = False
+        trace_token = bind_trace(user_id=user_id, session_id=chat_id)
         
         try:
-            for turn in range(max_turns):
+            for turn in range(resume["turn"] if resume else 0, budget.max_turns):
                 # Check cancel flag
                 if self.is_cancelled and self.is_cancelled(user_id):
                     state.status = AgentStatus.CANCELLED
@@ -126,33 +150,42 @@ class Orchestrator:
                     return "Task cancelled by user."
                 
                 state.turn_count = turn + 1
+                bind_trace(turn=turn)
                 await self._notify_status(state)
                 await _emit_event(chat_id, SessionEvent(
                     EventType.THINKING, turn=turn
                 ))
+                # Over budget: one last call without tools to answer with what we have
+                limit = budget.exhausted()
                 
                 # Get response from provider
                 resp = await self._get_provider_response(
                     user_id=user_id,
                     priorities=priorities,
-                    messages=thought_history,
-                    tool_schemas=openai_schemas,
+                    messages=thought_history + [budget.final_answer_message()] if limit else thought_history,
+                    tool_schemas=[] if limit else tool_schemas,
+                    budgeter=budgeter,
                 )
                 
                 if not resp:
                     break
+                await _emit_event(chat_id, SessionEvent(
+                    EventType.BUDGET, payload=budget.charge(resp, budgeter.last_tokens), turn=turn,
+                ))
                 
                 # Handle tool calls
-                if resp.has_tool_calls:
-                    for tool_call in resp.tool_calls:
-                        # Check cancel between tool calls
+                if resp.has_tool_calls and not limit:
+                    # Check cancel before running the turn's tool calls
+                    if self.is_cancelled and self.is_cancelled(user_id):
+                        state.status = AgentStatus.CANCELLED
+                        await self._notify_status(state)
+                        return "Task cancelled by user."
+
+                    state.status = AgentStatus.EXECUTING_TOOL
+
+                    async def _run_call(tool_call: ToolCall) -> str:
                         if self.is_cancelled and self.is_cancelled(user_id):
-                            state.status = AgentStatus.CANCELLED
-                            await self._notify_status(state)
-                            return "Task cancelled by user."
-                        
-                        # Execute tool
-                        state.status = AgentStatus.EXECUTING_TOOL
+                            return "Error: cancelled by user."
                         state.current_tool = ToolCall(
                             name=tool_call.name,
                             arguments=tool_call.arguments,
@@ -165,14 +198,14 @@ class Orchestrator:
                             payload={"tool": tool_call.name, "args": tool_call.arguments},
                             turn=turn,
                         ))
-                        
+
                         result = await self.tool_executor.execute(
                             tool_name=tool_call.name,
                             arguments=tool_call.arguments,
                             user_id=user_id,
                             system_prompt=system_prompt,
                         )
-                        
+
                         tool_result = ToolResult(
                             tool_name=tool_call.name,
                             result=result,
@@ -188,34 +221,56 @@ class Orchestrator:
                             },
                             turn=turn,
                         ))
-                        
-                        # Add to history
-                        thought_history.append({
-                            "role": "assistant",
-                            "content": None,
-                            "tool_calls": [{
-                                "id": tool_call.call_id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_call.name,
-                                    "arguments": json.dumps(tool_call.arguments),
-                                },
-                            }],
-                        })
+                        return result
+
+                    # Independent calls run concurrently; results keep call order.
+                    # Calls beyond the tool budget are answered without running.
+                    allowed = budget.allow_tools(len(resp.tool_calls))
+                    results = await run_tool_calls(
+                        resp.tool_calls[:allowed], _run_call, self.tool_executor.max_parallel,
+                    )
+                    results += ["Skipped: this request's tool-call budget is used up."] * (
+                        len(resp.tool_calls) - allowed
+                    )
+
+                    # Add to history: one assistant message, then one tool message per call
+                    thought_history.append({
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [{
+                            "id": tool_call.call_id,
+                            "type": "function",
+                            "function": {
+                                "name": tool_call.name,
+                                "arguments": json.dumps(tool_call.arguments),
+                            },
+                        } for tool_call in resp.tool_calls],
+                    })
+                    for i, (tool_call, result) in enumerate(zip(resp.tool_calls, results)):
                         thought_history.append({
                             "role": "tool",
                             "content": result,
                             "tool_call_id": tool_call.call_id,
                         })
-                        
-                        agent_results[f"turn_{turn}"] = {
+                        agent_results[f"turn_{turn}" if i == 0 else f"turn_{turn}.{i}"] = {
                             "output": result,
                             "tool_used": tool_call.name,
                         }
+                    if run_id:
+                        await self._checkpoint(run_id, user_id, reply_chat_id or chat_id, message,
+                                               turn + 1, thought_history, agent_results, budget)
+                        checkpointed = True
+
+                    if self.is_cancelled and self.is_cancelled(user_id):
+                        state.status = AgentStatus.CANCELLED
+                        await self._notify_status(state)
+                        return "Task cancelled by user."
                     continue  # Continue to next turn
                 
                 # No tool calls - final response
                 output = resp.content
+                if limit and not (output or "").strip():
+                    output = budget.cut_short_text()
                 state.status = AgentStatus.IDLE
                 await self._notify_status(state)
                 
@@ -236,7 +291,7 @@ class Orchestrator:
                         full_text = full_text.split(marker)[0].strip()
                 
                 findings_block = ""
-                if agent_results:
+                if agent_results and getattr(self.config, "log_level", "info").lower() == "debug":
                     findings_block = "\n\n<b>Process log:</b>\n"
                     for aid, res in agent_results.items():
                         tool = res.get("tool_used", "analysis")
@@ -259,23 +314,46 @@ class Orchestrator:
             
             return "The reasoning loop reached its turn limit. Please rephrase your request."
             
+        except asyncio.CancelledError:
+            # Cancelled without a stop request: shutdown, keep the checkpoint
+            keep_checkpoint = not (self.is_cancelled and self.is_cancelled(user_id))
+            raise
         except Exception as exc:
             state.status = AgentStatus.ERROR
             await self._notify_status(state)
             logger.exception("orchestration_failed", user_id=user_id, error=str(exc))
             return f"An error occurred: {str(exc)}"
+        finally:
+            trace_token.var.reset(trace_token)
+            if (checkpointed or resume) and not keep_checkpoint:
+                try:
+                    from src.db import checkpoints
+                    await checkpoints.delete(run_id)
+                except Exception as exc:
+                    logger.warning("checkpoint_delete_failed", run_id=run_id, error=str(exc))
+            saved = budgeter.finish(user_id)
+            await _emit_event(chat_id, SessionEvent(
+                EventType.BUDGET,
+                payload={"context_tokens": budgeter.last_tokens, "tokens_saved": saved, **budget.snapshot()},
+                turn=state.turn_count,
+            ))
     
     async def _get_provider_response(
         self,
         user_id: int,
         priorities: List[str],
         messages: List[Dict],
-        tool_schemas: List[Dict],
+        tool_schemas: List[Any],
+        budgeter: Optional[ContextBudgeter] = None,
     ) -> Optional[Any]:
-        """Get response from provider with failover."""
+        """Get response from provider with failover.
+
+        With a budgeter, older tool results are compressed to fit each
+        provider's context budget before sending.
+        """
         from src.providers.base_provider import StructuredResponse
         
-        for provider in priorities:
+        for provider in self.pool.order_providers(user_id, priorities):
             # Check cancel
             if self.is_cancelled and self.is_cancelled(user_id):
                 return None
@@ -283,7 +361,8 @@ class Orchestrator:
             try:
                 payload = {
                     "model": self.model_map.get(provider, self.config.default_model),
-                    "messages": messages,
+                    "messages": budgeter.fit(messages, provider) if budgeter else messages,
+                    "parallel_tool_calls": getattr(self.config, "parallel_tool_calls", True),
                 }
                 
                 resp = await asyncio.wait_for(
@@ -301,6 +380,19 @@ class Orchestrator:
         
         return None
     
+    async def _checkpoint(self, run_id: str, user_id: int, chat_id: int, message: str, next_turn: int,
+                          thought_history: List[Dict], agent_results: Dict, budget: RunBudget) -> None:
+        """Save the run after a tool turn; a failed save never fails the run."""
+        from src.db import checkpoints
+        try:
+            await checkpoints.save(run_id, user_id, chat_id, message, next_turn, {
+                "thought_history": thought_history,
+                "agent_results": agent_results,
+                "budget": budget.snapshot(),
+            })
+        except Exception as exc:
+            logger.warning("checkpoint_save_failed", run_id=run_id, error=str(exc))
+
     async def _notify_status(self, state: AgentState):
         """Notify interface of status update."""
         if self.on_status_update:
@@ -0,0 +1,126 @@
+"""Run budget — caps tokens, turns, wall time and tool calls of one orchestration.
+
+Limits come from run_budget in config, overridden per user by
+run_budget_per_user (keyed by users.id); 0 means unlimited, except for
+max_turns, which falls back to 50. Loops call charge() after every provider
+response and exhausted() before the next one.
+Once a limit is hit the loop makes one last call without tools, with
+final_answer_message() appended, so the user always gets an answer built
+from what was gathered so far instead of a "turn limit" error.
+
+The turn limit counts that final call: with max_turns=10 the agent gets at
+most 9 tool turns plus the forced answer.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from src.config import Config
+from src.utils.logger import logger
+
+_LIMITS = ("max_tokens", "max_turns", "max_seconds", "max_tool_calls")
+_DEFAULTS = {"max_tokens": 60000, "max_turns": 10, "max_seconds": 120, "max_tool_calls": 16}
+
+
+class RunBudget:
+    """Usage and limits of one run. Create one per run."""
+
+    def __init__(self, config: Optional[Config] = None, user_id: int = 0, max_turns: Optional[int] = None):
+        cfg = config or Config.get()
+        limits = {**_DEFAULTS, **(getattr(cfg, "run_budget", None) or {})}
+        per_user = (getattr(cfg, "run_budget_per_user", None) or {}).get(str(user_id)) or {}
+        limits.update({k: v for k, v in per_user.items() if k in _LIMITS})
+        self.user_id = user_id
+        self.max_tokens = int(limits["max_tokens"] or 0)
+        self.max_turns = int(limits["max_turns"] or 0) or 50
+        if max_turns is not None:
+            self.max_turns = min(self.max_turns, max_turns)
+        self.max_seconds = float(limits["max_seconds"] or 0)
+        self.max_tool_calls = int(limits["max_tool_calls"] or 0)
+
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.turns = 0
+        self.tool_calls = 0
+        self.limit_hit: Optional[str] = None
+        self._start = time.monotonic()
+
+    @property
+    def tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def charge(self, response: Any, input_estimate: int = 0) -> Dict[str, Any]:
+        """Count one provider call; returns the BUDGET event payload.
+
+        Uses the provider's usage when reported, else input_estimate and
+        ~4 chars per output token.
+        """
+        usage = getattr(response, "usage", None) or {}
+        prompt = usage.get("prompt_tokens") or usage.get("prompt_token_count") or input_estimate
+        completion = usage.get("completion_tokens") or usage.get("candidates_token_count")
+        if not completion:
+            completion = len(getattr(response, "content", "") or "") // 4
+        self.turns += 1
+        self.input_tokens += int(prompt or 0)
+        self.output_tokens += int(completion or 0)
+        return {"input": int(prompt or 0), "output": int(completion or 0), **self.snapshot()}
+
+    def allow_tools(self, requested: int) -> int:
+        """Reserve up to requested tool calls; returns how many may run."""
+        allowed = requested
+        if self.max_tool_calls:
+            allowed = max(0, min(requested, self.max_tool_calls - self.tool_calls))
+        self.tool_calls += allowed
+        return allowed
+
+    def exhausted(self) -> Optional[str]:
+        """Name of the first limit reached ("tokens", "turns", "seconds", "tool_calls"), else None."""
+        if self.limit_hit:
+            return self.limit_hit
+        reason = None
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            reason = "tokens"
+        elif self.turns >= self.max_turns - 1:
+            reason = "turns"
+        elif self.max_seconds and self.elapsed >= self.max_seconds:
+            reason = "seconds"
+        elif self.max_tool_calls and self.tool_calls >= self.max_tool_calls:
+            reason = "tool_calls"
+        if reason:
+            self.limit_hit = reason
+            logger.info("run_budget_exhausted", user_id=self.user_id, **self.snapshot())
+        return reason
+
+    def final_answer_message(self) -> Dict[str, str]:
+        return {
+            "role": "user",
+            "content": (
+                f"[Budget reached: {self.limit_hit}] Do not call any more tools. "
+                "Answer the original request now using the information gathered so far, "
+                "and say briefly what is still unverified."
+            ),
+        }
+
+    def cut_short_text(self) -> str:
+        """Shown when even the forced final answer came back empty."""
+        return f"Stopped: this request hit its {self.limit_hit or 'run'} budget before an answer was ready."
+
+    def restore(self, usage: Dict[str, Any]) -> None:
+        """Carry usage over from snapshot() of an interrupted run; the clock restarts."""
+        self.input_tokens = int(usage.get("total") or 0)
+        self.turns = int(usage.get("turns") or 0)
+        self.tool_calls = int(usage.get("tool_calls") or 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total": self.tokens,
+            "turns": self.turns,
+            "tool_calls": self.tool_calls,
+            "elapsed": round(self.elapsed, 2),
+            "limit": self.limit_hit,
+        }
@@ -2,15 +2,79 @@
 
 Extracted from agent_factory.py execute_tool() function.
 Same logic, just wrapped in a class for reusability.
+
+run_tool_calls() executes all tool calls from one model turn: consecutive
+parallel-safe calls (ToolSchema.parallel_safe) run concurrently, bounded by
+max_parallel_tools; exclusive calls run alone. Results keep call order.
+When one call of a batch raises (or the turn is cancelled), the other calls
+still running are cancelled and awaited before the error propagates, so no
+shell or sandbox command keeps running unattended.
 """
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
 
 from src.config import Config
 from src.tools.registry import get_registry
+from src.tools.schemas import SCHEMA_MAP
 from src.utils.logger import logger
+from src.utils.tracing import traced
+
+
+def is_parallel_safe(tool_name: str) -> bool:
+    """True if the tool may run concurrently with other parallel-safe tools."""
+    schema = SCHEMA_MAP.get(tool_name)
+    return bool(schema and schema.parallel_safe)
+
+
+def plan_batches(tool_names: Sequence[str]) -> List[List[int]]:
+    """Group call indices into batches that may run concurrently.
+
+    Consecutive parallel-safe calls share a batch; every exclusive call gets
+    a batch of its own, so side effects keep the order the model asked for.
+    """
+    batches: List[List[int]] = []
+    for i, name in enumerate(tool_names):
+        if is_parallel_safe(name) and batches and is_parallel_safe(tool_names[batches[-1][0]]):
+            batches[-1].append(i)
+        else:
+            batches.append([i])
+    return batches
+
+
+async def run_tool_calls(
+    calls: Sequence[Any],
+    run_one: Callable[[Any], Awaitable[str]],
+    max_parallel: int = 4,
+) -> List[str]:
+    """Run one turn's tool calls, returning results in the original call order.
+
+    Args:
+        calls: Objects with a .name attribute (ToolCall)
+        run_one: Coroutine function executing a single call
+        max_parallel: Upper bound on concurrently running calls (<= 1 = sequential)
+    """
+    results: List[str] = [""] * len(calls)
+    sem = asyncio.Semaphore(max(1, int(max_parallel or 1)))
+
+    async def _run(i: int) -> None:
+        async with sem:
+            results[i] = await run_one(calls[i])
+
+    for batch in plan_batches([c.name for c in calls]):
+        if len(batch) == 1:
+            await _run(batch[0])
+        else:
+            tasks = [asyncio.create_task(_run(i)) for i in batch]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+    return results
 
 
 class ToolExecutor:
@@ -23,7 +87,9 @@ class ToolExecutor:
         self.config = config or Config.get()
         self.registry = get_registry()
         self.tool_timeout = getattr(self.config, "tool_timeout_seconds", 10)
+        self.max_parallel = getattr(self.config, "max_parallel_tools", 4)
     
+    @traced("tool", tool="tool_name")
     async def execute(
         self,
         tool_name: str,
@@ -0,0 +1,340 @@
+"""Worker processes — run orchestrations outside the Telegram process.
+
+With orchestration_workers > 0 the bot process only does Telegram I/O. Each
+orchestration becomes a job that the front process hands to one of N spawned
+worker processes; a worker runs Orchestrator.run() and streams the run's
+SessionEvents back, and the front process renders them in the live bubble
+and delivers the final answer. CPU-bound work (HTML stripping, embeddings,
+sandbox compiles, JSON handling of large tool outputs) then spreads over N
+cores instead of sharing one event loop.
+
+All processes share the SQLite database in WAL mode (src/db/migrate.py);
+provider key locks and sticky routing are per process.
+
+Messages (pickled tuples), one inbox queue and one event pipe per worker:
+    front -> worker   inbox:   ("run", job_id, job) | ("cancel", job_id) | None (shut down)
+    worker -> front   events:  ("started", job_id)
+                               ("event", job_id, type, payload, turn)
+                               ("done", job_id, text) | ("failed", job_id, reason)
+                               ("cancelled", job_id)
+
+Workers never compete on a shared queue: a process killed while blocked on
+a shared multiprocessing queue leaves its lock held and stalls every other
+reader. Instead the front keeps the backlog and dispatches a job to the least
+loaded worker with a free slot (jobs_per_worker), recording the owner at
+dispatch. When a worker's event pipe hits EOF its process is gone (OOM,
+segfault, kill); by then every event it sent has been delivered, so the jobs it had started fail with RuntimeError, jobs it never acknowledged
+go back to the head of the backlog, and the worker is respawned with a fresh
+inbox and pipe. Each spawned process gets a new worker_id.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import itertools
+import multiprocessing as mp
+import threading
+from multiprocessing.connection import wait
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from src.core.models import EventType, SessionEvent
+from src.utils.logger import logger
+
+JobRunner = Callable[[Dict[str, Any], Callable[[SessionEvent], None]], Awaitable[str]]
+
+
+async def run_orchestration_job(job: Dict[str, Any], emit: Callable[[SessionEvent], None]) -> str:
+    """Default job: one Orchestrator.run(), its session bus forwarded to emit."""
+    from src.core import event_bus
+    from src.core.orchestrator import Orchestrator
+
+    # The job id keys the bus, so two runs of one chat in a worker stay apart
+    session = job["session_id"]
+    bus = event_bus.get_bus(session)
+
+    async def forward() -> None:
+        while True:
+            emit(await bus.get())
+
+    forwarder = asyncio.create_task(forward())
+    try:
+        return await Orchestrator().run(
+            job["user_id"], session, job["message"], "", job.get("system_prompt", ""),
+            prompt_messages=job.get("prompt_messages"),
+            run_id=job.get("run_id"), resume=job.get("resume"), reply_chat_id=job.get("chat_id"),
+        )
+    finally:
+        forwarder.cancel()
+        while not bus.empty():
+            emit(bus.get_nowait())
+        event_bus.teardown(session)
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _worker_main(worker_id: int, runner: JobRunner, inbox, events, db_path: Optional[str]) -> None:
+    if db_path:
+        from src.db import connection, key_store
+        connection.DB_PATH = key_store.DB_PATH = db_path
+    try:
+        asyncio.run(_worker_loop(worker_id, runner, inbox, events))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_loop(worker_id: int, runner: JobRunner, inbox, events) -> None:
+    loop = asyncio.get_running_loop()
+    running: Dict[int, asyncio.Task] = {}
+
+    async def run_one(job_id: int, job: Dict[str, Any]) -> None:
+        def emit(event: SessionEvent) -> None:
+            events.send(("event", job_id, event.type.value, event.payload, event.turn))
+
+        try:
+            events.send(("done", job_id, await runner(job, emit)))
+        except asyncio.CancelledError:
+            events.send(("cancelled", job_id))
+        except Exception as exc:
+            logger.exception("worker_job_failed", worker=worker_id, job_id=job_id, error=str(exc))
+            events.send(("failed", job_id, str(exc)))
+        finally:
+            running.pop(job_id, None)
+
+    logger.info("worker_started", worker=worker_id)
+    # The front only dispatches with a free slot, so every job starts at once.
+    # A cancel follows its job in the same inbox: the job is running or done
+    while True:
+        msg = await loop.run_in_executor(None, inbox.get)
+        if msg is None:
+            break
+        if msg[0] == "run":
+            events.send(("started", msg[1]))
+            running[msg[1]] = asyncio.create_task(run_one(msg[1], msg[2]))
+        elif (task := running.get(msg[1])) is not None:
+            task.cancel()
+
+    for task in list(running.values()):
+        task.cancel()
+    await asyncio.gather(*running.values(), return_exceptions=True)
+    events.close()
+
+
+# ---------------------------------------------------------------------------
+# Front side
+# ---------------------------------------------------------------------------
+
+class WorkerPool:
+    """N orchestration worker processes, each fed jobs through its own inbox."""
+
+    def __init__(self, workers: int, runner: JobRunner = run_orchestration_job,
+                 jobs_per_worker: int = 4, db_path: Optional[str] = None):
+        self.workers = max(1, int(workers))
+        self.runner = runner
+        self.jobs_per_worker = max(1, int(jobs_per_worker))
+        self.db_path = db_path
+        self._ids = itertools.count(1)
+        self._worker_ids = itertools.count()
+        self._pending: Dict[int, asyncio.Queue] = {}
+        self._backlog: Deque[Tuple[int, Dict[str, Any]]] = collections.deque()
+        self._owners: Dict[int, int] = {}  # job_id -> worker_id it was dispatched to, until it ends
+        self._started: Set[int] = set()  # dispatched jobs their worker has acknowledged
+        self._dispatched: Dict[int, Dict[str, Any]] = {}  # job_id -> job, kept until acknowledged
+        self._load: Dict[int, int] = {}  # live worker_id -> jobs dispatched and not ended
+        self._slot_of: Dict[int, int] = {}  # live worker_id -> slot in _procs / _inboxes
+        self._procs: List[Any] = []
+        self._inboxes: List[Any] = []
+        self._event_conns: Dict[Any, Any] = {}  # read end of a worker's event pipe -> its process
+        self._conns_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._closing = False
+        self.respawns = 0
+
+    def start(self) -> None:
+        self._ctx = mp.get_context("spawn")
+        self._loop = asyncio.get_running_loop()
+        self._wake_r, self._wake_w = self._ctx.Pipe(duplex=False)  # nudges the reader thread
+        self._procs = [None] * self.workers
+        self._inboxes = [None] * self.workers
+        for slot in range(self.workers):
+            self._spawn(slot)
+        self._reader = threading.Thread(target=self._read_events, name="rk-worker-events", daemon=True)
+        self._reader.start()
+        logger.info("worker_pool_started", workers=self.workers, jobs_per_worker=self.jobs_per_worker)
+
+    def _spawn(self, slot: int) -> None:
+        worker_id = next(self._worker_ids)
+        inbox = self._ctx.Queue()
+        events_r, events_w = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main, name=f"rk-worker-{slot}", daemon=True,
+            args=(worker_id, self.runner, inbox, events_w, self.db_path),
+        )
+        proc.start()
+        events_w.close()  # the worker holds the only write end: EOF once it exits
+        proc.worker_id = worker_id
+        self._procs[slot] = proc
+        self._inboxes[slot] = inbox
+        self._slot_of[worker_id] = slot
+        self._load[worker_id] = 0
+        with self._conns_lock:
+            self._event_conns[events_r] = proc
+        self._wake_w.send(True)
+
+    def _replace(self, proc) -> None:
+        """Fail or requeue the jobs of a worker process that died and start a replacement."""
+        worker_id = proc.worker_id
+        slot = self._slot_of.pop(worker_id, None)
+        if slot is None or self._closing:
+            return
+        self._load.pop(worker_id, None)
+        lost = [job_id for job_id, owner in self._owners.items() if owner == worker_id]
+        logger.error("worker_died", worker=worker_id, exitcode=proc.exitcode, jobs=len(lost))
+        retry = []
+        for job_id in lost:
+            del self._owners[job_id]
+            job = self._dispatched.pop(job_id, None)
+            if job_id not in self._started and job_id in self._pending:
+                retry.append((job_id, job))  # never started: safe to run elsewhere
+                continue
+            self._started.discard(job_id)
+            queue = self._pending.get(job_id)
+            if queue is not None:
+                queue.put_nowait(("failed", job_id, f"worker process died (exit code {proc.exitcode})"))
+        self._backlog.extendleft(reversed(retry))
+        inbox = self._inboxes[slot]
+        inbox.cancel_join_thread()  # nobody will read what is left in it
+        inbox.close()
+        self.respawns += 1
+        self._spawn(slot)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand backlog jobs to the least loaded live workers while slots are free."""
+        while self._backlog and self._load:
+            worker_id = min(self._load, key=self._load.get)
+            if self._load[worker_id] >= self.jobs_per_worker:
+                return
+            job_id, job = self._backlog.popleft()
+            self._owners[job_id] = worker_id
+            self._load[worker_id] += 1
+            self._dispatched[job_id] = job
+            self._inboxes[self._slot_of[worker_id]].put(("run", job_id, job))
+
+    def _read_events(self) -> None:
+        while True:
+            with self._conns_lock:
+                conns = list(self._event_conns)
+            for conn in wait([self._wake_r, *conns]):
+                if conn is self._wake_r:
+                    if self._wake_r.recv() is None:
+                        return
+                    continue
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):  # the worker exited, all its events are delivered
+                    with self._conns_lock:
+                        proc = self._event_conns.pop(conn)
+                    conn.close()
+                    proc.join(1.0)  # reap it so exitcode is set
+                    self._loop.call_soon_threadsafe(self._replace, proc)
+                    continue
+                self._loop.call_soon_threadsafe(self._deliver, msg)
+
+    def _deliver(self, msg: tuple) -> None:
+        if msg[0] == "started":
+            if self._dispatched.pop(msg[1], None) is not None:
+                self._started.add(msg[1])
+            return
+        if msg[0] != "event":
+            self._started.discard(msg[1])
+            self._dispatched.pop(msg[1], None)
+            worker_id = self._owners.pop(msg[1], None)
+            if worker_id in self._load:
+                self._load[worker_id] -= 1
+                self._dispatch()
+        queue = self._pending.get(msg[1])
+        if queue is not None:
+            queue.put_nowait(msg)
+
+    async def run(self, job: Dict[str, Any],
+                  on_event: Optional[Callable[[SessionEvent], Any]] = None) -> str:
+        """Run one job on some worker; on_event sees its events as they stream in."""
+        job_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[job_id] = queue
+        self._backlog.append((job_id, {**job, "session_id": job_id}))
+        self._dispatch()
+        try:
+            while True:
+                msg = await queue.get()
+                if msg[0] == "event":
+                    if on_event is not None:
+                        on_event(SessionEvent(EventType(msg[2]), payload=msg[3], turn=msg[4]))
+                    continue
+                self._pending.pop(job_id, None)
+                if msg[0] == "done":
+                    return msg[2]
+                if msg[0] == "failed":
+                    raise RuntimeError(msg[2])
+                raise asyncio.CancelledError()
+        except asyncio.CancelledError:
+            if job_id in self._pending:
+                # Not dispatched yet: drop it here; otherwise its worker drops
+                # it and reports "cancelled", which frees the slot
+                queued = [item for item in self._backlog if item[0] == job_id]
+                if queued:
+                    self._backlog.remove(queued[0])
+                elif (slot := self._slot_of.get(self._owners.get(job_id, -1))) is not None:
+                    self._inboxes[slot].put(("cancel", job_id))
+            raise
+        finally:
+            self._pending.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self._procs if p.is_alive()),
+            "in_flight": len(self._pending),
+            "queued": len(self._backlog),
+            "respawns": self.respawns,
+        }
+
+    async def close(self, timeout: float = 5.0) -> None:
+        self._closing = True
+        for inbox in self._inboxes:
+            inbox.put(None)
+        loop = asyncio.get_running_loop()
+        for proc in self._procs:
+            await loop.run_in_executor(None, proc.join, timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._wake_w.send(None)
+        await loop.run_in_executor(None, self._reader.join, timeout)
+        self._procs.clear()
+        logger.info("worker_pool_stopped")
+
+
+_pool: Optional[WorkerPool] = None
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    """The running pool, or None when orchestrations run in-process."""
+    return _pool
+
+
+def start_worker_pool(workers: int, jobs_per_worker: int = 4) -> WorkerPool:
+    global _pool
+    from src.db import connection
+    _pool = WorkerPool(workers, jobs_per_worker=jobs_per_worker, db_path=connection.DB_PATH)
+    _pool.start()
+    return _pool
+
+
+async def stop_worker_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -7,6 +7,10 @@ Token efficiency changes:
 - list_skill_names(): returns just names for the use_skill tool description
 - Incremental summarization: summarize oldest N messages, not full history
 - access_count / last_accessed tracking for memory pruning
+- add_chat_message(): src/db/index_policy decides what gets embedded (skips
+  acks, chunks long answers with parent ids)
+- Memory deletes/prunes are propagated to the vector store; sweep_vector_orphans()
+  catches anything that slipped through (deleted users, crashed tasks)
 """
 from __future__ import annotations
 
@@ -15,8 +19,11 @@ import json
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+from src.config import Config
 from src.db.connection import get_db
+from src.db.index_policy import plan_chunks
 from src.db.vector_store import vector_store
+from src.utils.logger import logger
 
 
 def _utcnow() -> str:
@@ -39,19 +46,21 @@ async def add_chat_message(
     metadata: Optional[Dict] = None,
 ) -> None:
     async with get_db() as db:
-        await db.execute(
+        cur = await db.execute(
             "INSERT INTO chat_history (user_id, role, content, metadata) VALUES (?, ?, ?, ?)",
             (user_id, role, content, json.dumps(metadata) if metadata else None),
         )
         await db.commit()
-    if role in ("user", "assistant"):
-        asyncio.create_task(
-            vector_store.add_memory(
-                user_id=user_id,
-                text=content,
-                metadata={"role": role, "timestamp": _utcnow()},
-            )
-        )
+        msg_id = cur.lastrowid
+    chunks = plan_chunks(role, content, msg_id, Config.get())
+    if chunks:
+        asyncio.create_task(_index_chunks(user_id, chunks))
+
+
+async def _index_chunks(user_id: int, chunks: List) -> None:
+    ts = _utcnow()
+    for text, meta in chunks:
+        await vector_store.add_memory(user_id=user_id, text=text, metadata={**meta, "timestamp": ts})
 
 
 async def get_chat_history(
@@ -132,14 +141,20 @@ async def save_rika_memory(
         await db.commit()
     # Also index in vector store for semantic retrieval
     asyncio.create_task(
-        vector_store.add_memory(
-            user_id=user_id,
+        _reindex_memory(
+            user_id,
             text=f"{key}: {value}",
             metadata={"mem_type": mem_type, "key": key, "pinned": pinned},
         )
     )
 
 
+async def _reindex_memory(user_id: int, text: str, metadata: Dict) -> None:
+    """Replace the vector for a memory key (INSERT OR REPLACE leaves the old one behind)."""
+    await vector_store.delete_memories(user_id, key=metadata["key"], mem_type=metadata["mem_type"])
+    await vector_store.add_memory(user_id=user_id, text=text, metadata=metadata)
+
+
 async def pin_memory(user_id: int, key: str, mem_type: str = "memory") -> bool:
     """Pin a memory so it's always injected. Returns True if found."""
     async with get_db() as db:
@@ -242,16 +257,49 @@ async def prune_stale_memories(user_id: int, keep: int = 100) -> int:
         if count <= keep:
             return 0
         to_delete = count - keep
+        cur = await db.execute(
+            "SELECT mem_key FROM rika_memory WHERE user_id = ? AND mem_type = 'memory' AND pinned = 0 "
+            "ORDER BY COALESCE(last_accessed, created_at) ASC LIMIT ?",
+            (user_id, to_delete),
+        )
+        keys = [r[0] for r in await cur.fetchall()]
+        placeholders = ",".join("?" * len(keys))
         del_cur = await db.execute(
-            "DELETE FROM rika_memory WHERE user_id = ? AND mem_type = 'memory' AND pinned = 0 "
-            "AND mem_key IN ("
-            "  SELECT mem_key FROM rika_memory WHERE user_id = ? AND mem_type = 'memory' AND pinned = 0 "
-            "  ORDER BY COALESCE(last_accessed, created_at) ASC LIMIT ?"
-            ")",
-            (user_id, user_id, to_delete),
+            f"DELETE FROM rika_memory WHERE user_id = ? AND mem_type = 'memory' AND pinned = 0 "
+            f"AND mem_key IN ({placeholders})",
+            [user_id] + keys,
         )
         await db.commit()
-        return del_cur.rowcount
+    for key in keys:
+        await vector_store.delete_memories(user_id, key=key, mem_type="memory")
+    return del_cur.rowcount
+
+
+async def sweep_vector_orphans() -> Dict[str, int]:
+    """Drop vectors whose user or rika_memory row no longer exists.
+
+    Chat-message vectors carry no key and are only removed with their user.
+    """
+    async with get_db() as db:
+        cur = await db.execute("SELECT id FROM users")
+        live_users = {r[0] for r in await cur.fetchall()}
+    stats = {"users": 0, "keys": 0}
+    for uid in await vector_store.list_users():
+        if uid not in live_users:
+            await vector_store.delete_memories(uid)
+            stats["users"] += 1
+            continue
+        indexed = await vector_store.list_values(uid, "key")
+        if not indexed:
+            continue
+        async with get_db() as db:
+            cur = await db.execute("SELECT mem_key FROM rika_memory WHERE user_id = ?", (uid,))
+            known = {r[0] for r in await cur.fetchall()}
+        for key in indexed - known:
+            await vector_store.delete_memories(uid, key=key)
+            stats["keys"] += 1
+    logger.info("vector_orphan_sweep", **stats)
+    return stats
 
 
 # ---------------------------------------------------------------------------
@@ -310,6 +358,7 @@ async def delete_rika_memory(user_id: int, key: str, mem_type: str = "memory") -
             (user_id, key, mem_type),
         )
         await db.commit()
+    await vector_store.delete_memories(user_id, key=key, mem_type=mem_type)
 
 
 async def list_rika_memories(user_id: int) -> List[Dict]:
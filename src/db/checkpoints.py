@@ -0,0 +1,102 @@
+"""Orchestration checkpoints — resume a run after a restart.
+
+The orchestration loops call save() after every completed tool turn. The
+row holds the thought history (prompt plus every tool result so far), the
+agent results, the next turn number and the budget already spent, as one
+zlib-compressed JSON blob. The row is deleted when the run ends: a final
+answer, an error, or a stop by the user. Only a run cut off by a restart or
+crash leaves its row behind, and interrupted() lists those at startup.
+Whoever resumes or discards one claim()s it first; only one caller wins.
+
+    await checkpoints.save(run_id, user_id, chat_id, text, turn + 1, state)
+    for cp in await checkpoints.interrupted(max_age_hours=24): ...
+    if await checkpoints.claim(cp["run_id"]): ...
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+from src.db.connection import get_db
+
+_LEVEL = 6  # zlib: tool output (HTML, JSON) shrinks 3-6x, a few ms per MB
+
+
+def encode_state(state: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(state, separators=(",", ":"), default=str).encode(), _LEVEL)
+
+
+def decode_state(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob))
+
+
+async def save(run_id: str, user_id: int, chat_id: int, text: str, turn: int,
+               state: Dict[str, Any]) -> None:
+    """Insert or replace the checkpoint of run_id; turn is the next turn to run."""
+    blob = encode_state(state)
+    async with get_db() as db:
+        await db.execute(
+            "INSERT INTO run_checkpoints (run_id, user_id, chat_id, text, turn, state) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(run_id) DO UPDATE SET turn = excluded.turn, state = excluded.state, "
+            "updated_at = datetime('now')",
+            (run_id, user_id, chat_id, text[:4000], turn, blob),
+        )
+        await db.commit()
+
+
+async def load(run_id: str) -> Optional[Dict[str, Any]]:
+    async with get_db() as db:
+        cur = await db.execute(
+            "SELECT run_id, user_id, chat_id, text, turn, state, updated_at "
+            "FROM run_checkpoints WHERE run_id = ?",
+            (run_id,),
+        )
+        row = await cur.fetchone()
+    return _row(row) if row else None
+
+
+async def delete(run_id: str) -> None:
+    async with get_db() as db:
+        await db.execute("DELETE FROM run_checkpoints WHERE run_id = ?", (run_id,))
+        await db.commit()
+
+
+async def claim(run_id: str) -> bool:
+    """Atomically take a checkpoint for resuming/discarding; False if already taken."""
+    async with get_db() as db:
+        cur = await db.execute(
+            "UPDATE run_checkpoints SET claimed_at = datetime('now') "
+            "WHERE run_id = ? AND claimed_at IS NULL",
+            (run_id,),
+        )
+        await db.commit()
+        return cur.rowcount == 1
+
+
+async def interrupted(max_age_hours: float = 24) -> List[Dict[str, Any]]:
+    """Checkpoints left by runs that never finished; older ones are dropped.
+
+    Called at startup, so claims left by resumed runs the restart cut off again
+    are released.
+    """
+    async with get_db() as db:
+        await db.execute(
+            "DELETE FROM run_checkpoints WHERE updated_at < datetime('now', ?)",
+            (f"-{float(max_age_hours)} hours",),
+        )
+        await db.execute("UPDATE run_checkpoints SET claimed_at = NULL WHERE claimed_at IS NOT NULL")
+        await db.commit()
+        cur = await db.execute(
+            "SELECT run_id, user_id, chat_id, text, turn, state, updated_at "
+            "FROM run_checkpoints ORDER BY updated_at"
+        )
+        rows = await cur.fetchall()
+    return [_row(r) for r in rows]
+
+
+def _row(row) -> Dict[str, Any]:
+    run_id, user_id, chat_id, text, turn, blob, updated_at = row
+    return {"run_id": run_id, "user_id": user_id, "chat_id": chat_id, "text": text,
+            "turn": turn, "updated_at": updated_at, **decode_state(blob)}
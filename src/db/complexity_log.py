@@ -0,0 +1,57 @@
+"""Complexity routing log — training data for the local complexity classifier.
+
+log_decision() records how a message was routed; record_outcome() later
+fills in the tools the run actually used. A row's label is "complex" when
+any real tool ran, "simple" otherwise. Direct replies cannot use tools, so
+their outcome says nothing the routing did not already decide: they are
+recorded with tools=None, closed as unlabeled and never used for training.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+from src.db.connection import get_db
+
+# Tools that do not indicate real work (narration only)
+_NON_TOOLS = frozenset({"declare_step"})
+
+
+async def log_decision(
+    user_id: int, text: str, decision: bool, tier: str, confidence: Optional[float] = None
+) -> int:
+    async with get_db() as db:
+        cur = await db.execute(
+            "INSERT INTO complexity_log (user_id, text, decision, tier, confidence) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, text[:500], 1 if decision else 0, tier, confidence),
+        )
+        await db.commit()
+        return cur.lastrowid
+
+
+async def record_outcome(user_id: int, tools: Optional[Iterable[str]]) -> None:
+    """Attach the tools used to the user's latest decision still awaiting an outcome.
+
+    tools=None closes that decision without a label (the reply could not use tools).
+    """
+    used = sorted({t for t in tools or () if t and t not in _NON_TOOLS})
+    async with get_db() as db:
+        await db.execute(
+            "UPDATE complexity_log SET tools_used = ?, labeled = ? WHERE id = ("
+            "  SELECT id FROM complexity_log WHERE user_id = ? AND tools_used IS NULL"
+            "  ORDER BY id DESC LIMIT 1)",
+            (",".join(used), 0 if tools is None else 1, user_id),
+        )
+        await db.commit()
+
+
+async def labeled_examples(limit: int = 50000) -> List[Tuple[str, bool]]:
+    """(text, needed_tools) for every decision with a known outcome, newest first."""
+    async with get_db() as db:
+        cur = await db.execute(
+            "SELECT text, tools_used FROM complexity_log WHERE tools_used IS NOT NULL AND labeled = 1 "
+            "ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
+        rows = await cur.fetchall()
+    return [(text, bool(tools)) for text, tools in rows]
@@ -3,13 +3,19 @@ import os
 from pathlib import Path
 from contextlib import asynccontextmanager
 
+from src.utils.tracing import span
+
 DB_PATH = os.environ.get("DATABASE_PATH", "./data/rk.db")
+# Other processes (orchestration workers) may hold the write lock briefly
+BUSY_TIMEOUT_MS = 5000
 
 
 @asynccontextmanager
 async def get_db():
     """Async context manager for database connections."""
     Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("PRAGMA foreign_keys = ON;")
-        yield conn
+    with span("db"):
+        async with aiosqlite.connect(DB_PATH) as conn:
+            await conn.execute("PRAGMA foreign_keys = ON;")
+            await conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+            yield conn
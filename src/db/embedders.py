@@ -0,0 +1,130 @@
+"""Text embedders for the vector store.
+
+The NumPy fallback index needs raw vectors, not a Qdrant-managed
+collection, so embedding is pulled out into a tiny interface:
+
+    embedder.name          stable identifier, persisted next to the index
+    embedder.dim           vector width
+    embedder.embed(texts)  -> float32 matrix (len(texts), dim), L2-normalized
+
+Resolution order (get_embedder):
+  1. fastembed TextEmbedding — same ONNX model family Qdrant uses.
+  2. HashingEmbedder — pure NumPy hashed word/char-trigram features.
+     Zero downloads, zero model RAM. Lower quality, but keeps recall
+     working when fastembed / ONNX is unavailable.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from src.utils.logger import logger
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+_DEFAULT_FASTEMBED_MODEL = "BAAI/bge-small-en"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_embedder: Optional["BaseEmbedder"] = None
+_embedder_lock = threading.Lock()
+
+
+class BaseEmbedder:
+    name: str = "base"
+    dim: int = 0
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        raise NotImplementedError
+
+    @staticmethod
+    def _normalize(mat: "np.ndarray") -> "np.ndarray":
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (mat / norms).astype(np.float32, copy=False)
+
+
+class FastEmbedEmbedder(BaseEmbedder):
+    """fastembed ONNX model. Loaded once; thread-safe for inference."""
+
+    def __init__(self, model_name: str = _DEFAULT_FASTEMBED_MODEL) -> None:
+        from fastembed import TextEmbedding
+        self._model = TextEmbedding(model_name=model_name)
+        self.name = f"fastembed:{model_name}"
+        probe = list(self._model.embed(["probe"]))
+        self.dim = int(len(probe[0]))
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        mat = np.asarray(list(self._model.embed(list(texts))), dtype=np.float32)
+        return self._normalize(mat)
+
+
+class HashingEmbedder(BaseEmbedder):
+    """Feature-hashing embedder: word unigrams + character trigrams.
+
+    Deterministic across processes (blake2b, not Python's salted hash()),
+    so vectors written by one run stay searchable by the next.
+    """
+
+    def __init__(self, dim: int = 512) -> None:
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        feats = [f"w:{w}" for w in words]
+        for w in words:
+            padded = f"#{w}#"
+            feats.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return feats
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        mat = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            slots = [_feature_slot(feat) for feat in self._features(text)]
+            if not slots:
+                continue
+            h = np.fromiter(slots, dtype=np.uint64, count=len(slots))
+            signs = np.where(h >> np.uint64(63), 1.0, -1.0).astype(np.float32)
+            np.add.at(mat[row], (h % np.uint64(self.dim)).astype(np.intp), signs)
+        return self._normalize(mat)
+
+
+@lru_cache(maxsize=1 << 18)
+def _feature_slot(feat: str) -> int:
+    """64-bit feature hash. Cached: word/trigram vocabularies repeat heavily."""
+    return int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def get_embedder(preference: str = "auto") -> Optional[BaseEmbedder]:
+    """Return the process-wide embedder, building it on first call.
+
+    preference: "auto" (fastembed, else hashing) | "fastembed" | "hashing".
+    Returns None only when NumPy itself is missing.
+    """
+    global _embedder
+    if not HAS_NUMPY:
+        return None
+    if _embedder is not None:
+        return _embedder
+    with _embedder_lock:
+        if _embedder is not None:
+            return _embedder
+        if preference in ("auto", "fastembed"):
+            try:
+                _embedder = FastEmbedEmbedder()
+                logger.info("embedder_ready", name=_embedder.name, dim=_embedder.dim)
+                return _embedder
+            except Exception as exc:
+                logger.warning("fastembed_unavailable", error=str(exc)[:200])
+        _embedder = HashingEmbedder()
+        logger.info("embedder_ready", name=_embedder.name, dim=_embedder.dim)
+        return _embedder
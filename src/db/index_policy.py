@@ -0,0 +1,93 @@
+"""Indexing policy — decides what part of a chat message goes into vector memory.
+
+Every user/assistant message used to be embedded verbatim. Short acks add
+noise, and long answers embed poorly while costing the most CPU. plan_chunks()
+applies, in order:
+
+  1. per-role rules (vector_index_roles) — roles without a rule are not indexed
+  2. optional fenced-code stripping (assistant answers full of tool output)
+  3. skip patterns (vector_index_skip_patterns) and a minimum length
+  4. overlapping chunking of long texts (vector_chunk_chars / vector_chunk_overlap)
+
+Each chunk carries parent_id (chat_history row id) plus chunk/chunks, so
+search results can be folded back to one hit per message.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+_BREAK_RE = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=8)
+def _compile(patterns: Tuple[str, ...]) -> Tuple[re.Pattern, ...]:
+    return tuple(re.compile(p, re.IGNORECASE) for p in patterns)
+
+
+def chunk_text(text: str, size: int, overlap: int) -> List[str]:
+    """Split text into ~size-char windows overlapping by ~overlap chars.
+
+    Window ends snap back to the last paragraph/sentence break when one
+    falls in the final third of the window, so chunks rarely cut a sentence.
+    """
+    text = text.strip()
+    if size <= 0 or len(text) <= size:
+        return [text] if text else []
+    overlap = max(0, min(overlap, size // 2))
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            breaks = [m.end() for m in _BREAK_RE.finditer(text, start + size * 2 // 3, end)]
+            if breaks:
+                end = breaks[-1]
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [c for c in chunks if c]
+
+
+def plan_chunks(
+    role: str,
+    content: str,
+    parent_id: Optional[int],
+    cfg: Any,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Return [(text, metadata)] to index for one chat message — possibly empty."""
+    rules: Dict[str, Dict[str, Any]] = getattr(cfg, "vector_index_roles", {}) or {}
+    rule = rules.get(role)
+    if rule is None:
+        return []
+    text = content or ""
+    if rule.get("strip_code"):
+        text = _CODE_FENCE_RE.sub(" ", text)
+    text = text.strip()
+    skip: Sequence[str] = tuple(getattr(cfg, "vector_index_skip_patterns", ()) or ())
+    if any(p.search(text) for p in _compile(tuple(skip))):
+        return []
+    min_chars = int(rule.get("min_chars", getattr(cfg, "vector_index_min_chars", 20)))
+    if len(text) < min_chars:
+        return []
+    chunks = chunk_text(
+        text,
+        int(getattr(cfg, "vector_chunk_chars", 800)),
+        int(getattr(cfg, "vector_chunk_overlap", 120)),
+    )
+    max_chunks = int(rule.get("max_chunks", 0) or 0)
+    if max_chunks:
+        chunks = chunks[:max_chunks]
+    out = []
+    for i, chunk in enumerate(chunks):
+        meta: Dict[str, Any] = {"role": role}
+        if parent_id is not None:
+            meta["parent_id"] = parent_id
+        if len(chunks) > 1:
+            meta["chunk"] = i
+            meta["chunks"] = len(chunks)
+        out.append((chunk, meta))
+    return out
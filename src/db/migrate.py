@@ -9,6 +9,9 @@ async def apply_migrations(db_path: str):
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
     async with aiosqlite.connect(db_path) as conn:
         await conn.execute("PRAGMA foreign_keys = ON;")
+        # WAL (persistent per file): readers don't block the writer, so worker
+        # processes can share the database with the bot process
+        await conn.execute("PRAGMA journal_mode = WAL;")
         # Ensure migrations table exists (created by migration file too, but be defensive)
         await conn.execute("""
         CREATE TABLE IF NOT EXISTS migrations (
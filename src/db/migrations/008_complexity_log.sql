@@ -0,0 +1,20 @@
+-- Complexity routing log: one row per classified message. tools_used is
+-- filled in once the outcome is known ('' = answered without tools) and is
+-- the training label for the local classifier (src/core/complexity_model.py).
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS complexity_log (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    text        TEXT    NOT NULL,
+    decision    INTEGER NOT NULL,
+    tier        TEXT    NOT NULL,
+    confidence  REAL,
+    tools_used  TEXT,
+    created_at  TEXT    DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_complexity_log_user
+    ON complexity_log(user_id, id);
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Persistent tier of the tool result cache (src/tools/result_cache.py), used
+-- only with tool_cache_persist. Rows past expires_at are kept for
+-- tool_cache_stale_seconds when validators (ETag / Last-Modified) allow a
+-- conditional revalidation.
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS tool_cache (
+    tool        TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    validators  TEXT,
+    expires_at  REAL NOT NULL,
+    PRIMARY KEY (tool, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tool_cache_expires
+    ON tool_cache(expires_at);
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Orchestration checkpoints (src/db/checkpoints.py): the state of a run after
+-- each completed tool turn, so a restart can resume it instead of starting
+-- over. state is zlib-compressed JSON (thought history, agent results, budget
+-- usage); the row is deleted when the run finishes or the user stops it.
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS run_checkpoints (
+    run_id      TEXT    PRIMARY KEY,
+    user_id     INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    chat_id     INTEGER NOT NULL,
+    text        TEXT    NOT NULL,
+    turn        INTEGER NOT NULL,
+    state       BLOB    NOT NULL,
+    created_at  TEXT    DEFAULT (datetime('now')),
+    updated_at  TEXT    DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_run_checkpoints_user
+    ON run_checkpoints(user_id);
+
+COMMIT;
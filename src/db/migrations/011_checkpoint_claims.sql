@@ -0,0 +1,8 @@
+-- A checkpoint is claimed by the run that resumes it (src/db/checkpoints.claim),
+-- so a double tap on Resume, or Resume from two clients, starts one run only.
+-- Claims are cleared at startup: after a restart no resumed run is alive.
+BEGIN TRANSACTION;
+
+ALTER TABLE run_checkpoints ADD COLUMN claimed_at TEXT;
+
+COMMIT;
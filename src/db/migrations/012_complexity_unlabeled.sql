@@ -0,0 +1,11 @@
+-- A message answered by a direct reply could not have used tools, so its
+-- empty tools_used only repeats the routing decision. Such rows are closed
+-- with labeled = 0 and kept out of classifier training. Existing rows routed
+-- simple with no tools used are most likely direct replies: unlabel them too.
+BEGIN TRANSACTION;
+
+ALTER TABLE complexity_log ADD COLUMN labeled INTEGER NOT NULL DEFAULT 1;
+
+UPDATE complexity_log SET labeled = 0 WHERE decision = 0 AND tools_used = '';
+
+COMMIT;
@@ -0,0 +1,588 @@
+"""NumPy vector index — lightweight fallback backend for VectorStore.
+
+Used when qdrant-client is missing, fails to start, or cannot embed.
+One directory per user, so every search is already user-filtered and
+only that user's vectors are ever paged in:
+
+    data/vector_np/u<user_id>/
+        meta.json           {"embedder": name, "dim": int}
+        seg_000001.f32      raw float32 rows (n, dim), L2-normalized
+        seg_000001.jsonl    one payload per row: {"id", "text", "metadata"}
+        seg_000003.i8       int8 rows of a compacted segment (vector_quantization=int8)
+        seg_000003.scale    float32 per-row dequantization scale for the .i8 file
+        seg_000003.ivf.npz  optional IVF lists for a large compacted segment
+        seg_000001.del      int32 row numbers deleted from this segment (tombstones)
+
+Layout rules:
+- Segments are append-only. New rows go to the single "active" segment
+  (rows < segment_rows); once full it is sealed and never written again.
+- Sealed segments are opened with np.memmap, so RSS holds only the pages
+  a search touches — not the whole collection as Python objects.
+- Compaction is size-tiered. A sealed segment's tier is how many times
+  its live rows exceed segment_rows by a factor of max_segments; once a
+  tier holds max_segments segments they are merged into one segment of
+  the next tier. Each row is rewritten O(log n) times, and a large merged
+  segment is left alone until a tier of similar size forms next to it.
+  A segment with more than a quarter of its rows tombstoned is rewritten
+  on its own. compact(full=True) merges every sealed segment into one.
+- Large merged segments get an inverted-file (IVF) index: k-means
+  centroids + per-row list ids. Searches probe the nprobe closest lists
+  instead of scanning every row.
+- With quantize=True merged segments are written as symmetric per-row
+  int8 codes (4x smaller on disk and in page cache). Scores are the int8
+  dot product times the row scale; the small recall loss is measured by
+  tests/perf/bench_vector_memory.py.
+- Deletes append row numbers to the segment's .del file; tombstoned rows
+  score -inf and are dropped for good when their segment is next merged
+  or rewritten.
+- add(dedup_threshold=...) replaces an existing row whose cosine score is
+  at or above the threshold and whose key/mem_type/role match, instead of
+  appending a near-copy. The replacement carries dup_count forward.
+- Payload text stays on disk. Only byte offsets are kept in memory; the
+  JSONL line is read back for the final top-k hits.
+
+All methods are synchronous and thread-safe (one lock per user index).
+VectorStore calls them through run_in_executor.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.db.embedders import HAS_NUMPY, BaseEmbedder
+from src.utils.logger import logger
+from src.utils.registry import Registry
+
+if HAS_NUMPY:
+    import numpy as np
+
+_SEG_DIGITS = 6
+_KMEANS_ITERS = 8
+_DEDUP_FIELDS = ("key", "mem_type", "role")
+_DEAD_COMPACT_RATIO = 0.25  # rewrite a sealed segment once this share of its rows is tombstoned
+
+
+def _quantize_int8(block: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Symmetric per-row int8: row ≈ codes * scale."""
+    scales = np.abs(block).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(block / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class _Segment:
+    """One append-only vector file plus its JSONL payload sidecar."""
+
+    def __init__(self, root: Path, seq: int, dim: int, quantized: bool = False) -> None:
+        self.seq = seq
+        self.dim = dim
+        self.quantized = quantized
+        self._itemsize = 1 if quantized else 4
+        self.vec_path = root / f"seg_{seq:0{_SEG_DIGITS}d}.{'i8' if quantized else 'f32'}"
+        self.scale_path = root / f"seg_{seq:0{_SEG_DIGITS}d}.scale"
+        self.meta_path = root / f"seg_{seq:0{_SEG_DIGITS}d}.jsonl"
+        self.ivf_path = root / f"seg_{seq:0{_SEG_DIGITS}d}.ivf.npz"
+        self.del_path = root / f"seg_{seq:0{_SEG_DIGITS}d}.del"
+        self.offsets: List[int] = []
+        self.dead = np.zeros(0, dtype=bool)
+        self._mat: Optional["np.ndarray"] = None
+        self._scales: Optional["np.ndarray"] = None
+        self._ivf: Optional[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]] = None
+
+    @property
+    def rows(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def live_rows(self) -> int:
+        return self.rows - int(self.dead.sum())
+
+    def load(self) -> None:
+        """Scan the sidecar for line offsets; repair a torn trailing write."""
+        self.offsets = []
+        if self.meta_path.exists():
+            pos = 0
+            with open(self.meta_path, "rb") as fh:
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break
+                    self.offsets.append(pos)
+                    pos += len(line)
+        vec_rows = (
+            self.vec_path.stat().st_size // (self._itemsize * self.dim)
+            if self.vec_path.exists() else 0
+        )
+        rows = min(vec_rows, len(self.offsets))
+        if rows != vec_rows or rows != len(self.offsets):
+            logger.warning("numpy_index_segment_repaired", segment=self.vec_path.name,
+                           vec_rows=vec_rows, meta_rows=len(self.offsets))
+            self.offsets = self.offsets[:rows]
+            with open(self.vec_path, "r+b" if self.vec_path.exists() else "wb") as fh:
+                fh.truncate(rows * self._itemsize * self.dim)
+            end = self.offsets[-1] if self.offsets else 0
+            if self.offsets:
+                with open(self.meta_path, "rb") as fh:
+                    fh.seek(end)
+                    end += len(fh.readline())
+            with open(self.meta_path, "r+b" if self.meta_path.exists() else "wb") as fh:
+                fh.truncate(end)
+        if self.quantized:
+            self._scales = np.fromfile(self.scale_path, dtype=np.float32)[:rows]
+        self.dead = np.zeros(rows, dtype=bool)
+        if self.del_path.exists():
+            tomb = np.fromfile(self.del_path, dtype=np.int32)
+            self.dead[tomb[tomb < rows]] = True
+        if self.ivf_path.exists():
+            try:
+                with np.load(self.ivf_path) as data:
+                    self._ivf = (data["centroids"], data["order"], data["bounds"])
+            except Exception as exc:
+                logger.warning("numpy_index_ivf_load_failed", segment=self.ivf_path.name, error=str(exc))
+                self._ivf = None
+
+    def append(self, vectors: "np.ndarray", payloads: Sequence[Dict[str, Any]]) -> None:
+        pos = self.meta_path.stat().st_size if self.meta_path.exists() else 0
+        lines = [(json.dumps(p, ensure_ascii=False) + "\n").encode("utf-8") for p in payloads]
+        with open(self.vec_path, "ab") as fh:
+            fh.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self.meta_path, "ab") as fh:
+            for line in lines:
+                fh.write(line)
+        for line in lines:
+            self.offsets.append(pos)
+            pos += len(line)
+        self.dead = np.concatenate([self.dead, np.zeros(len(lines), dtype=bool)])
+        self._mat = None  # file grew — remap on next read
+
+    def mark_dead(self, rows: Sequence[int]) -> None:
+        with open(self.del_path, "ab") as fh:
+            fh.write(np.asarray(rows, dtype=np.int32).tobytes())
+        self.dead[list(rows)] = True
+
+    def matrix(self) -> "np.ndarray":
+        dtype = np.int8 if self.quantized else np.float32
+        if self._mat is None:
+            if self.rows == 0:
+                self._mat = np.zeros((0, self.dim), dtype=dtype)
+            else:
+                self._mat = np.memmap(self.vec_path, dtype=dtype, mode="r",
+                                      shape=(self.rows, self.dim))
+        return self._mat
+
+    def dense(self, start: int = 0, stop: Optional[int] = None) -> "np.ndarray":
+        """Float32 copy of rows [start:stop], dequantized if needed."""
+        block = np.asarray(self.matrix()[start:stop], dtype=np.float32)
+        if self.quantized:
+            block *= self._scales[start:stop, None]
+        return block
+
+    def scores(self, query: "np.ndarray", rows: Optional["np.ndarray"] = None) -> "np.ndarray":
+        mat = self.matrix()
+        sub = mat if rows is None else mat[rows]
+        if not self.quantized:
+            return sub @ query
+        scales = self._scales if rows is None else self._scales[rows]
+        # int8 @ float32 upcasts the operand; do it in blocks to bound the temporary
+        out = np.empty(len(sub), dtype=np.float32)
+        for start in range(0, len(sub), 4096):
+            out[start:start + 4096] = sub[start:start + 4096].astype(np.float32) @ query
+        return out * scales
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        with open(self.meta_path, "rb") as fh:
+            fh.seek(self.offsets[row])
+            return json.loads(fh.readline())
+
+    def iter_payloads(self):
+        with open(self.meta_path, "rb") as fh:
+            for _ in range(self.rows):
+                yield json.loads(fh.readline())
+
+    def candidates(self, query: "np.ndarray", nprobe: int) -> Optional["np.ndarray"]:
+        """Row ids to score via IVF, or None to scan everything."""
+        if self._ivf is None:
+            return None
+        centroids, order, bounds = self._ivf
+        nprobe = min(nprobe, len(centroids))
+        lists = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([order[bounds[i]:bounds[i + 1]] for i in lists])
+
+    def build_ivf(self, nprobe_hint: int) -> None:
+        n = self.rows
+        nlist = max(nprobe_hint * 2, int(np.sqrt(n)))
+        rng = np.random.default_rng(self.seq)
+        picks = np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))
+        sample = np.asarray(self.matrix()[picks], dtype=np.float32)
+        if self.quantized:
+            sample *= self._scales[picks, None]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(_KMEANS_ITERS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = BaseEmbedder._normalize(centroids)
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 8192):
+            assign[start:start + 8192] = np.argmax(self.dense(start, start + 8192) @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+        np.savez(self.ivf_path, centroids=centroids, order=order, bounds=bounds)
+        self._ivf = (centroids, order, bounds)
+
+    def remove_files(self) -> None:
+        self._mat = None
+        for p in (self.vec_path, self.meta_path, self.ivf_path, self.scale_path, self.del_path):
+            p.unlink(missing_ok=True)
+
+
+class _UserIndex:
+    """All segments for one user."""
+
+    def __init__(self, root: Path, embedder: BaseEmbedder, segment_rows: int,
+                 max_segments: int, ivf_min_rows: int, nprobe: int,
+                 quantize: bool = False) -> None:
+        self.root = root
+        self.dim = embedder.dim
+        self.segment_rows = segment_rows
+        self.max_segments = max_segments
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.quantize = quantize
+        self.lock = threading.Lock()
+        self.segments: List[_Segment] = []
+        self._open(embedder.name)
+
+    def _open(self, embedder_name: str) -> None:
+        meta_file = self.root / "meta.json"
+        if meta_file.exists():
+            meta = json.loads(meta_file.read_text())
+            if meta.get("embedder") != embedder_name or meta.get("dim") != self.dim:
+                stale = self.root.with_name(f"{self.root.name}.stale-{int(time.time())}")
+                logger.warning("numpy_index_embedder_changed", path=str(self.root),
+                               old=meta.get("embedder"), new=embedder_name, moved_to=str(stale))
+                self.root.rename(stale)
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta_file.write_text(json.dumps({"embedder": embedder_name, "dim": self.dim}))
+        found = [(int(p.stem.split("_")[1]), p.suffix == ".i8")
+                 for p in self.root.glob("seg_*") if p.suffix in (".f32", ".i8")]
+        for seq, quantized in sorted(found):
+            seg = _Segment(self.root, seq, self.dim, quantized=quantized)
+            seg.load()
+            self.segments.append(seg)
+
+    @property
+    def count(self) -> int:
+        return sum(s.live_rows for s in self.segments)
+
+    def _appendable(self, seg: _Segment) -> bool:
+        return not seg.quantized and seg.rows < self.segment_rows
+
+    def _sealed(self) -> List[_Segment]:
+        if self.segments and self._appendable(self.segments[-1]):
+            return self.segments[:-1]
+        return list(self.segments)
+
+    def _active(self) -> _Segment:
+        if self.segments and self._appendable(self.segments[-1]):
+            return self.segments[-1]
+        seq = self.segments[-1].seq + 1 if self.segments else 1
+        seg = _Segment(self.root, seq, self.dim)
+        self.segments.append(seg)
+        return seg
+
+    def add(self, vectors: "np.ndarray", payloads: List[Dict[str, Any]]) -> None:
+        i = 0
+        while i < len(payloads):
+            seg = self._active()
+            take = min(self.segment_rows - seg.rows, len(payloads) - i)
+            seg.append(vectors[i:i + take], payloads[i:i + take])
+            i += take
+        self.compact()
+
+    def _tier(self, seg: _Segment) -> int:
+        fanout = max(2, self.max_segments)
+        tier, cap = 0, self.segment_rows
+        while seg.live_rows > cap:
+            tier, cap = tier + 1, cap * fanout
+        return tier
+
+    def _next_merge(self) -> List[_Segment]:
+        """Lowest full tier, else one heavily tombstoned segment, else nothing."""
+        tiers: Dict[int, List[_Segment]] = {}
+        for seg in self._sealed():
+            tiers.setdefault(self._tier(seg), []).append(seg)
+        for _, group in sorted(tiers.items()):
+            if len(group) >= max(2, self.max_segments):
+                return group
+        for seg in self._sealed():
+            if seg.dead.sum() > _DEAD_COMPACT_RATIO * seg.rows:
+                return [seg]
+        return []
+
+    def compact(self, full: bool = False) -> None:
+        """Size-tiered merge of sealed segments; full=True merges them all into one."""
+        if full:
+            sealed = self._sealed()
+            if len(sealed) > 1 or any(s.dead.any() for s in sealed):
+                self._merge(sealed)
+            return
+        while True:
+            batch = self._next_merge()
+            if not batch:
+                return
+            self._merge(batch)
+
+    def _merge(self, sealed: List[_Segment]) -> None:
+        """Rewrite sealed segments as one new segment, dropping tombstoned rows."""
+        seq = self.segments[-1].seq + 1
+        merged = _Segment(self.root, seq, self.dim, quantized=self.quantize)
+        tmp_vec = merged.vec_path.with_name(merged.vec_path.name + ".tmp")
+        tmp_meta = merged.meta_path.with_name(merged.meta_path.name + ".tmp")
+        tmp_scale = merged.scale_path.with_name(merged.scale_path.name + ".tmp")
+        with open(tmp_vec, "wb") as vf, open(tmp_meta, "wb") as mf, open(tmp_scale, "wb") as sf:
+            for seg in sealed:
+                for start in range(0, seg.rows, 8192):
+                    block = seg.dense(start, start + 8192)[~seg.dead[start:start + 8192]]
+                    if self.quantize:
+                        codes, scales = _quantize_int8(block)
+                        vf.write(codes.tobytes())
+                        sf.write(scales.tobytes())
+                    else:
+                        vf.write(block.tobytes())
+                with open(seg.meta_path, "rb") as src:
+                    for row in range(seg.rows):
+                        line = src.readline()
+                        if not seg.dead[row]:
+                            mf.write(line)
+        if self.quantize:
+            os.replace(tmp_scale, merged.scale_path)
+        else:
+            tmp_scale.unlink()
+        os.replace(tmp_meta, merged.meta_path)
+        os.replace(tmp_vec, merged.vec_path)
+        merged.load()
+        for seg in sealed:
+            seg.remove_files()
+        self.segments = [s for s in self.segments if s not in sealed]
+        if merged.rows:
+            self.segments = sorted(self.segments + [merged], key=lambda s: s.seq)
+        else:
+            merged.remove_files()
+        if merged.rows >= self.ivf_min_rows:
+            merged.build_ivf(self.nprobe)
+        logger.info("numpy_index_compacted", path=str(self.root), merged=len(sealed),
+                    rows=merged.rows, ivf=merged.rows >= self.ivf_min_rows)
+
+    def _top(self, query: "np.ndarray", limit: int) -> List[Tuple[float, _Segment, int]]:
+        hits: List[Tuple[float, _Segment, int]] = []
+        for seg in self.segments:
+            if seg.live_rows == 0:
+                continue
+            rows = seg.candidates(query, self.nprobe)
+            scores = seg.scores(query, rows)
+            dead = seg.dead if rows is None else seg.dead[rows]
+            if dead.any():
+                scores = np.where(dead, -np.inf, scores)
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            for j in top:
+                if not np.isfinite(scores[j]):
+                    continue
+                row = int(j) if rows is None else int(rows[j])
+                hits.append((float(scores[j]), seg, row))
+        hits.sort(key=lambda h: h[0], reverse=True)
+        return hits[:limit]
+
+    def search(self, query: "np.ndarray", limit: int) -> List[Tuple[float, Dict[str, Any]]]:
+        return [(score, seg.payload(row)) for score, seg, row in self._top(query, limit)]
+
+    def find_duplicate(
+        self, vector: "np.ndarray", metadata: Dict[str, Any], threshold: float
+    ) -> Optional[Tuple[_Segment, int, Dict[str, Any]]]:
+        """Closest live row at/above threshold with matching dedup fields."""
+        for score, seg, row in self._top(vector, 3):
+            if score < threshold:
+                break
+            payload = seg.payload(row)
+            other = payload.get("metadata", {})
+            if all(other.get(f) == metadata.get(f) for f in _DEDUP_FIELDS):
+                return seg, row, payload
+        return None
+
+    def delete(self, where: Dict[str, Any]) -> int:
+        """Tombstone live rows whose metadata matches every key in where."""
+        deleted = 0
+        for seg in self.segments:
+            rows = [
+                row for row, p in enumerate(seg.iter_payloads())
+                if not seg.dead[row]
+                and all(p.get("metadata", {}).get(k) == v for k, v in where.items())
+            ]
+            if rows:
+                seg.mark_dead(rows)
+                deleted += len(rows)
+        if deleted:
+            self.compact()
+        return deleted
+
+    def values(self, field: str) -> set:
+        """Distinct metadata[field] values over live rows."""
+        out = set()
+        for seg in self.segments:
+            for row, p in enumerate(seg.iter_payloads()):
+                if not seg.dead[row]:
+                    val = p.get("metadata", {}).get(field)
+                    if val is not None:
+                        out.add(val)
+        return out
+
+
+class NumpyVectorIndex:
+    """Per-user memory-mapped vector index with the VectorStore data model."""
+
+    def __init__(
+        self,
+        root: str = "./data/vector_np",
+        embedder: Optional[BaseEmbedder] = None,
+        segment_rows: int = 512,
+        max_segments: int = 8,
+        ivf_min_rows: int = 4096,
+        nprobe: int = 8,
+        quantize: bool = False,
+    ) -> None:
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy is not installed")
+        if embedder is None:
+            from src.db.embedders import get_embedder
+            embedder = get_embedder()
+        self.embedder = embedder
+        self.root = Path(root)
+        self.segment_rows = segment_rows
+        self.max_segments = max_segments
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.quantize = quantize
+        self._users: Registry[int, _UserIndex] = Registry(
+            "numpy_user_indexes", in_use=lambda idx: idx.lock.locked())
+        self._users_lock = threading.Lock()
+
+    def _user(self, user_id: int, create: bool = True) -> Optional[_UserIndex]:
+        """The user's open index; None for a user with no directory unless create."""
+        with self._users_lock:
+            idx = self._users.get(user_id)
+            if idx is None:
+                path = self.root / f"u{user_id}"
+                if not create and not path.exists():
+                    return None
+                idx = _UserIndex(
+                    path, self.embedder, self.segment_rows,
+                    self.max_segments, self.ivf_min_rows, self.nprobe, self.quantize,
+                )
+                self._users[user_id] = idx
+        return idx
+
+    def add(
+        self,
+        user_id: int,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        dedup_threshold: Optional[float] = None,
+        vectors: Optional["np.ndarray"] = None,
+    ) -> List[str]:
+        """Embed and append texts. Returns the generated point ids.
+
+        Pass vectors (already normalized, one row per text) to skip embedding,
+        e.g. for bulk rebuilds that embed in a process pool.
+
+        With dedup_threshold, a near-duplicate of an existing row replaces
+        it (old row tombstoned, dup_count carried over) instead of piling up.
+        """
+        if not texts:
+            return []
+        metadatas = [dict(m) for m in (metadatas or [{} for _ in texts])]
+        if vectors is None:
+            vectors = self.embedder.embed(texts)
+        ids = [str(uuid.uuid4()) for _ in texts]
+        payloads = [
+            {"id": pid, "text": t, "metadata": m}
+            for pid, t, m in zip(ids, texts, metadatas)
+        ]
+        idx = self._user(user_id)
+        with idx.lock:
+            if not dedup_threshold:
+                idx.add(vectors, payloads)
+                return ids
+            for vec, payload in zip(vectors, payloads):
+                dup = idx.find_duplicate(vec, payload["metadata"], dedup_threshold)
+                if dup is not None:
+                    seg, row, old = dup
+                    seg.mark_dead([row])
+                    payload["metadata"]["dup_count"] = old["metadata"].get("dup_count", 1) + 1
+                idx.add(vec[None, :], [payload])
+        return ids
+
+    def search(self, user_id: int, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Top-k cosine search within one user's vectors."""
+        idx = self._user(user_id, create=False)
+        if idx is None or idx.count == 0:
+            return []
+        qvec = self.embedder.embed([query])[0]
+        with idx.lock:
+            hits = idx.search(qvec, limit)
+        return [
+            {"text": p.get("text", ""), "score": score, "metadata": p.get("metadata", {})}
+            for score, p in hits
+        ]
+
+    def delete(self, user_id: int, where: Optional[Dict[str, Any]] = None) -> int:
+        """Delete matching rows (all of the user's rows when where is empty)."""
+        if not where:
+            with self._users_lock:
+                self._users.pop(user_id, None)
+                path = self.root / f"u{user_id}"
+                if not path.exists():
+                    return 0
+                count = _UserIndex(path, self.embedder, self.segment_rows, self.max_segments,
+                                   self.ivf_min_rows, self.nprobe, self.quantize).count
+                shutil.rmtree(path, ignore_errors=True)
+            return count
+        idx = self._user(user_id, create=False)
+        if idx is None:
+            return 0
+        with idx.lock:
+            return idx.delete(where)
+
+    def values(self, user_id: int, field: str) -> set:
+        idx = self._user(user_id, create=False)
+        if idx is None:
+            return set()
+        with idx.lock:
+            return idx.values(field)
+
+    def users(self) -> List[int]:
+        """User ids that have an index directory."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            int(p.name[1:]) for p in self.root.iterdir()
+            if p.is_dir() and p.name[1:].lstrip("-").isdigit() and p.name.startswith("u")
+        )
+
+    def compact(self, user_id: int, full: bool = False) -> None:
+        idx = self._user(user_id, create=False)
+        if idx is None:
+            return
+        with idx.lock:
+            idx.compact(full)
+
+    def count(self, user_id: int) -> int:
+        idx = self._user(user_id, create=False)
+        return idx.count if idx is not None else 0
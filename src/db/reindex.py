@@ -0,0 +1,408 @@
+"""rk-agent-reindex — rebuild vector memory from SQLite.
+
+Semantic memory is otherwise only written one message at a time, so a new
+embedding model or a corrupted ./data/vector_db meant starting from zero.
+This tool rebuilds it from chat_history and rika_memory:
+
+    rk-agent-reindex                         # configured backend, all cores
+    rk-agent-reindex --backend numpy --workers 4 --page-size 4000
+    rk-agent-reindex --fresh                 # discard an interrupted run
+    rk-agent-reindex --drop-old              # delete the previous index after the swap
+
+Pipeline:
+  1. Stream rows out of SQLite in id-ordered pages (keyset pagination, so
+     memory stays flat regardless of table size). Chat rows go through the
+     same index policy as live traffic (src/db/index_policy).
+  2. Embed each page in batches on a process pool (--workers, default: all cores).
+  3. Bulk-write into a fresh target:
+       qdrant  new collection collective_unconscious_<stamp>, points upserted in bulk
+       numpy   new directory data/vector_np.<stamp>
+  4. Swap atomically once complete:
+       qdrant  one update_collection_aliases call moves the
+               "collective_unconscious" alias to the new collection
+       numpy   data/vector_np becomes a symlink, replaced via os.replace
+
+Progress (rows/s, ETA) is printed per page, and the position is checkpointed
+to data/reindex_state.json after every page. Re-running resumes into the same
+target. Qdrant point ids are deterministic, so a replayed page overwrites
+itself. The NumPy index can end up with one duplicated page at most.
+
+Stop the bot first when Qdrant runs embedded (no vector_qdrant_url): the
+storage directory can only be opened by one process. A running bot keeps
+serving the old index until it restarts.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.db.connection import get_db
+from src.db.index_policy import plan_chunks
+from src.utils.logger import logger
+
+STATE_PATH = Path("./data/reindex_state.json")
+NUMPY_ROOT = Path("./data/vector_np")
+COLLECTION = "collective_unconscious"
+_POINT_NS = uuid.UUID("5b0c8f4e-6a53-4c1f-9d0e-7f3a2b1c4d5e")
+
+# (source, SQL, count SQL) — keyset pages over the integer primary key
+_SOURCES: List[Tuple[str, str, str]] = [
+    (
+        "memory",
+        "SELECT id, user_id, mem_key, mem_value, mem_type, pinned FROM rika_memory "
+        "WHERE id > ? ORDER BY id LIMIT ?",
+        "SELECT COUNT(*) FROM rika_memory WHERE id > ?",
+    ),
+    (
+        "chat",
+        "SELECT id, user_id, role, content, timestamp FROM chat_history "
+        "WHERE id > ? ORDER BY id LIMIT ?",
+        "SELECT COUNT(*) FROM chat_history WHERE id > ?",
+    ),
+]
+
+Doc = Tuple[int, str, Dict[str, Any], str]  # (user_id, text, metadata, stable point key)
+
+
+# ---------------------------------------------------------------------------
+# Embedding workers
+# ---------------------------------------------------------------------------
+
+_worker_embedder = None
+
+
+def _build_embedder(name: str):
+    """Rebuild an embedder from its persisted name ("fastembed:<model>" / "hashing:<dim>")."""
+    from src.db.embedders import FastEmbedEmbedder, HashingEmbedder
+    kind, _, arg = name.partition(":")
+    if kind == "fastembed":
+        return FastEmbedEmbedder(arg)
+    if kind == "hashing":
+        return HashingEmbedder(int(arg))
+    raise ValueError(f"unknown embedder {name!r}")
+
+
+def _worker_init(embedder_name: str) -> None:
+    global _worker_embedder
+    _worker_embedder = _build_embedder(embedder_name)
+
+
+def _worker_embed(texts: List[str]):
+    return _worker_embedder.embed(texts)
+
+
+class _Embedder:
+    """Batches a page across the process pool (or inline with one worker)."""
+
+    def __init__(self, name: str, workers: int, batch_size: int) -> None:
+        self.name = name
+        self.batch_size = batch_size
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(workers, initializer=_worker_init, initargs=(name,))
+        else:
+            _worker_init(name)
+
+    async def embed(self, texts: List[str]):
+        import numpy as np
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.pool is None:
+            return np.vstack([_worker_embed(b) for b in batches])
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(*(loop.run_in_executor(self.pool, _worker_embed, b) for b in batches))
+        return np.vstack(parts)
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+class _QdrantSink:
+    def __init__(self, client, target: str) -> None:
+        from src.db.vector_store import _index_configs
+        self.client = client
+        self.target = target
+        self.vector_name = client.get_vector_field_name()
+        if not client.collection_exists(target):
+            quantization, hnsw = _index_configs()
+            on_disk = getattr(Config.get(), "vector_on_disk", False)
+            client.create_collection(
+                collection_name=target,
+                vectors_config=client.get_fastembed_vector_params(on_disk=on_disk),
+                quantization_config=quantization,
+                hnsw_config=hnsw,
+                on_disk_payload=on_disk,
+            )
+
+    def write(self, docs: List[Doc], vectors) -> None:
+        from src.db.vector_store import qdrant_models
+        points = [
+            qdrant_models.PointStruct(
+                id=str(uuid.uuid5(_POINT_NS, key)),
+                vector={self.vector_name: vec.tolist()},
+                payload={"document": text, **meta, "user_id": uid},
+            )
+            for (uid, text, meta, key), vec in zip(docs, vectors)
+        ]
+        self.client.upsert(collection_name=self.target, points=points, wait=True)
+
+    def swap(self, drop_old: bool) -> str:
+        from src.db.vector_store import qdrant_models as qm
+        aliases = {a.alias_name: a.collection_name for a in self.client.get_aliases().aliases}
+        previous = aliases.get(COLLECTION)
+        ops = []
+        legacy = previous is None and self.client.collection_exists(COLLECTION)
+        if legacy:
+            # Pre-alias layout: the live data *is* a collection with the alias name.
+            # It has to go before the alias can exist — the only non-atomic step.
+            logger.warning("reindex_dropping_legacy_collection", collection=COLLECTION, target=self.target)
+            self.client.delete_collection(COLLECTION)
+        elif previous is not None:
+            ops.append(qm.DeleteAliasOperation(delete_alias=qm.DeleteAlias(alias_name=COLLECTION)))
+        ops.append(qm.CreateAliasOperation(
+            create_alias=qm.CreateAlias(collection_name=self.target, alias_name=COLLECTION)))
+        try:
+            self.client.update_collection_aliases(change_aliases_operations=ops)
+        except Exception as exc:
+            if not legacy:
+                raise
+            # The old collection is already gone: point the operator at the complete rebuild
+            logger.error("reindex_alias_failed", target=self.target, error=str(exc))
+            raise SystemExit(
+                f"{COLLECTION} was deleted but creating the alias failed: {exc}\n"
+                f"The rebuilt index is complete in collection {self.target}. Recover by creating "
+                f"the alias {COLLECTION} -> {self.target} (Qdrant update_collection_aliases), "
+                f"or rerun rk-agent-reindex, which resumes into {self.target} and retries the swap."
+            ) from exc
+        if previous and drop_old:
+            self.client.delete_collection(previous)
+            return f"dropped {previous}"
+        return f"previous collection: {previous}" if previous else "replaced legacy collection"
+
+
+class _NumpySink:
+    def __init__(self, target: Path, embedder_name: str) -> None:
+        from src.db.numpy_index import NumpyVectorIndex
+        cfg = Config.get()
+        self.target = target
+        self.index = NumpyVectorIndex(
+            root=str(target),
+            embedder=_build_embedder(embedder_name),
+            segment_rows=getattr(cfg, "vector_segment_rows", 512),
+            max_segments=getattr(cfg, "vector_max_segments", 8),
+            ivf_min_rows=getattr(cfg, "vector_ivf_min_rows", 4096),
+            nprobe=getattr(cfg, "vector_ivf_nprobe", 8),
+            quantize=getattr(cfg, "vector_quantization", "none") == "int8",
+        )
+
+    def write(self, docs: List[Doc], vectors) -> None:
+        by_user: Dict[int, List[int]] = {}
+        for i, (uid, _, _, _) in enumerate(docs):
+            by_user.setdefault(uid, []).append(i)
+        for uid, rows in by_user.items():
+            self.index.add(
+                uid,
+                [docs[i][1] for i in rows],
+                [{**docs[i][2], "user_id": uid} for i in rows],
+                vectors=vectors[rows],
+            )
+
+    def swap(self, drop_old: bool) -> str:
+        for uid in self.index.users():
+            self.index.compact(uid, full=True)
+        live = NUMPY_ROOT
+        previous: Optional[Path] = None
+        if live.is_symlink():
+            previous = live.parent / os.readlink(live)
+        elif live.exists():
+            previous = live.with_name(f"{live.name}.pre-{int(time.time())}")
+            live.rename(previous)
+        tmp_link = live.with_name(f"{live.name}.swap")
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(self.target.name)
+        os.replace(tmp_link, live)
+        if previous and drop_old and previous.resolve() != self.target.resolve():
+            import shutil
+            shutil.rmtree(previous, ignore_errors=True)
+            return f"dropped {previous}"
+        return f"previous index: {previous}" if previous else "no previous index"
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def _load_state() -> Optional[Dict[str, Any]]:
+    if STATE_PATH.exists():
+        return json.loads(STATE_PATH.read_text())
+    return None
+
+
+def _save_state(state: Dict[str, Any]) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, STATE_PATH)
+
+
+def _docs_for(source: str, rows: List[tuple], cfg: Config) -> List[Doc]:
+    """Documents for one page, with the payload live ingest would write.
+
+    text_hash included: VectorStore.add_memory finds exact duplicates by it,
+    so a rebuilt index must carry it or the next identical memory is added again.
+    """
+    from src.db.vector_store import _text_hash
+    docs: List[Doc] = []
+    if source == "memory":
+        for rid, uid, key, value, mem_type, pinned in rows:
+            text = f"{key}: {value}"
+            meta = {"mem_type": mem_type, "key": key, "pinned": bool(pinned)}
+            meta["text_hash"] = _text_hash(text, meta)
+            docs.append((uid, text, meta, f"memory:{rid}"))
+        return docs
+    for rid, uid, role, content, ts in rows:
+        for text, meta in plan_chunks(role, content, rid, cfg):
+            meta["timestamp"] = ts
+            meta["text_hash"] = _text_hash(text, meta)
+            docs.append((uid, text, meta, f"chat:{rid}:{meta.get('chunk', 0)}"))
+    return docs
+
+
+def _open_qdrant():
+    from src.db.vector_store import HAS_QDRANT, _load_qdrant
+    if not HAS_QDRANT:
+        return None
+    QdrantClient = _load_qdrant()
+    url = getattr(Config.get(), "vector_qdrant_url", "")
+    client = QdrantClient(url=url) if url else QdrantClient(path="./data/vector_db")
+    if not hasattr(client, "get_fastembed_vector_params"):
+        client.close()
+        return None
+    return client
+
+
+async def reindex(
+    backend: str = "auto",
+    workers: int = 0,
+    page_size: int = 2000,
+    batch_size: int = 256,
+    fresh: bool = False,
+    drop_old: bool = False,
+) -> Dict[str, Any]:
+    """Rebuild the vector index from SQLite. Returns a summary dict."""
+    cfg = Config.get()
+    backend = cfg.vector_backend if backend == "auto" and cfg.vector_backend != "auto" else backend
+    state = None if fresh else _load_state()
+    if state and backend not in ("auto", state["backend"]):
+        raise SystemExit(f"interrupted {state['backend']} rebuild pending — rerun with --fresh to discard it")
+
+    client = None
+    if (state or {}).get("backend", backend) in ("auto", "qdrant"):
+        client = _open_qdrant()
+        if client is None and backend == "qdrant":
+            raise SystemExit("qdrant backend requested but qdrant-client with fastembed is unavailable")
+    if state is None:
+        stamp = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        if client is not None:
+            state = {"backend": "qdrant", "target": f"{COLLECTION}_{stamp}",
+                     "embedder": f"fastembed:{client.embedding_model_name}"}
+        else:
+            from src.db.embedders import get_embedder
+            emb = get_embedder(getattr(cfg, "vector_embedder", "auto"))
+            if emb is None:
+                raise SystemExit("numpy is not installed")
+            state = {"backend": "numpy", "target": f"{NUMPY_ROOT.name}.{stamp}", "embedder": emb.name}
+        state.update({"last_id": {s[0]: 0 for s in _SOURCES}, "rows": 0, "docs": 0, "seconds": 0.0})
+        _save_state(state)
+    else:
+        print(f"resuming {state['backend']} rebuild into {state['target']} "
+              f"from {state['last_id']}", file=sys.stderr)
+
+    if state["backend"] == "qdrant":
+        sink = _QdrantSink(client, state["target"])
+    else:
+        sink = _NumpySink(NUMPY_ROOT.parent / state["target"], state["embedder"])
+    embedder = _Embedder(state["embedder"], workers or os.cpu_count() or 1, batch_size)
+    logger.info("reindex_started", backend=state["backend"], target=state["target"],
+                embedder=state["embedder"], resume=state["rows"] > 0)
+
+    try:
+        for source, page_sql, count_sql in _SOURCES:
+            async with get_db() as db:
+                cur = await db.execute(count_sql, (state["last_id"][source],))
+                remaining = (await cur.fetchone())[0]
+            done = 0
+            t_source = time.perf_counter()
+            while True:
+                t0 = time.perf_counter()
+                async with get_db() as db:
+                    cur = await db.execute(page_sql, (state["last_id"][source], page_size))
+                    rows = await cur.fetchall()
+                if not rows:
+                    break
+                docs = _docs_for(source, rows, cfg)
+                if docs:
+                    vectors = await embedder.embed([d[1] for d in docs])
+                    await asyncio.get_running_loop().run_in_executor(None, sink.write, docs, vectors)
+                state["last_id"][source] = rows[-1][0]
+                state["rows"] += len(rows)
+                state["docs"] += len(docs)
+                state["seconds"] += time.perf_counter() - t0
+                _save_state(state)
+                done += len(rows)
+                rate = done / max(time.perf_counter() - t_source, 1e-9)
+                eta = (remaining - done) / rate if rate else 0
+                print(f"[{source}] {done}/{remaining} rows  {len(docs)} docs  "
+                      f"{rate:,.0f} rows/s  eta {eta:,.0f}s", file=sys.stderr)
+    finally:
+        embedder.close()
+
+    swap_note = sink.swap(drop_old)
+    STATE_PATH.unlink(missing_ok=True)
+    summary = {
+        "backend": state["backend"],
+        "target": state["target"],
+        "rows": state["rows"],
+        "docs": state["docs"],
+        "seconds": round(state["seconds"], 2),
+        "rows_per_second": round(state["rows"] / state["seconds"], 1) if state["seconds"] else 0.0,
+        "swap": swap_note,
+    }
+    logger.info("reindex_finished", **summary)
+    return summary
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        prog="rk-agent-reindex",
+        description="Rebuild vector memory from chat_history and rika_memory.",
+    )
+    ap.add_argument("--backend", choices=("auto", "qdrant", "numpy"), default="auto")
+    ap.add_argument("--workers", type=int, default=0, help="embedding processes (default: all cores)")
+    ap.add_argument("--page-size", type=int, default=2000, help="SQLite rows per page")
+    ap.add_argument("--batch-size", type=int, default=256, help="texts per embedding batch")
+    ap.add_argument("--fresh", action="store_true", help="ignore an interrupted run and start over")
+    ap.add_argument("--drop-old", action="store_true", help="delete the previous index after the swap")
+    args = ap.parse_args()
+    summary = asyncio.run(reindex(
+        backend=args.backend, workers=args.workers, page_size=args.page_size,
+        batch_size=args.batch_size, fresh=args.fresh, drop_old=args.drop_old,
+    ))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,294 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import hashlib
+import importlib.util
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
 
+from src.db.embedders import HAS_NUMPY, FastEmbedEmbedder, get_embedder
 from src.utils.logger import logger
+from src.utils.registry import Registry
+from src.utils.tracing import traced
 
-_VECTOR_DISABLED = False  # True after first ONNX/fastembed failure
+_VECTOR_DISABLED = False  # True once neither Qdrant nor the NumPy fallback can embed
+_MODEL_ERROR_MARKERS = ("NO_SUCH", "onnx", "model_optimized", "fastembed")
+_DEDUP_FIELDS = ("key", "mem_type", "role")  # near-duplicates must agree on these
+_RECENT_HASHES_PER_USER = 256
+_WS_RE = re.compile(r"\s+")
 
-try:
+# qdrant_client (+ fastembed) takes ~2 s to import, so it is only imported
+# when the store is first built — see _load_qdrant() and get_vector_store().
+HAS_QDRANT = importlib.util.find_spec("qdrant_client") is not None
+qdrant_models = None
+_init_lock = threading.Lock()
+
+
+def _load_qdrant():
+    global qdrant_models
     from qdrant_client import QdrantClient
-    from qdrant_client.http import models as qdrant_models
-    HAS_QDRANT = True
-except ImportError:
-    HAS_QDRANT = False
+    from qdrant_client.http import models
+    qdrant_models = models
+    return QdrantClient
+
+
+def _is_model_error(exc: Exception) -> bool:
+    return any(x in str(exc) for x in _MODEL_ERROR_MARKERS)
+
+
+def _text_hash(text: str, metadata: Dict[str, Any]) -> str:
+    """Exact-duplicate key: whitespace/case-normalized text + dedup fields."""
+    norm = _WS_RE.sub(" ", text.strip().lower())
+    scope = "|".join(str(metadata.get(f, "")) for f in _DEDUP_FIELDS)
+    return hashlib.blake2b(f"{scope}|{norm}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _qdrant_filter(user_id: int, where: Optional[Dict[str, Any]] = None):
+    must = [
+        qdrant_models.FieldCondition(key="user_id", match=qdrant_models.MatchValue(value=user_id))
+    ]
+    for key, value in (where or {}).items():
+        must.append(qdrant_models.FieldCondition(key=key, match=qdrant_models.MatchValue(value=value)))
+    return qdrant_models.Filter(must=must)
+
+
+def _index_configs():
+    """(quantization_config, hnsw_config) for the memory collection, from Config."""
+    from src.config import Config
+    cfg = Config.get()
+    quantization = None
+    if getattr(cfg, "vector_quantization", "none") == "int8":
+        quantization = qdrant_models.ScalarQuantization(
+            scalar=qdrant_models.ScalarQuantizationConfig(
+                type=qdrant_models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,  # int8 codes in RAM, float originals on disk for rescoring
+            )
+        )
+    hnsw = qdrant_models.HnswConfigDiff(
+        m=getattr(cfg, "vector_hnsw_m", 16),
+        ef_construct=getattr(cfg, "vector_hnsw_ef_construct", 100),
+        on_disk=getattr(cfg, "vector_on_disk", False),
+    )
+    return quantization, hnsw
+
+
+def _search_params():
+    from src.config import Config
+    cfg = Config.get()
+    quantized = getattr(cfg, "vector_quantization", "none") == "int8"
+    return qdrant_models.SearchParams(
+        hnsw_ef=getattr(cfg, "vector_hnsw_ef", 64),
+        quantization=qdrant_models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+        if quantized else None,
+    )
+
+
+def _collapse_chunks(results: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Keep only the best-scoring chunk per parent message (results arrive sorted)."""
+    seen: Set[Any] = set()
+    out: List[Dict[str, Any]] = []
+    for r in results:
+        parent = (r.get("metadata") or {}).get("parent_id")
+        if parent is not None:
+            if parent in seen:
+                continue
+            seen.add(parent)
+        out.append(r)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
 
 
 class VectorStore:
-    """Semantic memory store backed by a local Qdrant instance."""
+    """Semantic memory store backed by a local Qdrant instance.
+
+    Falls back to the memory-mapped NumPy index (src.db.numpy_index) when
+    qdrant-client is missing, fails to start, or cannot load its ONNX model.
+    Set vector_backend="numpy" to skip Qdrant entirely.
+    """
 
     _instance: Optional[VectorStore] = None
 
     def __new__(cls) -> VectorStore:
-        if cls._instance is None:
+        if cls._instance is not None:
+            return cls._instance
+        with _init_lock:
+            if cls._instance is not None:
+                return cls._instance
+            from src.config import Config
             obj = super().__new__(cls)
             obj.client = None
+            obj.np_index = None
+            obj._qdrant_embedder = None
             obj.collection_name = "collective_unconscious"
-            if HAS_QDRANT:
-                try:
-                    obj.client = QdrantClient(path="./data/vector_db")
-                    obj._ensure_collection()
-                except Exception as exc:
-                    logger.error("qdrant_init_failed", error=str(exc))
-            else:
-                logger.warning("qdrant_not_installed", detail="pip install 'qdrant-client[fastembed]'")
+            obj._recent_hashes: Registry[int, OrderedDict] = Registry("vector_recent_hashes")
+            obj.backend = getattr(Config.get(), "vector_backend", "auto")
+            if obj.backend != "numpy":
+                if HAS_QDRANT:
+                    try:
+                        QdrantClient = _load_qdrant()
+                        url = getattr(Config.get(), "vector_qdrant_url", "")
+                        obj.client = QdrantClient(url=url) if url else QdrantClient(path="./data/vector_db")
+                        if not obj._ensure_collection():
+                            obj.client = None
+                    except Exception as exc:
+                        obj.client = None
+                        logger.error("qdrant_init_failed", error=str(exc))
+                else:
+                    logger.warning("qdrant_not_installed", detail="pip install 'qdrant-client[fastembed]'")
+            if obj.client is None:
+                obj._use_numpy("qdrant_unavailable" if obj.backend != "numpy" else "configured")
             cls._instance = obj
-        return cls._instance
+            return obj
 
-    def _ensure_collection(self) -> None:
-        global _VECTOR_DISABLED
+    def _ensure_collection(self) -> bool:
         if self.client is None or _VECTOR_DISABLED:
-            return
+            return False
+        quantization, hnsw = _index_configs()
         try:
             self.client.get_collection(self.collection_name)
         except Exception:
             try:
+                from src.config import Config
+                on_disk = getattr(Config.get(), "vector_on_disk", False)
                 self.client.create_collection(
                     collection_name=self.collection_name,
-                    vectors_config=self.client.get_fastembed_vector_params(),
+                    vectors_config=self.client.get_fastembed_vector_params(on_disk=on_disk),
+                    quantization_config=quantization,
+                    hnsw_config=hnsw,
+                    on_disk_payload=on_disk,
                 )
-                logger.info("vector_collection_created", name=self.collection_name)
+                logger.info("vector_collection_created", name=self.collection_name,
+                            quantization=quantization is not None, on_disk=on_disk)
+                return True
             except Exception as exc:
                 logger.error("vector_collection_creation_failed", error=str(exc))
+                return False
+        # Existing collection: bring index settings in line with config.
+        # Embedded (path=) mode stores these but always searches brute force.
+        try:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                quantization_config=quantization or qdrant_models.Disabled.DISABLED,
+                hnsw_config=hnsw,
+            )
+        except Exception as exc:
+            logger.warning("vector_collection_update_failed", error=str(exc))
+        return True
+
+    def _use_numpy(self, reason: str) -> bool:
+        """Switch to the NumPy index. False if the fallback is unavailable too."""
+        global _VECTOR_DISABLED
+        if self.np_index is not None:
+            return True
+        if self.backend == "qdrant" or not HAS_NUMPY:
+            if not _VECTOR_DISABLED:
+                _VECTOR_DISABLED = True
+                logger.warning("vector_store_disabled", reason=reason,
+                               detail="no fallback (vector_backend=qdrant or numpy missing)")
+            return False
+        from src.config import Config
+        from src.db.numpy_index import NumpyVectorIndex
+        cfg = Config.get()
+        try:
+            self.np_index = NumpyVectorIndex(
+                root="./data/vector_np",
+                embedder=get_embedder(getattr(cfg, "vector_embedder", "auto")),
+                segment_rows=getattr(cfg, "vector_segment_rows", 512),
+                max_segments=getattr(cfg, "vector_max_segments", 8),
+                ivf_min_rows=getattr(cfg, "vector_ivf_min_rows", 4096),
+                nprobe=getattr(cfg, "vector_ivf_nprobe", 8),
+                quantize=getattr(cfg, "vector_quantization", "none") == "int8",
+            )
+        except Exception as exc:
+            _VECTOR_DISABLED = True
+            logger.error("numpy_index_init_failed", error=str(exc))
+            return False
+        self.client = None
+        logger.warning("vector_store_numpy_fallback", reason=reason,
+                       embedder=self.np_index.embedder.name)
+        return True
+
+    def _seen_recently(self, user_id: int, text_hash: str) -> bool:
+        """Exact-duplicate check against this user's last few indexed texts."""
+        recent = self._recent_hashes.setdefault(user_id, OrderedDict())
+        if text_hash in recent:
+            recent.move_to_end(text_hash)
+            return True
+        recent[text_hash] = None
+        if len(recent) > _RECENT_HASHES_PER_USER:
+            recent.popitem(last=False)
+        return False
+
+    def _qdrant_vector(self, text: str) -> List[float]:
+        """Embed text with the collection's fastembed model.
+
+        Done here rather than through client.add()/query(query_text=...) so
+        an add embeds its text once for both the near-duplicate query and
+        the upsert.
+        """
+        if self._qdrant_embedder is None:
+            with _init_lock:
+                if self._qdrant_embedder is None:
+                    self._qdrant_embedder = FastEmbedEmbedder(self.client.embedding_model_name)
+        return self._qdrant_embedder.embed([text])[0].tolist()
+
+    def _qdrant_query(self, vector: List[float], query_filter, limit: int, **kwargs: Any):
+        return self.client.query_points(
+            collection_name=self.collection_name,
+            query=vector,
+            using=self.client.get_vector_field_name(),
+            query_filter=query_filter,
+            limit=limit,
+            with_payload=True,
+            **kwargs,
+        ).points
+
+    def _qdrant_add(self, user_id: int, text: str, payload: Dict[str, Any], threshold: float) -> str:
+        """Insert, or bump dup_count on an exact/near duplicate. Returns the action taken."""
+        vector = None
+        scope = {f: payload[f] for f in _DEDUP_FIELDS if payload.get(f) is not None}
+        if threshold:
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=_qdrant_filter(user_id, {"text_hash": payload["text_hash"]}),
+                limit=1,
+                with_payload=["dup_count"],
+            )
+            hit = points[0] if points else None
+            if hit is None:
+                vector = self._qdrant_vector(text)
+                near = self._qdrant_query(vector, _qdrant_filter(user_id, scope), limit=1)
+                hit = near[0] if near and near[0].score >= threshold else None
+            if hit is not None:
+                prev = (getattr(hit, "payload", None) or getattr(hit, "metadata", None) or {})
+                self.client.set_payload(
+                    collection_name=self.collection_name,
+                    payload={"dup_count": prev.get("dup_count", 1) + 1,
+                             "timestamp": payload.get("timestamp", _utcnow())},
+                    points=[hit.id],
+                )
+                return "merged"
+        if vector is None:
+            vector = self._qdrant_vector(text)
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[qdrant_models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector={self.client.get_vector_field_name(): vector},
+                payload={"document": text, **payload},  # same layout client.add() writes
+            )],
+        )
+        return "added"
 
     async def add_memory(
         self,
@@ -58,64 +296,170 @@ class VectorStore:
         text: str,
         metadata: Optional[Dict[str, Any]] = None,
     ) -> None:
-        if self.client is None:
+        if self.client is None and self.np_index is None:
             return
-        loop = asyncio.get_running_loop()  # fixed: was get_event_loop()
+        from src.config import Config
+        threshold = float(getattr(Config.get(), "vector_dedup_threshold", 0.97) or 0.0)
         payload = {**(metadata or {}), "user_id": user_id}
+        payload["text_hash"] = _text_hash(text, payload)
+        if threshold and self._seen_recently(user_id, payload["text_hash"]):
+            logger.debug("vector_add_skipped_duplicate", user_id=user_id)
+            return
+        loop = asyncio.get_running_loop()  # fixed: was get_event_loop()
+        if self.client is not None:
+            try:
+                action = await loop.run_in_executor(
+                    None, lambda: self._qdrant_add(user_id, text, payload, threshold)
+                )
+                if action == "merged":
+                    logger.debug("vector_add_merged", user_id=user_id)
+                return
+            except Exception as exc:
+                if not (_is_model_error(exc) and self._use_numpy("ONNX model missing")):
+                    if not _is_model_error(exc):
+                        logger.error("vector_add_failed", error=str(exc))
+                    return
         try:
             await loop.run_in_executor(
                 None,
-                lambda: self.client.add(
-                    collection_name=self.collection_name,
-                    documents=[text],
-                    metadata=[payload],
-                ),
+                lambda: self.np_index.add(user_id, [text], [payload], dedup_threshold=threshold or None),
             )
         except Exception as exc:
-            if any(x in str(exc) for x in ("NO_SUCH", "onnx", "model_optimized", "fastembed")):
-                global _VECTOR_DISABLED
-                if not _VECTOR_DISABLED:
-                    _VECTOR_DISABLED = True
-                    logger.warning("vector_store_disabled", reason="ONNX model missing — pip install fastembed")
-            else:
-                logger.error("vector_add_failed", error=str(exc))
+            logger.error("vector_add_failed", backend="numpy", error=str(exc))
 
+    async def delete_memories(self, user_id: int, **where: Any) -> int:
+        """Delete a user's vectors whose payload matches where (all of them if empty).
+
+        Returns the number of vectors removed (-1 when Qdrant does not report it).
+        """
+        if self.client is None and self.np_index is None:
+            return 0
+        self._recent_hashes.pop(user_id, None)
+        loop = asyncio.get_running_loop()
+        try:
+            if self.client is not None:
+                await loop.run_in_executor(
+                    None,
+                    lambda: self.client.delete(
+                        collection_name=self.collection_name,
+                        points_selector=qdrant_models.FilterSelector(filter=_qdrant_filter(user_id, where)),
+                    ),
+                )
+                return -1
+            return await loop.run_in_executor(None, lambda: self.np_index.delete(user_id, where))
+        except Exception as exc:
+            logger.error("vector_delete_failed", user_id=user_id, error=str(exc))
+            return 0
+
+    def _qdrant_scan(self, field: str, user_id: Optional[int] = None) -> Set[Any]:
+        values: Set[Any] = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=_qdrant_filter(user_id) if user_id is not None else None,
+                limit=512,
+                offset=offset,
+                with_payload=[field],
+                with_vectors=False,
+            )
+            values.update(p.payload[field] for p in points if p.payload and field in p.payload)
+            if offset is None:
+                return values
+
+    async def list_users(self) -> List[int]:
+        """User ids that currently own at least one vector."""
+        if self.client is None and self.np_index is None:
+            return []
+        loop = asyncio.get_running_loop()
+        try:
+            if self.client is not None:
+                return sorted(await loop.run_in_executor(None, lambda: self._qdrant_scan("user_id")))
+            return await loop.run_in_executor(None, self.np_index.users)
+        except Exception as exc:
+            logger.error("vector_list_users_failed", error=str(exc))
+            return []
+
+    async def list_values(self, user_id: int, field: str) -> Set[Any]:
+        """Distinct payload values of field across a user's vectors."""
+        if self.client is None and self.np_index is None:
+            return set()
+        loop = asyncio.get_running_loop()
+        try:
+            if self.client is not None:
+                return await loop.run_in_executor(None, lambda: self._qdrant_scan(field, user_id))
+            return await loop.run_in_executor(None, lambda: self.np_index.values(user_id, field))
+        except Exception as exc:
+            logger.error("vector_list_values_failed", user_id=user_id, error=str(exc))
+            return set()
+
+    @traced("vector_search")
     async def search_memories(
         self, user_id: int, query: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
-        if self.client is None:
+        if self.client is None and self.np_index is None:
             return []
         loop = asyncio.get_running_loop()  # fixed: was get_event_loop()
+        if self.client is not None:
+            try:
+                results = await loop.run_in_executor(
+                    None,
+                    lambda: self._qdrant_query(
+                        self._qdrant_vector(query), _qdrant_filter(user_id),
+                        limit=limit * 2, search_params=_search_params(),
+                    ),
+                )
+                hits = []
+                for r in results:
+                    meta = dict(r.payload or {})
+                    hits.append({"text": meta.pop("document", ""), "score": r.score, "metadata": meta})
+                return _collapse_chunks(hits, limit)
+            except Exception as exc:
+                if not (_is_model_error(exc) and self._use_numpy("ONNX model missing")):
+                    if not _is_model_error(exc):
+                        logger.error("vector_search_failed", error=str(exc))
+                    return []
         try:
             results = await loop.run_in_executor(
-                None,
-                lambda: self.client.query(
-                    collection_name=self.collection_name,
-                    query_text=query,
-                    query_filter=qdrant_models.Filter(
-                        must=[
-                            qdrant_models.FieldCondition(
-                                key="user_id",
-                                match=qdrant_models.MatchValue(value=user_id),
-                            )
-                        ]
-                    ),
-                    limit=limit,
-                ),
+                None, lambda: self.np_index.search(user_id, query, limit * 2)
             )
-            return [
-                {"text": r.document, "score": r.score, "metadata": r.metadata}
-                for r in results
-            ]
+            return _collapse_chunks(results, limit)
         except Exception as exc:
-            if any(x in str(exc) for x in ("NO_SUCH", "onnx", "model_optimized", "fastembed")):
-                global _VECTOR_DISABLED
-                if not _VECTOR_DISABLED:
-                    _VECTOR_DISABLED = True
-                    logger.warning("vector_store_disabled", reason="ONNX model missing")
-            else:
-                logger.error("vector_search_failed", error=str(exc))
+            logger.error("vector_search_failed", backend="numpy", error=str(exc))
             return []
 
 
-vector_store = VectorStore()
+def get_vector_store() -> VectorStore:
+    """Process-wide VectorStore, built on first call.
+
+    Building opens the Qdrant client and may load the embedding model, which
+    blocks for seconds — call get_vector_store_async() from the event loop.
+    """
+    return VectorStore()
+
+
+async def get_vector_store_async() -> VectorStore:
+    """get_vector_store() without blocking the loop: first build runs in a thread."""
+    if VectorStore._instance is not None:
+        return VectorStore._instance
+    return await asyncio.get_running_loop().run_in_executor(None, VectorStore)
+
+
+class _LazyVectorStore:
+    """Module-level `vector_store` handle — nothing is built until first use.
+
+    Async methods await get_vector_store_async(), so the first add/search
+    pays the startup cost off the event loop. Plain attributes build synchronously.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(VectorStore, name, None)
+        if asyncio.iscoroutinefunction(attr):
+            async def call(*args: Any, **kwargs: Any) -> Any:
+                store = await get_vector_store_async()
+                return await getattr(store, name)(*args, **kwargs)
+            return call
+        return getattr(get_vector_store(), name)
+
+
+vector_store = _LazyVectorStore()
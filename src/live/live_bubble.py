@@ -17,6 +17,7 @@ class LiveBubble:
         self.queue: asyncio.Queue = asyncio.Queue()
         self.throttle = throttle_ms / 1000.0
         self._task = None
+        self._stopping = False
         self._last_flush = 0.0
         self._pulse_idx = 0
         self._pulse_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
@@ -65,15 +66,19 @@ class LiveBubble:
 
     async def stop(self):
         if self._task:
+            # wait_for() can swallow a cancel that lands as queue.get() finishes
+            # (Python < 3.12); the flag ends the loop within one pulse anyway
+            self._stopping = True
             self._task.cancel()
             try:
                 await self._task
             except asyncio.CancelledError:
                 pass
             self._task = None
+            self._stopping = False
 
     async def _loop(self, flush_cb):
-        while True:
+        while not self._stopping:
             # Wait for an update or a pulse timeout (0.2s for smooth animation)
             try:
                 await asyncio.wait_for(self.queue.get(), timeout=0.2)
@@ -32,6 +32,7 @@ class StructuredResponse:
 
 class BaseProvider(abc.ABC):
     SUPPORTS_FUNCTION_CALLING: bool = False
+    SUPPORTS_PARALLEL_TOOL_CALLS: bool = False
 
     def __init__(self, api_key: str, provider_name: str) -> None:
         self.api_key = api_key
@@ -46,9 +47,25 @@ class BaseProvider(abc.ABC):
 
     async def request_with_tools(self, payload: Dict[str, Any], tool_schemas: List[Any]) -> StructuredResponse:
         """Default: ignore schemas, call request(). Override for real function calling."""
+        payload = self._tools_payload(payload, [])
         result = await self.request(payload)
         return StructuredResponse(content=result.get("output", ""), usage=result.get("usage", {}))
 
+    def _tools_payload(self, payload: Dict[str, Any], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Copy payload, attach OpenAI-format tools and resolve parallel_tool_calls.
+
+        Callers put parallel_tool_calls in the payload unconditionally; it is
+        only forwarded when tools are sent and the provider supports the flag.
+        """
+        payload = dict(payload)
+        parallel = payload.pop("parallel_tool_calls", None)
+        if tools:
+            payload["tools"] = tools
+            payload["tool_choice"] = "auto"
+            if parallel is not None and self.SUPPORTS_PARALLEL_TOOL_CALLS:
+                payload["parallel_tool_calls"] = bool(parallel)
+        return payload
+
     @staticmethod
     def _parse_openai_tool_calls(choices: List[Dict]) -> List[ToolCall]:
         calls: List[ToolCall] = []
@@ -1,10 +1,18 @@
-"""Gemini provider — Google genai SDK with native function calling and vision."""
+"""Gemini provider — Google genai SDK with native function calling and vision.
+
+Long system prompts (+ tool declarations) are put in a Gemini context cache
+(client.caches) once they reach gemini_cache_min_tokens, and requests then
+reference the cache instead of resending them. Caches are shared per
+(API key, model, prefix) and recreated when they expire.
+"""
 from __future__ import annotations
-import asyncio, json
+import asyncio, hashlib, json, time
 from typing import Any, AsyncGenerator, Dict, List, Optional
 from src.providers.base_provider import (BaseProvider, ProviderAuthError, ProviderQuotaError,
                                           ProviderTransientError, StructuredResponse, ToolCall)
+from src.tools.schemas import serialize_tools
 from src.utils.logger import logger
+from src.utils.registry import Registry
 from src.config import Config
 
 try:
@@ -16,6 +24,18 @@ except ImportError:
 
 _DEFAULT = "gemini-2.0-flash"
 
+# (key digest, model, prefix digest) -> (cache name, expires_at monotonic);
+# a None name marks a failed create, not retried until it expires. Bounded:
+# every distinct system prompt adds a key, idle ones are evicted
+_CONTEXT_CACHES: Registry[tuple, tuple] = Registry("gemini_context_caches")
+# same keys -> the caches.create() in flight, shared by concurrent misses
+_CACHE_CREATES: Dict[tuple, asyncio.Future] = {}
+_CACHE_MARGIN_S = 60.0
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()[:16]
+
 def _part_text(text: str):
     """Create a text Part compatible with all google-genai SDK versions.
 
@@ -71,11 +91,13 @@ class GeminiProvider(BaseProvider):
           system    → system_instruction string (not a Content entry)
           user      → role="user" Content with text or multimodal parts
           assistant → role="model" Content; tool_calls become FunctionCall parts
-          tool      → role="user" Content with FunctionResponse part
+          tool      → role="user" Content with FunctionResponse part; consecutive
+                      tool messages (one parallel turn) share one Content
         """
         messages = payload.get("messages", [])
         system = ""
         contents = []
+        tool_turn = None
 
         for m in messages:
             role = m.get("role", "user")
@@ -89,21 +111,31 @@ class GeminiProvider(BaseProvider):
             if role == "tool":
                 result_text = content if isinstance(content, str) else str(content)
                 tool_call_id = m.get("tool_call_id", "")
-                # Resolve tool name from preceding model turn
+                # Results of one parallel turn share a single user Content
+                pending = tool_turn.parts if tool_turn is not None else []
+                # Resolve tool name from preceding model turn: by call id,
+                # else by position (Gemini calls carry no ids)
                 tool_name = tool_call_id
                 for prev in reversed(contents):
                     if getattr(prev, "role", None) == "model":
-                        for part in (prev.parts or []):
-                            fc = getattr(part, "function_call", None)
-                            if fc and getattr(fc, "id", None) == tool_call_id:
+                        calls = [getattr(p, "function_call", None) for p in (prev.parts or [])]
+                        calls = [fc for fc in calls if fc]
+                        for fc in calls:
+                            if tool_call_id and getattr(fc, "id", None) == tool_call_id:
                                 tool_name = getattr(fc, "name", tool_name)
                                 break
+                        else:
+                            if len(pending) < len(calls):
+                                tool_name = getattr(calls[len(pending)], "name", tool_name) or tool_name
                         break
-                contents.append(types.Content(
-                    role="user",
-                    parts=[_part_function_response(tool_name, {"result": result_text})],
-                ))
+                part = _part_function_response(tool_name, {"result": result_text})
+                if tool_turn is not None:
+                    tool_turn.parts.append(part)
+                else:
+                    tool_turn = types.Content(role="user", parts=[part])
+                    contents.append(tool_turn)
                 continue
+            tool_turn = None
 
             # assistant / model ───────────────────────────────────────────────
             if role == "assistant":
@@ -149,6 +181,63 @@ class GeminiProvider(BaseProvider):
         return contents, system
 
 
+    async def _context_cache(self, client, model: str, system: str,
+                             tools: Optional[list] = None, tools_key: str = "") -> Optional[str]:
+        """Name of a Gemini context cache holding system + tools, or None.
+
+        None when caching is disabled, the prefix is too short to qualify,
+        or the model/key does not support caching.
+        """
+        cfg = Config.get()
+        if not system or not getattr(cfg, "gemini_context_cache", True):
+            return None
+        if len(system) // 4 + len(tools_key) // 4 < int(getattr(cfg, "gemini_cache_min_tokens", 4096)):
+            return None
+        ttl = int(getattr(cfg, "gemini_cache_ttl_seconds", 900))
+        key = (_digest(self.api_key), model, _digest(system + "\x00" + tools_key))
+        now = time.monotonic()
+        hit = _CONTEXT_CACHES.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+        pending = _CACHE_CREATES.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        pending = self._loop().create_future()
+        _CACHE_CREATES[key] = pending
+        name: Optional[str] = None
+        try:
+            name = await self._create_context_cache(client, model, system, tools, key, ttl, now)
+        finally:
+            _CACHE_CREATES.pop(key, None)
+            pending.set_result(name)
+        return name
+
+    async def _create_context_cache(self, client, model: str, system: str, tools: Optional[list],
+                                    key: tuple, ttl: int, now: float) -> Optional[str]:
+        cache_config: Dict[str, Any] = {"system_instruction": system, "ttl": f"{ttl}s"}
+        if tools:
+            cache_config["tools"] = tools
+        try:
+            cache = await self._loop().run_in_executor(
+                None, lambda: client.caches.create(
+                    model=model, config=types.CreateCachedContentConfig(**cache_config)
+                )
+            )
+            _CONTEXT_CACHES[key] = (cache.name, now + ttl - _CACHE_MARGIN_S)
+            logger.info("gemini_context_cache_created", model=model, chars=len(system))
+            return cache.name
+        except Exception as e:
+            _CONTEXT_CACHES[key] = (None, now + ttl)
+            logger.warning("gemini_context_cache_failed", model=model, error=str(e))
+            return None
+
+    @staticmethod
+    def _drop_context_cache(name: Optional[str]) -> None:
+        if name:
+            for key, (cached, _) in list(_CONTEXT_CACHES.items()):
+                if cached == name:
+                    _CONTEXT_CACHES.pop(key, None)
+
     def _resolve_model(self, payload: Dict[str, Any]) -> str:
         model = payload.get("model") or self.default_model
         if "gemini" not in model.lower():
@@ -159,7 +248,11 @@ class GeminiProvider(BaseProvider):
         client = self._client()
         model = self._resolve_model(payload)
         contents, system = self._extract_messages(payload)
-        config = types.GenerateContentConfig(system_instruction=system) if system else None
+        cached = await self._context_cache(client, model, system)
+        if cached:
+            config = types.GenerateContentConfig(cached_content=cached)
+        else:
+            config = types.GenerateContentConfig(system_instruction=system) if system else None
         try:
             resp = await self._loop().run_in_executor(
                 None, lambda: client.models.generate_content(
@@ -175,6 +268,7 @@ class GeminiProvider(BaseProvider):
                 }
             }
         except errors.ClientError as e:
+            self._drop_context_cache(cached)
             code = getattr(e, "code", 500)
             if code == 401: raise ProviderAuthError(str(e))
             if code == 429: raise ProviderQuotaError(str(e))
@@ -191,10 +285,17 @@ class GeminiProvider(BaseProvider):
             config_kwargs["system_instruction"] = system
         if tool_schemas:
             try:
-                declarations = [s.to_gemini() for s in tool_schemas]
+                declarations = serialize_tools("gemini", tool_schemas)
                 config_kwargs["tools"] = [types.Tool(function_declarations=declarations)]
             except Exception as e:
                 logger.warning("gemini_tool_schema_build_failed", error=str(e))
+        # System prompt + tools are the stable prefix: reference a context cache
+        tools_key = json.dumps([getattr(s, "key", str(s)) for s in tool_schemas or []])
+        cached = await self._context_cache(
+            client, model, system, config_kwargs.get("tools"), tools_key
+        )
+        if cached:
+            config_kwargs = {"cached_content": cached}
         config = types.GenerateContentConfig(**config_kwargs) if config_kwargs else None
         try:
             resp = await self._loop().run_in_executor(
@@ -219,6 +320,7 @@ class GeminiProvider(BaseProvider):
             return StructuredResponse(content=content_text, tool_calls=tool_calls,
                                       usage=usage, model=model)
         except errors.ClientError as e:
+            self._drop_context_cache(cached)
             code = getattr(e, "code", 500)
             if code == 401: raise ProviderAuthError(str(e))
             if code == 429: raise ProviderQuotaError(str(e))
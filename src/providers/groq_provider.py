@@ -5,6 +5,7 @@ import httpx
 from typing import Any, AsyncGenerator, Dict, List
 from src.providers.base_provider import (BaseProvider, ProviderAuthError, ProviderQuotaError,
                                           ProviderTransientError, StructuredResponse, ToolCall)
+from src.tools.schemas import serialize_tools
 from src.utils.logger import logger
 
 _DEFAULT_MODEL = "llama-3.3-70b-versatile"
@@ -20,6 +21,7 @@ class GroqToolUseFailedError(Exception):
 
 class GroqProvider(BaseProvider):
     SUPPORTS_FUNCTION_CALLING = True
+    SUPPORTS_PARALLEL_TOOL_CALLS = True
 
     def __init__(self, api_key: str, provider_name: str = "groq"):
         super().__init__(api_key, provider_name)
@@ -63,10 +65,10 @@ class GroqProvider(BaseProvider):
             return {"output": content or "", "usage": data.get("usage", {}), "raw_response": data}
 
     async def request_with_tools(self, payload: Dict[str, Any], tool_schemas: List[Any]) -> StructuredResponse:
-        payload = dict(self._fix_model(payload))
-        if tool_schemas:
-            payload["tools"] = [s.to_openai(strip_enum=True) for s in tool_schemas]
-            payload["tool_choice"] = "auto"
+        payload = self._tools_payload(
+            self._fix_model(payload),
+            serialize_tools("groq", tool_schemas, strip_enum=True),
+        )
         async with httpx.AsyncClient(timeout=60.0) as client:
             r = await client.post(f"{self.base_url}/v1/chat/completions",
                                   json=payload, headers=self._make_headers())
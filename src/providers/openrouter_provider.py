@@ -5,10 +5,12 @@ import httpx
 from typing import Any, AsyncGenerator, Dict, List
 from src.providers.base_provider import (BaseProvider, ProviderAuthError, ProviderQuotaError,
                                           ProviderTransientError, StructuredResponse)
+from src.tools.schemas import serialize_tools
 from src.utils.logger import logger
 
 class OpenRouterProvider(BaseProvider):
     SUPPORTS_FUNCTION_CALLING = True
+    SUPPORTS_PARALLEL_TOOL_CALLS = True
 
     def __init__(self, api_key: str, provider_name: str = "openrouter"):
         super().__init__(api_key, provider_name)
@@ -37,10 +39,7 @@ class OpenRouterProvider(BaseProvider):
             return {"output": content or "", "usage": data.get("usage", {})}
 
     async def request_with_tools(self, payload: Dict[str, Any], tool_schemas: List[Any]) -> StructuredResponse:
-        payload = dict(payload)
-        if tool_schemas:
-            payload["tools"] = [s.to_openai() for s in tool_schemas]
-            payload["tool_choice"] = "auto"
+        payload = self._tools_payload(payload, serialize_tools("openrouter", tool_schemas))
         async with httpx.AsyncClient(timeout=60.0) as client:
             r = await client.post(f"{self.base_url}/api/v1/chat/completions",
                                   json=payload, headers=self._headers())
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import asyncio
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set
 
@@ -11,6 +12,8 @@ from src.providers.base_provider import ProviderAuthError, ProviderQuotaError, P
 # imported lazily inside methods to avoid circular import:
 #   from src.providers.groq_provider import GroqToolUseFailedError
 from src.utils.logger import logger
+from src.utils.registry import Registry
+from src.utils.tracing import span, traced
 
 _VIRTUAL_KEY_USAGE: Dict[str, datetime] = {}
 _MAX_TRANSIENT_PER_KEY = 3
@@ -31,15 +34,38 @@ class ProviderPool:
     }
 
     def __init__(self) -> None:
-        self._locks: Dict[tuple, asyncio.Lock] = {}
+        self._locks: Registry[tuple, asyncio.Lock] = Registry("provider_locks", in_use=lambda lock: lock.locked())
         self._working_caps: Dict[str, int] = {}
         self._logged_env_check: Set[int] = set()
+        # Stickiness: a conversation keeps the provider and key that last served
+        # it, so provider-side prompt caches (keyed per account) stay warm.
+        # (user_id, provider) -> (key identity, expires_at); user_id -> (provider, expires_at)
+        self._sticky_keys: Registry[tuple, tuple] = Registry("sticky_keys")
+        self._sticky_providers: Registry[int, tuple] = Registry("sticky_providers")
+
+    @staticmethod
+    def _sticky_ttl() -> float:
+        try:
+            from src.config import Config
+            return float(getattr(Config.get(), "sticky_provider_ttl_seconds", 600))
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _key_identity(k: dict) -> str:
+        return f"db:{k['id']}" if k["id"] >= 0 else f"env:{k.get('usage_key', '')}"
+
+    def order_providers(self, user_id: int, priorities: List[str]) -> List[str]:
+        """Priorities with the provider that last served this user moved to the front."""
+        sticky = self._sticky_providers.get(user_id)
+        if not sticky or sticky[1] < time.monotonic():
+            return list(priorities)
+        provider = sticky[0]
+        ordered = [p for p in priorities if self._normalize(p) == provider]
+        return ordered + [p for p in priorities if self._normalize(p) != provider]
 
     def _get_lock(self, user_id: int, provider: str) -> asyncio.Lock:
-        key = (user_id, self._normalize(provider))
-        if key not in self._locks:
-            self._locks[key] = asyncio.Lock()
-        return self._locks[key]
+        return self._locks.get_or_create((user_id, self._normalize(provider)), asyncio.Lock)
 
     async def request_with_key(self, user_id: int, provider: str, payload: dict) -> dict:
         logger.info("provider_pool_request_start", user_id=user_id, provider=provider)
@@ -77,7 +103,8 @@ class ProviderPool:
             logger.info("provider_pool_keyless", provider=norm)
             adapter = self._make_adapter(norm, "")
             try:
-                return await adapter.request(payload)
+                async with span("provider", provider=norm):
+                    return await adapter.request(payload)
             except (ProviderAuthError, ProviderQuotaError, ProviderTransientError):
                 raise
             except Exception as exc:
@@ -117,9 +144,10 @@ class ProviderPool:
 
             try:
                 logger.info("provider_pool_making_request", user_id=user_id, provider=norm)
-                resp = await adapter.request(payload)
+                async with span("provider", provider=norm):
+                    resp = await adapter.request(payload)
                 logger.info("provider_pool_request_success", user_id=user_id, provider=norm)
-                await self._record_usage(k)
+                await self._record_usage(k, user_id, norm)
                 # Token accounting
                 usage = resp.get("usage")
                 if usage and k["id"] >= 0:
@@ -191,7 +219,7 @@ class ProviderPool:
         try:
             async for chunk in adapter.stream(payload):
                 yield chunk
-            await self._record_usage(k)
+            await self._record_usage(k, user_id, norm)
         except (ProviderQuotaError, ProviderAuthError) as exc:
             reason = "auth_failed" if isinstance(exc, ProviderAuthError) else "quota_exceeded"
             if k["id"] >= 0:
@@ -236,7 +264,8 @@ class ProviderPool:
         norm = self._normalize(provider)
         if norm in _KEYLESS_PROVIDERS:
             adapter = self._make_adapter(norm, "")
-            return await adapter.request_with_tools(payload, tool_schemas)
+            async with span("provider", provider=norm, tools=True):
+                return await adapter.request_with_tools(payload, tool_schemas)
 
         tried: Set[str] = set()
         tool_use_failures = 0
@@ -251,8 +280,9 @@ class ProviderPool:
                 )
             adapter = self._make_adapter(norm, k["raw_key"])
             try:
-                resp = await adapter.request_with_tools(payload, active_schemas)
-                await self._record_usage(k)
+                async with span("provider", provider=norm, tools=True):
+                    resp = await adapter.request_with_tools(payload, active_schemas)
+                await self._record_usage(k, user_id, norm)
                 if norm in self._TOOL_CAPS:
                     self._working_caps[norm] = len(active_schemas)
                 return resp
@@ -301,6 +331,7 @@ class ProviderPool:
 
         raise RuntimeError(f"All {provider} keys exhausted for structured request.")
 
+    @traced("key_select", provider="provider")
     async def _select_key(self, user_id: int, provider: str, exclude: Optional[Set[str]] = None) -> Optional[dict]:
         exclude = exclude or set()
         db_keys = await key_store.list_api_keys(user_id)
@@ -339,7 +370,11 @@ class ProviderPool:
             except ValueError:
                 return datetime.min
 
-        for k in sorted(provider_keys, key=_lru):
+        # The sticky key (if still valid) goes first, then least recently used
+        sticky = self._sticky_keys.get((user_id, norm_p))
+        sticky_id = sticky[0] if sticky and sticky[1] >= time.monotonic() else None
+
+        for k in sorted(provider_keys, key=lambda k: (self._key_identity(k) != sticky_id, _lru(k))):
             if k.get("is_blacklisted"):
                 reset = k.get("quota_resets_at")
                 if reset:
@@ -366,7 +401,13 @@ class ProviderPool:
             return k
         return None
 
-    async def _record_usage(self, k: dict) -> None:
+    async def _record_usage(self, k: dict, user_id: Optional[int] = None, provider: str = "") -> None:
+        if user_id is not None and provider:
+            ttl = self._sticky_ttl()
+            if ttl > 0:
+                expires = time.monotonic() + ttl
+                self._sticky_keys[(user_id, provider)] = (self._key_identity(k), expires)
+                self._sticky_providers[user_id] = (provider, expires)
         if k["id"] >= 0:
             try:
                 await key_store.update_key_last_used(k["id"])
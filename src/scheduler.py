@@ -1,5 +1,6 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from typing import Dict
 from .db import key_store
@@ -33,5 +34,12 @@ def start_scheduler(config: Config) -> AsyncIOScheduler:
         except Exception:
             continue
 
+    # Vector memory: drop vectors whose user / memory row has been deleted
+    sweep_hours = int(getattr(config, "vector_orphan_sweep_hours", 6) or 0)
+    if sweep_hours > 0:
+        from .db.chat_store import sweep_vector_orphans
+        scheduler.add_job(sweep_vector_orphans, IntervalTrigger(hours=sweep_hours),
+                          id="vector_orphan_sweep")
+
     scheduler.start()
     return scheduler
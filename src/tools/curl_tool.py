@@ -1,5 +1,6 @@
 import httpx
 import re
+from typing import Dict, Optional, Tuple
 from src.utils.logger import logger
 
 async def curl_fetch(url: str) -> str:
@@ -8,6 +9,20 @@ async def curl_fetch(url: str) -> str:
     Cleans up HTML and returns readable text content.
     Supports 'insecure' mode via '--insecure' or '-k' in the URL string (heuristic).
     """
+    result, _ = await curl_fetch_conditional(url)
+    return result
+
+
+async def curl_fetch_conditional(
+    url: str, validators: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
+    """curl_fetch with HTTP revalidation, used by the tool result cache.
+
+    validators are the ETag / Last-Modified of a previous fetch. Returns
+    (None, validators) when the server answers 304 Not Modified, otherwise
+    (result, new validators); validators is None when the result must not
+    be cached (errors, 4xx pages).
+    """
     url = url.strip()
     verify_ssl = True
     
@@ -24,6 +39,11 @@ async def curl_fetch(url: str) -> str:
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.5",
     }
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
     
     try:
         # Use verify=False if insecure mode is requested
@@ -32,6 +52,8 @@ async def curl_fetch(url: str) -> str:
             # Only raise on server errors (5xx). 4xx may still have content.
             if r.status_code >= 500:
                 r.raise_for_status()
+            if r.status_code == 304 and validators:
+                return None, validators
             
             text = r.text
             
@@ -49,15 +71,23 @@ async def curl_fetch(url: str) -> str:
             text = re.sub(r'\s+', ' ', text).strip()
             
             preview = text[:2500]
-            return f"FETCHED CONTENT FROM: {url}\nTITLE: {title}\nVERIFY_SSL: {verify_ssl}\nCONTENT: {preview}..."
+            result = f"FETCHED CONTENT FROM: {url}\nTITLE: {title}\nVERIFY_SSL: {verify_ssl}\nCONTENT: {preview}..."
+            if r.status_code >= 400:
+                return result, None
+            fresh = {}
+            if r.headers.get("etag"):
+                fresh["etag"] = r.headers["etag"]
+            if r.headers.get("last-modified"):
+                fresh["last_modified"] = r.headers["last-modified"]
+            return result, fresh
             
     except httpx.ConnectError as e:
-        return f"CURL ERROR: Connection failed. Check if URL is valid: {url}"
+        return f"CURL ERROR: Connection failed. Check if URL is valid: {url}", None
     except httpx.HTTPStatusError as e:
-        return f"CURL ERROR: Server returned {e.response.status_code} for {url}"
+        return f"CURL ERROR: Server returned {e.response.status_code} for {url}", None
     except Exception as e:
         err_msg = str(e)
         if "CERTIFICATE_VERIFY_FAILED" in err_msg:
-            return f"CURL ERROR: SSL Certificate verification failed for {url}. Hint: Use 'TOOL: curl | QUERY: {url} --insecure' to skip verification."
+            return f"CURL ERROR: SSL Certificate verification failed for {url}. Hint: Use 'TOOL: curl | QUERY: {url} --insecure' to skip verification.", None
         logger.error("curl_tool_failed", url=url, error=err_msg)
-        return f"CURL ERROR: {err_msg}"
+        return f"CURL ERROR: {err_msg}", None
@@ -19,6 +19,12 @@ def _build() -> Dict[str, Callable]:
     cfg = Config.get()
     registry: Dict[str, Callable] = {}
 
+    def _cached(name: str, fn: Callable, conditional: Optional[Callable] = None) -> Callable:
+        # Tools opt in with ToolSchema.cache_ttl (overridable via tool_cache_ttl)
+        from src.tools.result_cache import cached_tool, tool_ttl
+        ttl = tool_ttl(name, cfg)
+        return cached_tool(name, fn, ttl, conditional) if ttl > 0 else fn
+
     if cfg.enable_web_search:
         from src.tools.web_search_tool import web_search as _web_search
 
@@ -30,15 +36,15 @@ def _build() -> Dict[str, Callable]:
                 max_results = 5
             return await _web_search(query=query, max_results=max_results)
 
-        registry["web_search"] = web_search_tool
+        registry["web_search"] = _cached("web_search", web_search_tool)
 
     if cfg.enable_wikipedia_search:
         from src.tools.wikipedia_tool import wikipedia_search
-        registry["wikipedia_search"] = wikipedia_search
+        registry["wikipedia_search"] = _cached("wikipedia_search", wikipedia_search)
 
     if cfg.enable_web_fetch:
-        from src.tools.curl_tool import curl_fetch
-        registry["curl"] = curl_fetch
+        from src.tools.curl_tool import curl_fetch, curl_fetch_conditional
+        registry["curl"] = _cached("curl", curl_fetch, curl_fetch_conditional)
 
     if cfg.enable_code_execution:
         from src.tools.shell_tool import run_shell_command, watch_task_logs
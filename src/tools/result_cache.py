@@ -0,0 +1,277 @@
+"""Tool result cache — shared, TTL-bounded results of the network tools.
+
+web_search, wikipedia_search and curl hit the network on every call, even
+when the agent (or the same user a minute later) asks for the same query or
+URL. Tools opt in through ToolSchema.cache_ttl; the registry wraps them with
+cached_tool(). Entries are keyed by tool name + normalized arguments:
+
+  - in memory: LRU bounded by tool_cache_max_bytes (UTF-8 size of the results)
+  - tool_cache_persist: write-through to the tool_cache table, read on a memory miss
+  - expired entries carrying ETag / Last-Modified validators are kept for
+    tool_cache_stale_seconds and revalidated with a conditional request
+  - concurrent identical calls share one in-flight request
+  - error results are never stored
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from src.utils.logger import logger
+
+# conditional(validators) -> (result, validators). result None = not modified
+# (304); validators None = result must not be cached.
+Conditional = Callable[[Optional[Dict[str, str]]], Awaitable[Tuple[Optional[str], Optional[Dict[str, str]]]]]
+
+_ERROR_PREFIXES = (
+    "Error", "CURL ERROR", "Web search error", "No results found",
+    "Wikipedia Error", "Wikipedia: No results",
+)
+_WS_RE = re.compile(r"\s+")
+
+
+def _normalize(name: str, value: Any) -> str:
+    text = _WS_RE.sub(" ", str(value)).strip()
+    if name == "url":
+        if not text.startswith("http"):
+            text = "https://" + text
+        parts = urlsplit(text)
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/",
+                           parts.query, ""))
+    if name == "query":
+        return text.casefold()
+    return text
+
+
+def cache_key(arguments: Mapping[str, Any]) -> str:
+    """Stable key for one call: whitespace/case-insensitive queries, canonical URLs."""
+    return json.dumps({k: _normalize(k, v) for k, v in sorted(arguments.items())},
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+@dataclass
+class _Entry:
+    value: str
+    expires_at: float
+    validators: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.value.encode("utf-8"))
+
+
+class ToolResultCache:
+    """Byte-bounded LRU of tool results with optional SQLite persistence."""
+
+    def __init__(self, max_bytes: int = 8_000_000, persist: bool = False, stale_seconds: int = 86400):
+        self.max_bytes = max(0, int(max_bytes))
+        self.persist = persist
+        self.stale_seconds = max(0, int(stale_seconds))
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._writes = 0
+        self._stats: Dict[str, int] = {
+            "hits": 0, "shared": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0,
+        }
+
+    # -- memory tier --------------------------------------------------------
+
+    def _drop(self, k: Tuple[str, str]) -> None:
+        entry = self._entries.pop(k, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _remember(self, k: Tuple[str, str], entry: _Entry) -> None:
+        self._drop(k)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[k] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self._stats["evictions"] += 1
+
+    def _usable(self, entry: _Entry, now: float) -> bool:
+        """Fresh, or expired but still revalidatable."""
+        if entry.expires_at > now:
+            return True
+        return bool(entry.validators) and entry.expires_at + self.stale_seconds > now
+
+    async def _lookup(self, k: Tuple[str, str], now: float) -> Optional[_Entry]:
+        entry = self._entries.get(k)
+        if entry is not None:
+            if self._usable(entry, now):
+                self._entries.move_to_end(k)
+                return entry
+            self._drop(k)
+        if not self.persist:
+            return None
+        entry = await self._load(k)
+        if entry is not None and self._usable(entry, now):
+            self._remember(k, entry)
+            return entry
+        return None
+
+    # -- SQLite tier --------------------------------------------------------
+
+    async def _load(self, k: Tuple[str, str]) -> Optional[_Entry]:
+        from src.db.connection import get_db
+        try:
+            async with get_db() as db:
+                cur = await db.execute(
+                    "SELECT value, validators, expires_at FROM tool_cache WHERE tool = ? AND key = ?", k
+                )
+                row = await cur.fetchone()
+        except Exception as exc:
+            logger.warning("tool_cache_load_failed", tool=k[0], error=str(exc))
+            return None
+        if row is None:
+            return None
+        return _Entry(row[0], row[2], json.loads(row[1]) if row[1] else {})
+
+    async def _save(self, k: Tuple[str, str], entry: _Entry) -> None:
+        from src.db.connection import get_db
+        self._writes += 1
+        try:
+            async with get_db() as db:
+                await db.execute(
+                    "INSERT OR REPLACE INTO tool_cache (tool, key, value, validators, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*k, entry.value, json.dumps(entry.validators) if entry.validators else None,
+                     entry.expires_at),
+                )
+                if self._writes % 100 == 1:
+                    await db.execute("DELETE FROM tool_cache WHERE expires_at < ?",
+                                     (time.time() - self.stale_seconds,))
+                await db.commit()
+        except Exception as exc:
+            logger.warning("tool_cache_save_failed", tool=k[0], error=str(exc))
+
+    async def _store(self, k: Tuple[str, str], entry: _Entry) -> None:
+        self._stats["stores"] += 1
+        self._remember(k, entry)
+        if self.persist:
+            await self._save(k, entry)
+
+    # -- calls --------------------------------------------------------------
+
+    async def call(
+        self,
+        tool: str,
+        key: str,
+        ttl: float,
+        fetch: Callable[[], Awaitable[str]],
+        conditional: Optional[Conditional] = None,
+    ) -> str:
+        """Cached result of fetch(); conditional, if given, replaces fetch and enables revalidation."""
+        k = (tool, key)
+        entry = await self._lookup(k, time.time())
+        if entry is not None and entry.expires_at > time.time():
+            self._stats["hits"] += 1
+            return entry.value
+
+        task = self._inflight.get(k)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(k, ttl, entry, fetch, conditional))
+            self._inflight[k] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(k, None))
+        else:
+            self._stats["shared"] += 1
+        # A caller timing out must not cancel the request other callers share
+        return await asyncio.shield(task)
+
+    async def _refresh(self, k, ttl, entry, fetch, conditional) -> str:
+        if conditional is None:
+            result, validators = await fetch(), {}
+        else:
+            result, validators = await conditional(entry.validators if entry is not None else None)
+            if result is None and entry is not None:
+                self._stats["revalidated"] += 1
+                logger.debug("tool_cache_revalidated", tool=k[0])
+                await self._store(k, _Entry(entry.value, time.time() + ttl, validators or entry.validators))
+                return entry.value
+        self._stats["misses"] += 1
+        result = "" if result is None else result
+        if validators is not None and not str(result).startswith(_ERROR_PREFIXES):
+            await self._store(k, _Entry(str(result), time.time() + ttl, validators))
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+
+_cache: Optional[ToolResultCache] = None
+
+
+def get_cache() -> ToolResultCache:
+    global _cache
+    if _cache is None:
+        from src.config import Config
+        cfg = Config.get()
+        _cache = ToolResultCache(
+            max_bytes=getattr(cfg, "tool_cache_max_bytes", 8_000_000),
+            persist=getattr(cfg, "tool_cache_persist", False),
+            stale_seconds=getattr(cfg, "tool_cache_stale_seconds", 86400),
+        )
+    return _cache
+
+
+def reset_cache() -> None:
+    global _cache
+    _cache = None
+
+
+def cache_stats() -> Dict[str, int]:
+    """Process-wide counters (shown in /status); zeros before the first cached call."""
+    return _cache.stats() if _cache is not None else ToolResultCache().stats()
+
+
+def tool_ttl(tool: str, cfg: Any) -> int:
+    """TTL for a tool: tool_cache_ttl override, else the schema's cache_ttl."""
+    if not getattr(cfg, "tool_cache_enabled", True):
+        return 0
+    from src.tools.schemas import SCHEMA_MAP
+    schema = SCHEMA_MAP.get(tool)
+    default = schema.cache_ttl if schema is not None else 0
+    return int((getattr(cfg, "tool_cache_ttl", None) or {}).get(tool, default))
+
+
+def cached_tool(tool: str, fn: Callable[..., Awaitable[str]], ttl: int,
+                conditional: Optional[Callable[..., Awaitable[Tuple[Optional[str], Optional[Dict[str, str]]]]]] = None):
+    """Wrap a registry coroutine so identical calls within ttl reuse the result.
+
+    conditional has fn's signature plus a validators keyword and returns
+    (result, validators) — see Conditional.
+    """
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        try:
+            bound = sig.bind(*args, **kwargs)
+        except TypeError:
+            return await fn(*args, **kwargs)
+        bound.apply_defaults()
+        cond = None
+        if conditional is not None:
+            cond = lambda validators: conditional(*bound.args, validators=validators, **bound.kwargs)  # noqa: E731
+        return await get_cache().call(
+            tool, cache_key(bound.arguments), ttl,
+            lambda: fn(*bound.args, **bound.kwargs), cond,
+        )
+
+    return wrapper
@@ -27,6 +27,7 @@ from __future__ import annotations
 import asyncio
 import os
 import shutil
+import signal
 import subprocess
 import sys
 from pathlib import Path
@@ -109,6 +110,25 @@ async def _run_level0(code: str, timeout: int) -> Dict[str, Any]:
         return {"error": "Execution timed out", "stdout": "", "exit_code": 124, "isolation": "none"}
 
 
+# ---------------------------------------------------------------------------
+# Process groups — commands run through a shell spawn children (timeout,
+# python, pipelines); killing only the shell would leave them running
+# ---------------------------------------------------------------------------
+
+def kill_process_group(proc: asyncio.subprocess.Process) -> None:
+    """SIGKILL everything in the session started with start_new_session=True.
+
+    Synchronous on purpose: it is called from CancelledError handlers, where
+    another await could be interrupted before the kill happens.
+    """
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    except AttributeError:  # no process groups on this platform
+        proc.kill()
+
+
 # ---------------------------------------------------------------------------
 # Level 1 — Subprocess + ulimit (process isolation, Linux/macOS)
 # ---------------------------------------------------------------------------
@@ -133,16 +153,20 @@ async def _run_level1(code: str, timeout: int, workspace: str) -> Dict[str, Any]
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             cwd=workspace,
+            start_new_session=True,
         )
         try:
             stdout_b, stderr_b = await asyncio.wait_for(
                 proc.communicate(), timeout=float(timeout + 5)
             )
         except asyncio.TimeoutError:
-            proc.kill()
+            kill_process_group(proc)
             await proc.communicate()
             script.unlink(missing_ok=True)
             return {"error": "Execution timed out", "stdout": "", "exit_code": 124, "isolation": "process"}
+        except asyncio.CancelledError:
+            kill_process_group(proc)
+            raise
 
         stdout = stdout_b.decode("utf-8", errors="replace")[:MAX_OUTPUT]
         stderr = stderr_b.decode("utf-8", errors="replace")[:2000]
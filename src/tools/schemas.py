@@ -7,38 +7,83 @@ Each schema has:
   - name: matches the key in the tool registry
   - description: natural language explanation for the LLM
   - parameters: JSON Schema object (OpenAI function-calling format)
+  - parallel_safe: read-only tool that may run concurrently with other
+    parallel-safe calls of the same turn (default: exclusive)
+  - cache_ttl: seconds the registry may reuse a result for the same
+    arguments (src/tools/result_cache.py; default 0 = never cached)
 
 Providers convert these to their native format:
   - OpenAI-compatible (Groq, OpenRouter, Ollama): used as-is
   - Gemini: converted via to_gemini_declaration()
+
+Schemas are frozen. Per-request description changes (e.g. the skill list on
+use_skill) go through with_overlays(); providers serialize through
+serialize_tools(), which memoizes the result per (provider, tool set, strip_enum).
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+def _freeze(obj: Any) -> Any:
+    if isinstance(obj, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _thaw(obj: Any) -> Any:
+    if isinstance(obj, Mapping):
+        return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [_thaw(v) for v in obj]
+    return obj
 
 
-@dataclass
+@dataclass(frozen=True, eq=False)
 class ToolSchema:
+    """Immutable tool definition — shared process-wide through SCHEMA_MAP.
+
+    Never edit a schema in place; use with_description() / with_overlays()
+    to get a per-request copy.
+    """
     name: str
     description: str
-    parameters: Dict[str, Any] = field(default_factory=lambda: {"type": "object", "properties": {}})
-    required_params: List[str] = field(default_factory=list)
+    parameters: Mapping[str, Any] = field(default_factory=lambda: {"type": "object", "properties": {}})
+    required_params: Tuple[str, ...] = ()
+    parallel_safe: bool = False
+    cache_ttl: int = 0
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "parameters", _freeze(self.parameters))
+        object.__setattr__(self, "required_params", tuple(self.required_params))
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Identity for serialization caches: names are unique, descriptions vary by overlay."""
+        return (self.name, self.description)
+
+    def with_description(self, suffix: str) -> "ToolSchema":
+        """Copy of this schema with suffix appended to the description."""
+        return replace(self, description=self.description + suffix) if suffix else self
 
     @staticmethod
     def _strip_enum_for_groq(params: dict) -> dict:
         """Remove enum fields from parameters — Groq llama models reject them."""
-        import copy
-        params = copy.deepcopy(params)
         for prop in params.get("properties", {}).values():
             prop.pop("enum", None)
         return params
 
     def to_openai(self, strip_enum: bool = False) -> Dict[str, Any]:
         """OpenAI / Groq / OpenRouter / Ollama function calling format."""
-        params = dict(self.parameters)
+        params = _thaw(self.parameters)
         if self.required_params:
-            params["required"] = self.required_params
+            params["required"] = list(self.required_params)
         if strip_enum:
             params = self._strip_enum_for_groq(params)
         return {
@@ -68,13 +113,63 @@ class ToolSchema:
                 parameters=types.Schema(
                     type="OBJECT",
                     properties=props,
-                    required=self.required_params or [],
+                    required=list(self.required_params),
                 ),
             )
         except ImportError:
             return {"name": self.name, "description": self.description}
 
 
+def with_overlays(schemas: Iterable[ToolSchema], overlays: Mapping[str, str]) -> List[ToolSchema]:
+    """Per-request copies of schemas with overlays[name] appended to descriptions.
+
+    The shared objects in ALL_SCHEMAS / SCHEMA_MAP are left untouched.
+    """
+    return [s.with_description(overlays.get(s.name, "")) for s in schemas]
+
+
+# ---------------------------------------------------------------------------
+# Serialization cache
+# ---------------------------------------------------------------------------
+
+_SERIALIZED_MAX = 256
+_serialized: "OrderedDict[tuple, List[Any]]" = OrderedDict()
+_serialized_lock = threading.Lock()
+_serialized_stats = {"hits": 0, "misses": 0}
+
+
+def serialize_tools(
+    provider: str, schemas: Sequence[ToolSchema], strip_enum: bool = False
+) -> List[Any]:
+    """Provider-native tool list, memoized by (provider, tool set, strip_enum).
+
+    "gemini" yields FunctionDeclarations, every other provider the OpenAI
+    format. The returned list is shared between callers — do not mutate it.
+    """
+    cache_key = (provider, tuple(s.key for s in schemas), strip_enum)
+    with _serialized_lock:
+        hit = _serialized.get(cache_key)
+        if hit is not None:
+            _serialized.move_to_end(cache_key)
+            _serialized_stats["hits"] += 1
+            return hit
+    if provider == "gemini":
+        out = [s.to_gemini() for s in schemas]
+    else:
+        out = [s.to_openai(strip_enum=strip_enum) for s in schemas]
+    with _serialized_lock:
+        _serialized_stats["misses"] += 1
+        _serialized[cache_key] = out
+        while len(_serialized) > _SERIALIZED_MAX:
+            _serialized.popitem(last=False)
+    return out
+
+
+def serialization_cache_info() -> Dict[str, int]:
+    with _serialized_lock:
+        return {**_serialized_stats, "size": len(_serialized)}
+
+
 def _str_param(description: str, required: bool = True) -> Dict[str, Any]:
     return {"type": "string", "description": description}
 
@@ -128,6 +223,8 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=["query"],
+        parallel_safe=True,
+        cache_ttl=600,
     ),
 
     ToolSchema(
@@ -143,6 +240,8 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=["query"],
+        parallel_safe=True,
+        cache_ttl=86400,
     ),
 
     ToolSchema(
@@ -158,6 +257,8 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=["url"],
+        parallel_safe=True,
+        cache_ttl=300,
     ),
 
     ToolSchema(
@@ -236,6 +337,7 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=[],
+        parallel_safe=True,
     ),
 
     ToolSchema(
@@ -260,6 +362,7 @@ ALL_SCHEMAS: List[ToolSchema] = [
         description="Retrieve all stored memories and skills for the current user.",
         parameters={"type": "object", "properties": {}},
         required_params=[],
+        parallel_safe=True,
     ),
 
     ToolSchema(
@@ -309,6 +412,7 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=["skill_name"],
+        parallel_safe=True,
     ),
 
     ToolSchema(
@@ -325,6 +429,7 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=["file_path"],
+        parallel_safe=True,
     ),
 
     ToolSchema(
@@ -366,6 +471,7 @@ ALL_SCHEMAS: List[ToolSchema] = [
             },
         },
         required_params=["path"],
+        parallel_safe=True,
     ),
 
 ]
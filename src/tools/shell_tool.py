@@ -3,13 +3,13 @@ from __future__ import annotations
 
 import asyncio
 import os
-import subprocess
 import time
 from typing import Any, Dict, Optional
 
 from src.utils.logger import logger
 
 MAX_OUTPUT_CHARS = 4000
+COMMAND_TIMEOUT = 120
 _CONFIRM_PREFIX = "CONFIRM:"
 
 
@@ -97,16 +97,38 @@ async def run_shell_command(command: str, user_id: int = 0, workspace: Optional[
 
     logger.info("executing_shell_command", command=cmd[:200], workspace=ws)
 
+    # Own session/process group so a timeout or a cancelled run (stop button)
+    # kills the whole pipeline, not just the shell
+    from src.tools.sandbox import kill_process_group
     try:
-        loop = asyncio.get_running_loop()
-        proc = await loop.run_in_executor(None, lambda: subprocess.run(
-            cmd, shell=True, capture_output=True, text=True, timeout=120, cwd=ws
-        ))
-        stdout = proc.stdout
-        stderr = proc.stderr
+        proc = await asyncio.create_subprocess_shell(
+            cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=ws,
+            start_new_session=True,
+        )
+    except Exception as exc:
+        return {"error": str(exc), "cwd": ws}
+
+    try:
+        stdout_b, stderr_b = await asyncio.wait_for(proc.communicate(), timeout=COMMAND_TIMEOUT)
+    except asyncio.TimeoutError:
+        kill_process_group(proc)
+        await proc.wait()
+        return {"error": f"Command timed out after {COMMAND_TIMEOUT} seconds.", "cwd": ws}
+    except asyncio.CancelledError:
+        kill_process_group(proc)
+        logger.info("shell_command_cancelled", command=cmd[:200], pid=proc.pid)
+        raise
+
+    try:
+        stdout = stdout_b.decode("utf-8", errors="replace")
+        stderr = stderr_b.decode("utf-8", errors="replace")
+        full_len = len(stdout)
         truncated = False
-        if len(stdout) > MAX_OUTPUT_CHARS:
-            stdout = stdout[:MAX_OUTPUT_CHARS] + f"\n...[truncated, {len(proc.stdout)-MAX_OUTPUT_CHARS} chars omitted]"
+        if full_len > MAX_OUTPUT_CHARS:
+            stdout = stdout[:MAX_OUTPUT_CHARS] + f"\n...[truncated, {full_len-MAX_OUTPUT_CHARS} chars omitted]"
             truncated = True
         if len(stderr) > 1000:
             stderr = stderr[:1000] + "\n...[stderr truncated]"
@@ -115,8 +137,6 @@ async def run_shell_command(command: str, user_id: int = 0, workspace: Optional[
             out["truncated"] = True
         asyncio.create_task(_audit(user_id, cmd, ws, result=out))
         return out
-    except subprocess.TimeoutExpired:
-        return {"error": "Command timed out after 120 seconds.", "cwd": ws}
     except Exception as exc:
         return {"error": str(exc), "cwd": ws}
 
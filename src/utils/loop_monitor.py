@@ -0,0 +1,164 @@
+"""Event-loop lag monitor — notices code that blocks the loop.
+
+A heartbeat task sleeps loop_lag_interval_ms and measures how late it wakes
+up; every sample goes into the "loop_lag" span ring (perf_summary(), /perf,
+/status). Lateness is time some callback held the loop: a sync file read,
+a regex over a large page, a blocking SDK iterator.
+
+While the heartbeat is overdue by more than loop_lag_threshold_ms, a
+watchdog thread grabs the loop thread's current stack, i.e. the code that is
+blocking right now, and logs it once per stall as event_loop_blocked.
+
+loop_debug additionally turns on asyncio debug mode with
+slow_callback_duration = the threshold, so asyncio itself logs every slow
+callback ("Executing <Task ...> took 0.412 seconds"). Debug mode is costly;
+leave it off outside of investigations.
+
+install_event_loop() selects the loop implementation before the loop exists
+("event_loop": "uvloop", needs the uvloop extra).
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from src.utils.logger import logger
+from src.utils.tracing import record
+
+STACK_LIMIT = 12  # innermost frames logged per stall
+
+
+def install_event_loop(name: str = "asyncio") -> str:
+    """Set the event loop policy; returns the implementation actually used."""
+    if (name or "asyncio") == "asyncio":
+        return "asyncio"
+    if name != "uvloop":
+        logger.warning("event_loop_unknown", requested=name)
+        return "asyncio"
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("event_loop_uvloop_missing", hint="pip install 'rk-agent[uvloop]'")
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("event_loop_installed", loop="uvloop", version=getattr(uvloop, "__version__", ""))
+    return "uvloop"
+
+
+class LoopMonitor:
+    """Heartbeat task + watchdog thread for the running loop."""
+
+    def __init__(self, interval_ms: float = 100, threshold_ms: float = 250, debug: bool = False):
+        self.interval = max(interval_ms, 1) / 1000
+        self.threshold = max(threshold_ms, 1) / 1000
+        self.debug = debug
+        self.stalls = 0
+        self.max_lag_ms = 0.0
+        self.loop_name = ""
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._beat = 0.0
+        self._reported_beat = -1.0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside it)."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.loop_name = type(self._loop).__module__.split(".")[0]
+        if self.debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop_monitor")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("loop_monitor_started", loop=self.loop_name, interval_ms=self.interval * 1000,
+                    threshold_ms=self.threshold * 1000, debug=self.debug)
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"loop": self.loop_name, "stalls": self.stalls, "max_lag_ms": self.max_lag_ms,
+                "threshold_ms": self.threshold * 1000, "debug": self.debug}
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag_ms = max(0.0, (self._beat - start - self.interval) * 1000)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            record("loop_lag", lag_ms, lag_ms < self.threshold * 1000)
+            if lag_ms >= self.threshold * 1000:
+                self.stalls += 1
+                logger.warning("event_loop_lag", lag_ms=round(lag_ms, 1),
+                               threshold_ms=self.threshold * 1000)
+
+    def _watch(self) -> None:
+        """Watchdog thread: while the heartbeat is overdue, log what the loop runs."""
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold or beat == self._reported_beat:
+                continue
+            self._reported_beat = beat  # one report per stall
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+            logger.warning(
+                "event_loop_blocked",
+                blocked_ms=round(overdue * 1000, 1),
+                task=task.get_name() if task is not None else None,
+                coro=getattr(task.get_coro(), "__qualname__", None) if task is not None else None,
+                stack="".join(traceback.format_stack(frame, limit=STACK_LIMIT)),
+            )
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    return _monitor
+
+
+def start_loop_monitor(config: Any) -> Optional[LoopMonitor]:
+    """Start the process-wide monitor from config (no-op when disabled)."""
+    global _monitor
+    if _monitor is not None or not getattr(config, "loop_monitor_enabled", True):
+        return _monitor
+    _monitor = LoopMonitor(
+        interval_ms=getattr(config, "loop_lag_interval_ms", 100),
+        threshold_ms=getattr(config, "loop_lag_threshold_ms", 250),
+        debug=getattr(config, "loop_debug", False),
+    )
+    _monitor.start()
+    return _monitor
+
+
+async def stop_loop_monitor() -> None:
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
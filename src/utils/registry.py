@@ -0,0 +1,135 @@
+"""Bounded registries — per-user / per-session state that evicts itself.
+
+Module-level maps keyed by user or session id (semaphores, key locks, cancel
+flags, event buses, ...) grow by one entry per id. Registry is a
+MutableMapping with LRU order and an idle TTL:
+
+  - beyond max_size entries, the least recently used ones are evicted
+  - entries idle for longer than ttl seconds are evicted
+  - in_use(value) vetoes eviction of live entries (a held lock, a semaphore
+    with a run inside, a queue somebody awaits); those may push the size
+    past max_size for a while
+
+Reads through [] / get() / setdefault() count as use; eviction runs when a
+new key is inserted, so an idle registry costs nothing. Limits default to
+registry_max_entries / registry_idle_ttl_seconds from config.
+
+Every registry is listed by name in registry_sizes() (shown by /perf).
+
+    _LOCKS = Registry("provider_locks", in_use=lambda lock: lock.locked())
+    lock = _LOCKS.get_or_create(key, asyncio.Lock)
+"""
+from __future__ import annotations
+
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, MutableMapping, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_DEFAULT_MAX = 10_000
+_DEFAULT_TTL = 3600.0
+
+_registries: "weakref.WeakSet[Registry]" = weakref.WeakSet()
+
+
+def _config_limits() -> Tuple[int, float]:
+    try:
+        from src.config import Config
+        cfg = Config.get()
+        return (int(getattr(cfg, "registry_max_entries", _DEFAULT_MAX)),
+                float(getattr(cfg, "registry_idle_ttl_seconds", _DEFAULT_TTL)))
+    except Exception:
+        return _DEFAULT_MAX, _DEFAULT_TTL
+
+
+class Registry(MutableMapping[K, V]):
+    """LRU + idle-TTL map; see the module docstring."""
+
+    def __init__(self, name: str, max_size: Optional[int] = None, ttl: Optional[float] = None,
+                 in_use: Optional[Callable[[V], bool]] = None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.in_use = in_use
+        self.evictions = 0
+        self._data: "OrderedDict[K, Tuple[V, float]]" = OrderedDict()
+        _registries.add(self)
+
+    # Identity semantics, so registries can live in the WeakSet index
+    __hash__ = object.__hash__
+
+    def __eq__(self, other: object) -> bool:
+        return self is other
+
+    def __getitem__(self, key: K) -> V:
+        value, _ = self._data[key]
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        is_new = key not in self._data
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        if is_new:
+            self._evict(keep=key)
+
+    def __delitem__(self, key: K) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data  # a membership test is not a use
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        if key in self._data:
+            return self[key]
+        value = factory()
+        self[key] = value
+        return value
+
+    def _limits(self) -> Tuple[int, float]:
+        if self.max_size is not None and self.ttl is not None:
+            return self.max_size, self.ttl
+        default_max, default_ttl = _config_limits()
+        return (self.max_size if self.max_size is not None else default_max,
+                self.ttl if self.ttl is not None else default_ttl)
+
+    def _evict(self, keep: object = None) -> None:
+        """Trim the LRU end; keep (the key just inserted) always survives."""
+        max_size, ttl = self._limits()
+        now = time.monotonic()
+        kept = 0  # live entries rotated to the back; stop after one full pass
+        while self._data and kept < len(self._data):
+            key, (value, touched) = next(iter(self._data.items()))
+            if len(self._data) <= max_size and not (ttl and now - touched > ttl):
+                return
+            if key == keep or (self.in_use is not None and self.in_use(value)):
+                self._data.move_to_end(key)
+                kept += 1
+                continue
+            del self._data[key]
+            self.evictions += 1
+
+
+def registry_sizes() -> Dict[str, int]:
+    """Entries per registry name (registries sharing a name are summed)."""
+    sizes: Dict[str, int] = {}
+    for reg in list(_registries):
+        sizes[reg.name] = sizes.get(reg.name, 0) + len(reg)
+    return dict(sorted(sizes.items()))
+
+
+def registry_evictions() -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for reg in list(_registries):
+        counts[reg.name] = counts.get(reg.name, 0) + reg.evictions
+    return dict(sorted(counts.items()))
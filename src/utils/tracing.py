@@ -0,0 +1,166 @@
+"""Lightweight spans — where a request's time went, without grepping logs.
+
+Ids (user, session, turn) live in a ContextVar, so they follow the request
+into every task it spawns. span() times a block; on exit the duration is
+
+  - added to an in-memory ring per span type (perf_summary(), /perf)
+  - emitted as an EventType.SPAN SessionEvent on the session's event bus,
+    if that session has a bus (nobody listening = nothing queued)
+
+Span types used across the code: key_select, provider, tool, db,
+vector_search, telegram, queue_wait (admission control), webhook_ack,
+loop_lag (src/utils/loop_monitor.py).
+
+    with trace_scope(user_id=uid, session_id=chat_id):
+        async with span("provider", provider="groq"):
+            ...
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Tuple
+
+_ids: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("trace_ids", default={})
+
+# span type -> (monotonic end time, duration ms)
+_samples: Dict[str, Deque[Tuple[float, float]]] = {}
+_samples_lock = threading.Lock()
+
+
+def _settings() -> Tuple[bool, int]:
+    try:
+        from src.config import Config
+        cfg = Config.get()
+        return bool(getattr(cfg, "tracing_enabled", True)), int(getattr(cfg, "perf_max_samples", 5000))
+    except Exception:
+        return True, 5000
+
+
+def current_ids() -> Dict[str, Any]:
+    return _ids.get()
+
+
+def bind_trace(**ids: Any) -> contextvars.Token:
+    """Add ids (user_id, session_id, turn) to the current context."""
+    return _ids.set({**_ids.get(), **{k: v for k, v in ids.items() if v is not None}})
+
+
+@contextmanager
+def trace_scope(**ids: Any) -> Iterator[None]:
+    """bind_trace() for a block; the previous ids are restored on exit."""
+    token = bind_trace(**ids)
+    try:
+        yield
+    finally:
+        _ids.reset(token)
+
+
+def record(kind: str, ms: float, ok: bool = True, **tags: Any) -> None:
+    """Store one finished span and publish it on the session's bus."""
+    enabled, max_samples = _settings()
+    if not enabled:
+        return
+    now = time.monotonic()
+    with _samples_lock:
+        ring = _samples.get(kind)
+        if ring is None or ring.maxlen != max_samples:
+            ring = _samples[kind] = deque(ring or (), maxlen=max_samples)
+        ring.append((now, ms))
+
+    ids = _ids.get()
+    session_id = ids.get("session_id")
+    if session_id is None:
+        return
+    from src.core.event_bus import emit_nowait
+    from src.core.models import EventType, SessionEvent
+    emit_nowait(
+        session_id,
+        SessionEvent(
+            EventType.SPAN,
+            payload={"span": kind, "ms": round(ms, 2), "ok": ok,
+                     "user_id": ids.get("user_id"), **tags},
+            turn=ids.get("turn", 0),
+        ),
+        create=False,
+    )
+
+
+class span:
+    """Times a block (sync or async with); failures are recorded with ok=False."""
+
+    __slots__ = ("kind", "tags", "_start")
+
+    def __init__(self, kind: str, **tags: Any):
+        self.kind = kind
+        self.tags = tags
+        self._start = 0.0
+
+    def __enter__(self) -> "span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        record(self.kind, (time.perf_counter() - self._start) * 1000, ok=exc_type is None, **self.tags)
+
+    async def __aenter__(self) -> "span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+def traced(kind: str, **tag_args: str):
+    """Decorator form of span() for coroutine functions.
+
+    tag_args maps a tag name to the parameter supplying it, e.g.
+    @traced("tool", tool="tool_name").
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            tags = {}
+            if tag_args:
+                bound = sig.bind_partial(*args, **kwargs).arguments
+                tags = {tag: bound.get(param) for tag, param in tag_args.items()}
+            async with span(kind, **tags):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def _pct(values, q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def perf_summary(window_seconds: float = 900) -> Dict[str, Dict[str, float]]:
+    """Per span type over the last window_seconds: count, p50, p95, p99, max (ms)."""
+    cutoff = time.monotonic() - window_seconds
+    with _samples_lock:
+        snapshot = {kind: [ms for ts, ms in ring if ts >= cutoff] for kind, ring in _samples.items()}
+    out: Dict[str, Dict[str, float]] = {}
+    for kind, values in snapshot.items():
+        if not values:
+            continue
+        values.sort()
+        out[kind] = {
+            "count": len(values),
+            "p50": _pct(values, 0.50),
+            "p95": _pct(values, 0.95),
+            "p99": _pct(values, 0.99),
+            "max": values[-1],
+        }
+    return out
+
+
+def reset_spans() -> None:
+    with _samples_lock:
+        _samples.clear()
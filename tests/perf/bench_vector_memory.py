@@ -0,0 +1,221 @@
+"""Recall@k vs RSS benchmark for the vector memory backends.
+
+Builds a synthetic clustered corpus (embedding-like: normalized, many
+near neighbours), then measures each index configuration in a fresh
+subprocess so resident memory is not polluted by the previous run:
+
+    python tests/perf/bench_vector_memory.py
+    python tests/perf/bench_vector_memory.py --n 100000 --dim 384 --k 10
+    python tests/perf/bench_vector_memory.py --qdrant-url http://localhost:6333
+
+Columns:
+    recall@k   overlap with exact float32 brute-force top-k
+    p50/p99    per-query search latency (ms)
+    rss_mb     resident set size after build + searches, minus the
+               interpreter/import baseline
+    disk_mb    bytes on disk for the index directory
+
+Qdrant embedded mode (path=..., what the bot uses without vector_qdrant_url)
+stores quantization/HNSW settings but always searches brute force in
+Python, so only --qdrant-url numbers reflect those settings.
+
+Not collected by pytest (file name does not start with test_).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+NUMPY_CONFIGS = {
+    "numpy-f32-flat": dict(quantize=False, ivf=False, nprobe=8),
+    "numpy-int8-flat": dict(quantize=True, ivf=False, nprobe=8),
+    "numpy-f32-ivf4": dict(quantize=False, ivf=True, nprobe=4),
+    "numpy-f32-ivf16": dict(quantize=False, ivf=True, nprobe=16),
+    "numpy-int8-ivf16": dict(quantize=True, ivf=True, nprobe=16),
+}
+QDRANT_CONFIGS = {
+    "qdrant-ram": dict(on_disk=False, int8=False, m=16, ef=64),
+    "qdrant-disk": dict(on_disk=True, int8=False, m=16, ef=64),
+    "qdrant-int8-disk": dict(on_disk=True, int8=True, m=16, ef=64),
+    "qdrant-int8-disk-m8": dict(on_disk=True, int8=True, m=8, ef=32),
+}
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _dir_mb(path: str) -> float:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file()) / 2**20
+
+
+def make_corpus(n: int, dim: int, queries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 200), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), n)
+    corpus = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    picks = rng.integers(0, n, queries)
+    q = corpus[picks] + 0.3 * rng.standard_normal((queries, dim)).astype(np.float32) / np.sqrt(dim)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    return corpus.astype(np.float32), q.astype(np.float32)
+
+
+def ground_truth(corpus, queries, k):
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+class _StubEmbedder:
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.name = f"bench:{dim}"
+
+
+def run_numpy(name, corpus, queries, k, workdir):
+    from src.db.numpy_index import _UserIndex
+
+    cfg = NUMPY_CONFIGS[name]
+    n = len(corpus)
+    opts = dict(
+        segment_rows=max(256, n // 16),
+        max_segments=10**6,  # compact once, explicitly, after the load
+        ivf_min_rows=n if cfg["ivf"] else n + 1,
+        nprobe=cfg["nprobe"],
+        quantize=cfg["quantize"],
+    )
+    emb = _StubEmbedder(corpus.shape[1])
+    idx = _UserIndex(Path(workdir) / "u1", emb, **opts)
+    for start in range(0, n, 4096):
+        block = corpus[start:start + 4096]
+        idx.add(block, [{"id": i} for i in range(start, start + len(block))])
+    idx.compact(full=True)
+    del idx
+    idx = _UserIndex(Path(workdir) / "u1", emb, **opts)  # cold reopen: memmap only
+    results, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = idx.search(q, k)
+        lat.append(time.perf_counter() - t0)
+        results.append([p["id"] for _, p in hits])
+    return results, lat
+
+
+def run_qdrant(name, corpus, queries, k, workdir, url):
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models as qm
+
+    cfg = QDRANT_CONFIGS[name]
+    client = QdrantClient(url=url) if url else QdrantClient(path=workdir)
+    coll = f"bench_{name.replace('-', '_')}"
+    if client.collection_exists(coll):
+        client.delete_collection(coll)
+    client.create_collection(
+        collection_name=coll,
+        vectors_config=qm.VectorParams(size=corpus.shape[1], distance=qm.Distance.COSINE,
+                                       on_disk=cfg["on_disk"]),
+        hnsw_config=qm.HnswConfigDiff(m=cfg["m"], ef_construct=100, on_disk=cfg["on_disk"]),
+        quantization_config=qm.ScalarQuantization(
+            scalar=qm.ScalarQuantizationConfig(type=qm.ScalarType.INT8, quantile=0.99, always_ram=True)
+        ) if cfg["int8"] else None,
+        on_disk_payload=cfg["on_disk"],
+    )
+    for start in range(0, len(corpus), 1024):
+        block = corpus[start:start + 1024]
+        client.upsert(coll, points=qm.Batch(
+            ids=list(range(start, start + len(block))), vectors=block.tolist()))
+    params = qm.SearchParams(
+        hnsw_ef=cfg["ef"],
+        quantization=qm.QuantizationSearchParams(rescore=True, oversampling=2.0) if cfg["int8"] else None,
+    )
+    results, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = client.query_points(coll, query=q.tolist(), limit=k, search_params=params)
+        lat.append(time.perf_counter() - t0)
+        results.append([int(p.id) for p in res.points])
+    if url:
+        client.delete_collection(coll)
+    return results, lat
+
+
+def child(args) -> None:
+    corpus, queries = make_corpus(args.n, args.dim, args.queries)
+    truth = ground_truth(corpus, queries, args.k)
+    base = _rss_mb()
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.run in NUMPY_CONFIGS:
+            # the corpus itself lives in this process; drop it from the count
+            results, lat = run_numpy(args.run, corpus, queries, args.k, workdir)
+        else:
+            results, lat = run_qdrant(args.run, corpus, queries, args.k, workdir, args.qdrant_url)
+        rss = _rss_mb() - base
+        disk = _dir_mb(workdir)
+    recall = np.mean([len(set(r) & set(t.tolist())) / args.k for r, t in zip(results, truth)])
+    lat_ms = np.array(lat) * 1000
+    print(json.dumps({
+        "config": args.run,
+        "recall": float(recall),
+        "p50": float(np.percentile(lat_ms, 50)),
+        "p99": float(np.percentile(lat_ms, 99)),
+        "rss_mb": rss,
+        "disk_mb": disk,
+    }))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--n", type=int, default=50_000, help="corpus size")
+    ap.add_argument("--dim", type=int, default=384, help="vector width (bge-small = 384)")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--qdrant-url", default="", help="benchmark a Qdrant server instead of embedded mode")
+    ap.add_argument("--skip-qdrant", action="store_true")
+    ap.add_argument("--run", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.run:
+        child(args)
+        return
+
+    configs = list(NUMPY_CONFIGS)
+    if not args.skip_qdrant:
+        try:
+            import qdrant_client  # noqa: F401
+            configs += list(QDRANT_CONFIGS)
+        except ImportError:
+            print("qdrant-client not installed — NumPy configs only", file=sys.stderr)
+
+    print(f"corpus n={args.n} dim={args.dim} k={args.k} queries={args.queries}"
+          f" qdrant={'server ' + args.qdrant_url if args.qdrant_url else 'embedded'}")
+    print(f"{'config':<22}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>10}{'disk MB':>10}")
+    passthrough = ["--n", str(args.n), "--dim", str(args.dim), "--k", str(args.k),
+                   "--queries", str(args.queries), "--qdrant-url", args.qdrant_url]
+    for name in configs:
+        proc = subprocess.run([sys.executable, __file__, "--run", name, *passthrough],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:<22} failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{name:<22}{r['recall']:>10.3f}{r['p50']:>10.2f}{r['p99']:>10.2f}"
+              f"{r['rss_mb']:>10.1f}{r['disk_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Background watcher scheduling cost: one task per watcher vs the timer heap.
+
+"tasks" is the old BackgroundAgentManager loop, one asyncio task per watcher
+running `while True: await check(); await asyncio.sleep(interval)`.
+"heap" is src/agents/background/timer.WatcherScheduler: one dispatcher task
+plus a bounded worker pool. Every check does --work-us of CPU, then yields.
+Each (mode, watchers) pair runs in a fresh interpreter so RSS is comparable.
+
+    python tests/perf/bench_watchers.py
+    python tests/perf/bench_watchers.py --watchers 10 1000 10000 --interval 1 --duration 10
+
+Columns:
+    checks/s   completed checks per second (ideal: watchers / interval)
+    cpu%       process CPU time / wall time over the measured window
+    rss MB     resident set growth after creating the watchers and running
+    drift ms   p99 of how far each watcher's last check lags its grid time
+               (start + k * interval); the task loop adds check time and
+               wake-up delay on every tick, the heap does not accumulate it
+
+Not collected by pytest (file name does not start with test_).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.agents.background.timer import WatcherScheduler  # noqa: E402
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _pct(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(mode: str, n: int, args) -> dict:
+    rss0 = _rss_mb()
+    first: dict = {}
+    last: dict = {}
+    checks = 0
+    spin = args.work_us / 1e6
+
+    def make_check(key: str):
+        async def check():
+            nonlocal checks
+            now = time.monotonic()
+            first.setdefault(key, now)
+            last[key] = now
+            end = time.perf_counter() + spin
+            while time.perf_counter() < end:
+                pass
+            checks += 1
+            await asyncio.sleep(0)
+        return check
+
+    async def task_loop(check):
+        while True:
+            await check()
+            await asyncio.sleep(args.interval)
+
+    tasks, sched = [], None
+    if mode == "tasks":
+        tasks = [asyncio.create_task(task_loop(make_check(f"w{i}"))) for i in range(n)]
+    else:
+        sched = WatcherScheduler(workers=args.workers, jitter=args.jitter)
+        sched.start()
+        for i in range(n):
+            sched.add(f"w{i}", args.interval, make_check(f"w{i}"), first_delay=0)
+
+    await asyncio.sleep(args.interval * 1.5)  # warm-up, then measure between tick boundaries
+    checks_0, cpu_0, wall_0 = checks, time.process_time(), time.monotonic()
+    await asyncio.sleep(args.duration)
+    cpu, wall = time.process_time() - cpu_0, time.monotonic() - wall_0
+    done = checks - checks_0
+    rss = _rss_mb() - rss0
+
+    drift = []
+    for key, t_last in last.items():
+        ticks = round((t_last - first[key]) / args.interval)
+        drift.append(max(0.0, (t_last - first[key] - ticks * args.interval) * 1000))
+    overruns = sched.stats()["overruns"] if sched else 0
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if sched:
+        await sched.stop()
+    return {"mode": mode, "watchers": n, "checks_s": done / wall, "cpu_pct": 100 * cpu / wall,
+            "rss_mb": rss, "drift_p99": _pct(drift, 0.99), "overruns": overruns}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--watchers", type=int, nargs="+", default=[10, 1000, 10000])
+    ap.add_argument("--modes", nargs="+", default=["tasks", "heap"])
+    ap.add_argument("--interval", type=float, default=1.0, help="seconds between checks")
+    ap.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    ap.add_argument("--work-us", type=float, default=20, help="CPU microseconds per check")
+    ap.add_argument("--workers", type=int, default=32)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--one", nargs=2, metavar=("MODE", "N"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.one:
+        print(json.dumps(asyncio.run(run(args.one[0], int(args.one[1]), args))))
+        return
+
+    print(f"cpus={os.cpu_count()} interval={args.interval}s duration={args.duration}s "
+          f"work={args.work_us}us workers={args.workers} jitter={args.jitter}")
+    print(f"{'mode':>6} {'watchers':>9} {'checks/s':>9} {'cpu%':>6} {'rss MB':>7} {'drift ms':>9} {'overruns':>9}")
+    passthrough = [f"--interval={args.interval}", f"--duration={args.duration}",
+                   f"--work-us={args.work_us}", f"--workers={args.workers}", f"--jitter={args.jitter}"]
+    for n in args.watchers:
+        for mode in args.modes:
+            out = subprocess.run([sys.executable, __file__, *passthrough, "--one", mode, str(n)],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:>6} {n:>9} {r['checks_s']:>9.0f} {r['cpu_pct']:>6.1f} {r['rss_mb']:>7.1f} "
+                  f"{r['drift_p99']:>9.1f} {r['overruns']:>9}")
+
+
+if __name__ == "__main__":
+    main()
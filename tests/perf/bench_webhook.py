@@ -0,0 +1,87 @@
+"""Webhook ingestion throughput and ack latency.
+
+Posts synthetic Telegram updates to a local WebhookServer over a few
+keep-alive connections (Telegram uses up to 40) and reports how fast they
+are acknowledged. Nothing consumes the update queue, so this measures the
+ingest path only: parse, secret check, Update.de_json, enqueue, 200.
+
+    python tests/perf/bench_webhook.py
+    python tests/perf/bench_webhook.py --updates 5000 --connections 40
+
+Columns:
+    updates/s   acknowledged updates per second of wall time
+    rt p50/p99  client round trip per update (ms)
+    srv p99     server-side handling per update, the "webhook_ack" span (ms)
+
+Not collected by pytest (file name does not start with test_).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+
+from src.bot.webhook import WebhookServer  # noqa: E402
+from src.utils import tracing  # noqa: E402
+
+SECRET = "bench-secret"
+
+
+def _update(i: int) -> dict:
+    return {"update_id": i, "message": {
+        "message_id": i, "date": 0, "text": f"hi {i}",
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 7, "is_bot": False, "first_name": "Alex"},
+    }}
+
+
+async def run(n: int, connections: int) -> dict:
+    tracing.reset_spans()
+    server = WebhookServer(asyncio.Queue(), secret=SECRET, path="/telegram", max_queue=n)
+    port = await server.start("127.0.0.1", 0)
+    bodies = [json.dumps(_update(i)).encode() for i in range(n)]
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"}
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    acks = []
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            async def sender(chunk):
+                for body in chunk:
+                    t0 = time.perf_counter()
+                    r = await client.post("/telegram", content=body, headers=headers)
+                    acks.append((time.perf_counter() - t0) * 1000)
+                    r.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(sender(bodies[i::connections]) for i in range(connections)))
+            elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+    acks.sort()
+    return {"updates_s": n / elapsed, "p50": acks[n // 2], "p99": acks[int(n * 0.99)],
+            "server_p99": tracing.perf_summary(600)["webhook_ack"]["p99"]}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--updates", type=int, default=2000)
+    ap.add_argument("--connections", type=int, nargs="+", default=[1, 8, 40])
+    args = ap.parse_args()
+
+    print(f"updates={args.updates}")
+    print(f"{'conns':>6} {'updates/s':>10} {'rt p50':>8} {'rt p99':>8} {'srv p99':>8}")
+    for conns in args.connections:
+        r = asyncio.run(run(args.updates, conns))
+        print(f"{conns:>6} {r['updates_s']:>10.0f} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['server_p99']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
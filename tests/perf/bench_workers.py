@@ -0,0 +1,112 @@
+"""Orchestration throughput vs worker process count.
+
+Each job mimics one orchestration turn sequence: simulated provider latency
+(asyncio.sleep) between turns, and per turn the CPU work the bot does on
+tool output — HTML stripping with curl_tool's regexes and a JSON round trip
+of a large result. workers=0 runs every job on one event loop (the default
+mode); workers=N uses src/core/workers.WorkerPool.
+
+    python tests/perf/bench_workers.py
+    python tests/perf/bench_workers.py --jobs 64 --workers 0 1 2 4 8 --page-kb 400
+
+Columns:
+    jobs/s     completed jobs per second of wall time
+    speedup    relative to workers=0
+    p50/p99    per-job latency (ms), submit to final answer
+
+Not collected by pytest (file name does not start with test_).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.core.models import EventType, SessionEvent  # noqa: E402
+from src.core.workers import WorkerPool  # noqa: E402
+
+_BLOCKS = re.compile(r'<(script|style|header|footer|nav|noscript).*?>.*?</\1>', re.DOTALL | re.IGNORECASE)
+_TAGS = re.compile(r'<.*?>')
+_SPACE = re.compile(r'\s+')
+
+
+def _page(kb: int) -> str:
+    row = ('<div class="r"><a href="/x">link</a><p>Some paragraph text with <b>bold</b> words.</p>'
+           '<script>var x = 1;</script></div>\n')
+    return "<html><body>" + row * (kb * 1024 // len(row)) + "</body></html>"
+
+
+async def bench_job(job, emit) -> str:
+    page = _page(job["page_kb"])
+    for turn in range(job["turns"]):
+        emit(SessionEvent(EventType.THINKING, turn=turn))
+        await asyncio.sleep(job["latency"])  # provider call
+        text = _SPACE.sub(" ", _TAGS.sub(" ", _BLOCKS.sub("", page))).strip()
+        blob = json.dumps({"tool": "curl", "result": text, "rows": text.split(" ")})
+        text = json.loads(blob)["result"]
+        emit(SessionEvent(EventType.TOOL_RESULT, payload={"tool": "curl", "result": text[:300]}, turn=turn))
+    return text[:80]
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(workers: int, args) -> dict:
+    job = {"turns": args.turns, "latency": args.latency, "page_kb": args.page_kb}
+    pool = None
+    if workers:
+        pool = WorkerPool(workers, runner=bench_job, jobs_per_worker=args.jobs_per_worker)
+        pool.start()
+        await pool.run(dict(job, turns=1))  # wait until workers have imported
+
+    latencies = []
+
+    async def one():
+        t0 = time.perf_counter()
+        if pool:
+            await pool.run(job, lambda ev: None)
+        else:
+            await bench_job(job, lambda ev: None)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.jobs)))
+    wall = time.perf_counter() - start
+    if pool:
+        await pool.close()
+    return {"workers": workers, "jobs_s": args.jobs / wall,
+            "p50": _pct(latencies, 0.5), "p99": _pct(latencies, 0.99)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--jobs", type=int, default=32)
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    ap.add_argument("--jobs-per-worker", type=int, default=4)
+    ap.add_argument("--turns", type=int, default=3)
+    ap.add_argument("--latency", type=float, default=0.05, help="simulated provider seconds per turn")
+    ap.add_argument("--page-kb", type=int, default=200)
+    args = ap.parse_args()
+
+    print(f"cpus={os.cpu_count()} jobs={args.jobs} turns={args.turns} "
+          f"latency={args.latency}s page={args.page_kb}KB")
+    print(f"{'workers':>8} {'jobs/s':>8} {'speedup':>8} {'p50':>9} {'p99':>9}")
+    base = None
+    for n in args.workers:
+        r = asyncio.run(run(n, args))
+        base = base or r["jobs_s"]
+        print(f"{n:>8} {r['jobs_s']:>8.2f} {r['jobs_s'] / base:>7.2f}x {r['p50']:>9.0f} {r['p99']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
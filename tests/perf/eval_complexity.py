@@ -0,0 +1,103 @@
+"""Offline evaluation of the complexity router (regex tiers + local model).
+
+Trains the hashed n-gram model on a split of labeled messages and reports,
+on the held-out part:
+
+    python tests/perf/eval_complexity.py                      # bundled sample
+    python tests/perf/eval_complexity.py --data labeled.jsonl # {"text", "complex"} lines
+    python tests/perf/eval_complexity.py --db                 # complexity_log outcomes
+
+Columns:
+    model_acc     accuracy of the model alone (p >= 0.5)
+    routed_acc    accuracy of the messages the local tiers decided
+    llm_fallback  share of messages still sent to the LLM tier
+    p50/p99       classify_tiers() latency per message (microseconds)
+
+Not collected by pytest (file name does not start with test_).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.config import Config  # noqa: E402
+from src.core.complexity import classify_tiers  # noqa: E402
+from src.core.complexity_model import ComplexityModel, accuracy  # noqa: E402
+
+SAMPLE = Path(__file__).with_name("complexity_sample.jsonl")
+
+
+def _load_jsonl(path: Path):
+    with open(path) as fh:
+        return [(row["text"], bool(row["complex"])) for row in map(json.loads, fh) if row.get("text")]
+
+
+def _load_db():
+    from src.db.complexity_log import labeled_examples
+    from src.db.key_store import init_db
+
+    async def _run():
+        await init_db()
+        return await labeled_examples()
+
+    return asyncio.run(_run())
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", type=Path, default=SAMPLE)
+    parser.add_argument("--db", action="store_true", help="use labeled rows from complexity_log")
+    parser.add_argument("--test", type=float, default=0.3, help="held-out fraction")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--repeat", type=int, default=200, help="latency passes over the test set")
+    args = parser.parse_args()
+
+    examples = _load_db() if args.db else _load_jsonl(args.data)
+    random.Random(0).shuffle(examples)
+    cut = max(1, int(len(examples) * (1 - args.test)))
+    train, test = examples[:cut], examples[cut:]
+    model = ComplexityModel.train(train)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/model.json"
+        model.save(path)
+        cfg = Config(complexity_model_path=path, complexity_model_threshold=args.threshold)
+
+        decided = hits = 0
+        for text, label in test:
+            decision, _, _ = classify_tiers(text, cfg)
+            if decision is not None:
+                decided += 1
+                hits += decision == label
+
+        timings = []
+        for _ in range(args.repeat):
+            for text, _ in test:
+                start = time.perf_counter()
+                classify_tiers(text, cfg)
+                timings.append((time.perf_counter() - start) * 1e6)
+
+    print(f"train={len(train)} test={len(test)} threshold={args.threshold}")
+    print(f"{'model_acc':>10} {'routed_acc':>11} {'llm_fallback':>13} {'p50_us':>8} {'p99_us':>8}")
+    print(
+        f"{accuracy(model, test):>10.3f} {hits / max(decided, 1):>11.3f} "
+        f"{1 - decided / max(len(test), 1):>13.1%} {_pct(timings, 0.50):>8.1f} {_pct(timings, 0.99):>8.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
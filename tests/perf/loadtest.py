@@ -0,0 +1,390 @@
+"""Offline end-to-end load test — simulated Telegram users, fake providers.
+
+Drives app._process_message and the command handlers with synthetic
+telegram.Update objects, exactly as PTB would. Nothing leaves the process:
+
+  - FakeProvider replaces every provider adapter (ProviderPool._make_adapter)
+    with configurable latency, output tokens and 429 / timeout error rates;
+    errors go through the pool's real retry and backoff paths
+  - StubBot records every send / edit instead of calling the Bot API
+  - a throwaway workdir holds config.json and the SQLite database
+    (numpy vector backend, hashing embedder)
+
+Each simulated user sends its messages one at a time; a message counts as
+done when its handler returned and the orchestration it spawned finished.
+
+    python tests/perf/loadtest.py
+    python tests/perf/loadtest.py --users 50 --messages 20 --latency 0.2 --rate-429 0.02
+    python tests/perf/loadtest.py --save baseline.json
+    python tests/perf/loadtest.py --compare baseline.json
+
+Reports:
+    msgs/s        completed messages per second of wall time
+    p50/p99       per-message latency (ms), update in to last reply
+    commits/msg   SQLite commits per message (aiosqlite Connection.commit)
+    db conns/msg  SQLite connections opened per message ("db" spans)
+    bot calls     sends + edits the stub bot received
+
+Not collected by pytest (file name does not start with test_).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import aiosqlite  # noqa: E402
+from telegram import Update  # noqa: E402
+
+from src.providers.base_provider import (  # noqa: E402
+    BaseProvider, ProviderQuotaError, ProviderTransientError, StructuredResponse,
+)
+
+# Message mix: fast-tier simple, fast-tier complex, ambiguous (LLM tier), commands
+MESSAGES = {
+    "simple": ["hello", "thanks!", "ok cool", "good morning"],
+    "complex": ["search the latest news about rust async runtimes",
+                "write a python script that lists large files",
+                "check the disk usage on this server"],
+    "ambiguous": ["tell me about paris", "what do you think of my plan to learn go",
+                  "explain how vaccines work"],
+    "command": ["/help", "/status", "/memory", "/start"],
+}
+
+
+@dataclass
+class LoadOptions:
+    users: int = 20
+    messages: int = 10            # per user
+    latency: float = 0.05         # provider seconds before the first token
+    tokens: int = 120             # output tokens per completion
+    tokens_per_s: float = 2000.0  # generation speed; adds tokens / tokens_per_s
+    jitter: float = 0.3           # +/- fraction applied to latency
+    rate_429: float = 0.0
+    rate_timeout: float = 0.0
+    complex_ratio: float = 0.3    # LLM-tier verdicts that come back COMPLEX
+    mix: Dict[str, float] = field(default_factory=lambda: {
+        "simple": 0.4, "complex": 0.2, "ambiguous": 0.3, "command": 0.1})
+    think_time: float = 0.0       # seconds a user waits between messages
+    seed: int = 1
+    config: Dict[str, Any] = field(default_factory=dict)
+
+
+class FakeProvider(BaseProvider):
+    """Provider adapter that sleeps instead of calling an API."""
+
+    SUPPORTS_FUNCTION_CALLING = True
+
+    def __init__(self, api_key: str = "", provider_name: str = "groq",
+                 opts: Optional[LoadOptions] = None, rng: Optional[random.Random] = None,
+                 counts: Optional[Dict[str, int]] = None):
+        super().__init__(api_key, provider_name)
+        self.opts = opts or LoadOptions()
+        self.rng = rng or random.Random(self.opts.seed)
+        self.counts = counts if counts is not None else {}
+
+    def _count(self, name: str) -> None:
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    async def _complete(self, payload: Dict[str, Any]) -> str:
+        o = self.opts
+        self._count("calls")
+        roll = self.rng.random()
+        delay = o.latency * (1 + self.rng.uniform(-o.jitter, o.jitter))
+        if roll < o.rate_429:
+            await asyncio.sleep(delay / 4)
+            self._count("429")
+            raise ProviderQuotaError("429 Too Many Requests: rate limit exceeded")
+        if roll < o.rate_429 + o.rate_timeout:
+            await asyncio.sleep(delay)
+            self._count("timeout")
+            raise ProviderTransientError("timeout")
+        await asyncio.sleep(delay + o.tokens / o.tokens_per_s)
+        messages = payload.get("messages") or [{}]
+        if "SIMPLE or COMPLEX" in str(messages[0].get("content", "")):
+            return "COMPLEX" if self.rng.random() < o.complex_ratio else "SIMPLE"
+        return " ".join(["lorem"] * o.tokens)
+
+    def _usage(self) -> Dict[str, int]:
+        return {"prompt_tokens": 500, "completion_tokens": self.opts.tokens,
+                "total_tokens": 500 + self.opts.tokens}
+
+    async def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"output": await self._complete(payload), "usage": self._usage()}
+
+    async def stream(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        for word in (await self._complete(payload)).split(" "):
+            yield word + " "
+
+    async def test_key(self) -> bool:
+        return True
+
+    async def request_with_tools(self, payload: Dict[str, Any], tool_schemas: List[Any]) -> StructuredResponse:
+        return StructuredResponse(content=await self._complete(payload), usage=self._usage(),
+                                  model="fake")
+
+
+class StubBot:
+    """Stands in for telegram.Bot: records calls, returns message stubs."""
+
+    def __init__(self) -> None:
+        self.calls: List[tuple] = []
+        self._next_id = 1000
+
+    def _record(self, method: str, kwargs: Dict[str, Any]) -> SimpleNamespace:
+        self._next_id += 1
+        chat_id = kwargs.get("chat_id")
+        self.calls.append((method, chat_id, time.perf_counter()))
+        return SimpleNamespace(message_id=kwargs.get("message_id") or self._next_id, chat_id=chat_id,
+                               chat=SimpleNamespace(id=chat_id), text=kwargs.get("text", ""))
+
+    async def send_message(self, chat_id=None, text="", **kwargs):
+        return self._record("send_message", {"chat_id": chat_id, "text": text, **kwargs})
+
+    async def edit_message_text(self, text="", chat_id=None, message_id=None, **kwargs):
+        return self._record("edit_message_text", {"chat_id": chat_id, "message_id": message_id, "text": text})
+
+    async def send_document(self, chat_id=None, document=None, **kwargs):
+        return self._record("send_document", {"chat_id": chat_id})
+
+    async def send_chat_action(self, chat_id=None, action=None, **kwargs):
+        return self._record("send_chat_action", {"chat_id": chat_id})
+
+    async def delete_message(self, chat_id=None, message_id=None, **kwargs):
+        self._record("delete_message", {"chat_id": chat_id, "message_id": message_id})
+        return True
+
+    async def answer_callback_query(self, *args, **kwargs):
+        return True
+
+    def count(self, *methods: str) -> int:
+        return sum(1 for c in self.calls if not methods or c[0] in methods)
+
+
+def make_update(bot: StubBot, update_id: int, tg_user_id: int, text: str) -> Update:
+    data = {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": text,
+        "chat": {"id": tg_user_id, "type": "private"},
+        "from": {"id": tg_user_id, "is_bot": False, "first_name": f"User{tg_user_id}",
+                 "username": f"user{tg_user_id}"},
+    }}
+    if text.startswith("/"):
+        command = text.split(" ", 1)[0]
+        data["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return Update.de_json(data, bot)
+
+
+@contextmanager
+def offline_env(workdir: Path, opts: LoadOptions, counts: Dict[str, int]) -> Iterator[None]:
+    """Point the bot at workdir and fake providers; undone on exit."""
+    from src.config import Config
+    from src.core import admission
+    from src.db import connection, key_store
+    from src.providers import provider_pool
+
+    (workdir / "config.json").write_text(json.dumps(
+        {"vector_backend": "numpy", "vector_embedder": "hashing", **opts.config}))
+    db_path = str(workdir / "data" / "rk.db")
+    rng = random.Random(opts.seed)
+    saved = {
+        "cwd": os.getcwd(), "db": (connection.DB_PATH, key_store.DB_PATH),
+        "env": {k: os.environ.get(k) for k in ("GROQ_API_KEY", "GEMINI_API_KEY", "OPENROUTER_API_KEY",
+                                               "GOOGLE_API_KEY", "OWNER_USER_ID")},
+        "adapter": provider_pool.ProviderPool._make_adapter,
+        "pool": provider_pool._pool_instance,
+        "commit": aiosqlite.Connection.commit,
+    }
+    real_commit = saved["commit"]
+
+    async def counting_commit(self):
+        counts["commits"] = counts.get("commits", 0) + 1
+        return await real_commit(self)
+
+    os.chdir(workdir)
+    connection.DB_PATH = key_store.DB_PATH = db_path
+    for name in saved["env"]:
+        os.environ.pop(name, None)
+    os.environ["GROQ_API_KEY"] = "gsk_loadtest_fake"
+    provider_pool.ProviderPool._make_adapter = (
+        lambda self, provider, api_key: FakeProvider(api_key, self._normalize(provider), opts, rng, counts))
+    provider_pool._pool_instance = None
+    aiosqlite.Connection.commit = counting_commit
+    admission.reset_admission()
+    Config.invalidate()
+    try:
+        yield
+    finally:
+        aiosqlite.Connection.commit = real_commit
+        provider_pool.ProviderPool._make_adapter = saved["adapter"]
+        provider_pool._pool_instance = saved["pool"]
+        connection.DB_PATH, key_store.DB_PATH = saved["db"]
+        for name, value in saved["env"].items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        os.chdir(saved["cwd"])
+        admission.reset_admission()
+        Config.invalidate()
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run_load(opts: LoadOptions, workdir: Optional[Path] = None) -> Dict[str, Any]:
+    """Run one load test; returns the report dict (see module docstring)."""
+    from src.bot import app
+    from src.db.key_store import init_db, upsert_user
+    from src.utils import tracing
+
+    commands = {"/help": app.help_handler, "/status": app.status_handler,
+                "/memory": app.memory_handler, "/start": app.start_handler}
+    counts: Dict[str, int] = {}
+    bot = StubBot()
+    rng = random.Random(opts.seed)
+    kinds, weights = zip(*opts.mix.items())
+    latencies: List[float] = []
+    by_kind: Dict[str, List[float]] = {k: [] for k in kinds}
+    errors: List[str] = []
+
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp, offline_env(Path(workdir or tmp), opts, counts):
+        await init_db()
+        tracing.reset_spans()
+        internal = {tg: await upsert_user(tg, f"user{tg}") for tg in range(1, opts.users + 1)}
+        setup_commits = counts.get("commits", 0)
+
+        async def user(tg_id: int) -> None:
+            for n in range(opts.messages):
+                kind = rng.choices(kinds, weights)[0]
+                text = rng.choice(MESSAGES[kind])
+                update = make_update(bot, tg_id * 100_000 + n, tg_id, text)
+                context = SimpleNamespace(bot=bot, args=text.split()[1:])
+                t0 = time.perf_counter()
+                try:
+                    if kind == "command":
+                        await commands[text.split()[0]](update, context)
+                    else:
+                        await app._process_message(update, context)
+                        pending = [t for t in app._ACTIVE_TASKS.get(internal[tg_id], ()) if not t.done()]
+                        await asyncio.gather(*pending)
+                except Exception as exc:
+                    errors.append(f"{kind}: {type(exc).__name__}: {exc}")
+                    continue
+                ms = (time.perf_counter() - t0) * 1000
+                latencies.append(ms)
+                by_kind[kind].append(ms)
+                if opts.think_time:
+                    await asyncio.sleep(opts.think_time)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(tg) for tg in internal))
+        wall = time.perf_counter() - start
+        # summarization and other fire-and-forget work may still be running
+        leftover = asyncio.all_tasks() - {asyncio.current_task()}
+        if leftover:
+            _, pending = await asyncio.wait(leftover, timeout=10)
+            for task in pending:
+                task.cancel()
+        spans = tracing.perf_summary(3600)
+
+    done = len(latencies)
+    return {
+        "users": opts.users, "messages": opts.users * opts.messages, "completed": done,
+        "errors": len(errors), "error_samples": errors[:5], "wall_s": wall,
+        "msgs_s": done / wall if wall else 0.0,
+        "p50": _pct(latencies, 0.5), "p99": _pct(latencies, 0.99),
+        "by_kind": {k: {"n": len(v), "p50": _pct(v, 0.5), "p99": _pct(v, 0.99)} for k, v in by_kind.items() if v},
+        "commits_per_msg": (counts.get("commits", 0) - setup_commits) / max(done, 1),
+        "db_conns_per_msg": spans.get("db", {}).get("count", 0) / max(done, 1),
+        "provider_calls": counts.get("calls", 0), "provider_429": counts.get("429", 0),
+        "provider_timeouts": counts.get("timeout", 0),
+        "bot_sends": bot.count("send_message", "send_document"),
+        "bot_edits": bot.count("edit_message_text"),
+    }
+
+
+def _print(report: Dict[str, Any], base: Optional[Dict[str, Any]] = None) -> None:
+    def delta(key: str, fmt: str) -> str:
+        if not base or not base.get(key):
+            return ""
+        return f"  ({(report[key] - base[key]) / base[key] * 100:+.0f}% vs {format(base[key], fmt)})"
+
+    print(f"completed {report['completed']}/{report['messages']} messages "
+          f"({report['errors']} errors) in {report['wall_s']:.2f}s")
+    print(f"msgs/s        {report['msgs_s']:.1f}{delta('msgs_s', '.1f')}")
+    print(f"p50           {report['p50']:.0f} ms{delta('p50', '.0f')}")
+    print(f"p99           {report['p99']:.0f} ms{delta('p99', '.0f')}")
+    print(f"commits/msg   {report['commits_per_msg']:.2f}{delta('commits_per_msg', '.2f')}")
+    print(f"db conns/msg  {report['db_conns_per_msg']:.2f}{delta('db_conns_per_msg', '.2f')}")
+    print(f"provider      {report['provider_calls']} calls, {report['provider_429']} x 429, "
+          f"{report['provider_timeouts']} timeouts")
+    print(f"bot calls     {report['bot_sends']} sends, {report['bot_edits']} edits")
+    for kind, s in report["by_kind"].items():
+        print(f"  {kind:<10} n={s['n']:<5} p50 {s['p50']:>7.0f} ms  p99 {s['p99']:>7.0f} ms")
+    for sample in report["error_samples"]:
+        print(f"  error: {sample}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    d = LoadOptions()
+    ap.add_argument("--users", type=int, default=d.users)
+    ap.add_argument("--messages", type=int, default=d.messages, help="per user")
+    ap.add_argument("--latency", type=float, default=d.latency, help="provider seconds to first token")
+    ap.add_argument("--tokens", type=int, default=d.tokens)
+    ap.add_argument("--tokens-per-s", type=float, default=d.tokens_per_s)
+    ap.add_argument("--rate-429", type=float, default=d.rate_429)
+    ap.add_argument("--rate-timeout", type=float, default=d.rate_timeout)
+    ap.add_argument("--complex-ratio", type=float, default=d.complex_ratio)
+    ap.add_argument("--think-time", type=float, default=d.think_time)
+    ap.add_argument("--seed", type=int, default=d.seed)
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=JSON",
+                    help="config.json override, e.g. --set admission_max_concurrent=4")
+    ap.add_argument("--save", help="write the report as JSON (a baseline)")
+    ap.add_argument("--compare", help="baseline JSON to diff against")
+    args = ap.parse_args()
+
+    config = {}
+    for item in args.set:
+        key, _, raw = item.partition("=")
+        try:
+            config[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            config[key] = raw
+    opts = LoadOptions(users=args.users, messages=args.messages, latency=args.latency,
+                       tokens=args.tokens, tokens_per_s=args.tokens_per_s, rate_429=args.rate_429,
+                       rate_timeout=args.rate_timeout, complex_ratio=args.complex_ratio,
+                       think_time=args.think_time, seed=args.seed, config=config)
+
+    import structlog
+    import logging
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    report = asyncio.run(run_load(opts))
+    report["options"] = asdict(opts)
+    base = json.loads(Path(args.compare).read_text()) if args.compare else None
+    _print(report, base)
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2))
+        print(f"saved {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from src.bot import app
+from src.config import Config
+from src.core import admission
+from src.core.admission import AdmissionController
+from src.utils import tracing
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(admission_max_concurrent=1)))
+    admission.reset_admission()
+    tracing.reset_spans()
+    yield
+    admission.reset_admission()
+
+
+async def _queue(ctl, jobs):
+    """Start jobs (name, user, lane) behind a held slot; return admission order."""
+    order = []
+
+    async def job(name, user, lane):
+        async with ctl.slot(user, lane):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await ctl.acquire(0)
+    tasks = []
+    for spec in jobs:
+        tasks.append(asyncio.create_task(job(*spec)))
+        await asyncio.sleep(0)
+    ctl.release("interactive")
+    await asyncio.gather(*tasks)
+    return order
+
+
+async def test_lanes_by_priority_and_users_fairly():
+    ctl = AdmissionController(max_concurrent=1)
+    order = await _queue(ctl, [
+        ("summary", 4, "maintenance"), ("cron", 3, "background"),
+        ("a1", 1, "interactive"), ("a2", 1, "interactive"), ("a3", 1, "interactive"),
+        ("b1", 2, "interactive"), ("reply", 2, "direct"),
+    ])
+    # b1 arrived last but is not stuck behind all of user 1's runs
+    assert order == ["a1", "b1", "a2", "a3", "reply", "cron", "summary"]
+    stats = ctl.stats()
+    assert stats["running"] == 0 and stats["queued"] == 0 and stats["admitted"] == 8
+
+
+async def test_weights_give_a_bigger_share():
+    ctl = AdmissionController(max_concurrent=1, user_weights={"7": 2})
+    jobs = [(f"w{i}", 7, "interactive") for i in range(4)] + [(f"u{i}", 8, "interactive") for i in range(4)]
+    order = await _queue(ctl, jobs)
+    assert sum(name.startswith("w") for name in order[:6]) == 4
+
+
+async def test_positions_cancellation_and_wait_metric():
+    ctl = AdmissionController(max_concurrent=1)
+    await ctl.acquire(0)
+    seen = {1: [], 2: []}
+    first = asyncio.create_task(ctl.acquire(1, on_position=seen[1].append))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(ctl.acquire(2, on_position=seen[2].append))
+    await asyncio.sleep(0.05)
+    assert seen == {1: [1], 2: [2]}
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert seen[2] == [2, 1] and ctl.stats()["abandoned"] == 1
+    ctl.release("interactive")
+    assert await second >= 0.05
+    assert ctl.in_flight == 1
+    assert tracing.perf_summary(60)["queue_wait"]["count"] == 2
+
+
+async def test_orchestration_shows_its_queue_position(monkeypatch):
+    edits = []
+
+    class Bot:
+        async def edit_message_text(self, text, **kw):
+            edits.append(text)
+
+    started = asyncio.Event()
+
+    async def fake_run(*args, **kw):
+        started.set()
+
+    monkeypatch.setattr(app, "run_orchestration_background", fake_run)
+    ctl = admission.get_admission()
+    await ctl.acquire(99, "background")
+    task = asyncio.create_task(app._run_orchestration_guarded(
+        asyncio.Semaphore(2), Bot(), 1, 1, 5, [], "research", [], None, Config.get(),
+    ))
+    await asyncio.sleep(0.01)
+    assert any("queued (position 1)" in e for e in edits) and not started.is_set()
+    ctl.release("background")
+    await task
+    assert started.is_set()
+
+
+async def test_queue_position_edits_are_throttled(monkeypatch):
+    edits = []
+    admitted = set()
+
+    class Bot:
+        async def edit_message_text(self, text, message_id, **kw):
+            await asyncio.sleep(0.01)
+            edits.append((message_id, message_id in admitted))
+
+    async def fake_run(bot, chat_id, message_id, *args, **kw):
+        admitted.add(message_id)
+        await asyncio.sleep(0.005)
+
+    monkeypatch.setattr(app, "run_orchestration_background", fake_run)
+    ctl = admission.get_admission()
+    await ctl.acquire(99, "background")
+    tasks = [
+        asyncio.create_task(app._run_orchestration_guarded(
+            asyncio.Semaphore(2), Bot(), 1, msg_id, 100 + msg_id, [], "research", [], None, Config.get(),
+        ))
+        for msg_id in range(8)
+    ]
+    await asyncio.sleep(0.05)
+    ctl.release("background")
+    await asyncio.gather(*tasks)
+
+    assert admitted == set(range(8))
+    # one edit per waiter while positions churn, none after the run started
+    assert sorted(m for m, _ in edits) == list(range(8))
+    assert not any(after for _, after in edits)
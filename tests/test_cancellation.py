@@ -0,0 +1,105 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from src.bot import app
+from src.config import Config
+from src.tools import shell_tool
+
+
+def _alive(pid: int) -> bool:
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except FileNotFoundError:
+        return False
+    return stat.rsplit(")", 1)[1].split()[0] != "Z"
+
+
+async def _released(sem: asyncio.Semaphore, value: int, within: float = 1.0) -> float:
+    start = time.perf_counter()
+    while sem._value != value:  # type: ignore[attr-defined]
+        assert time.perf_counter() - start < within, "semaphore slot still held"
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - start
+
+
+class HangingPool:
+    """A provider that never answers, like a stalled 60 s HTTP call."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    def order_providers(self, user_id, priorities):
+        return ["groq"]
+
+    async def request_with_key_structured(self, user_id, provider, payload, schemas):
+        self.started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class FakeBot:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_message_text(self, text, **kw):
+        self.edits.append(text)
+
+    async def send_message(self, text, **kw):
+        self.edits.append(text)
+
+
+async def test_stop_frees_the_semaphore_slot_immediately(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(max_concurrent_orchestrations_per_user=2)))
+    pool = HangingPool()
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    bot = FakeBot()
+    fragments = asyncio.get_running_loop().create_future()
+    fragments.set_result([])
+
+    sem = app._get_semaphore(501)
+    task = asyncio.create_task(app._run_orchestration_guarded(
+        sem, bot, 1, 1, 501, [{"role": "user", "content": "research"}], "research", [], None, Config.get(),
+        fragments_task=fragments,
+    ))
+    app._track_task(501, task)
+    await asyncio.wait_for(pool.started.wait(), 2)
+    assert sem._value == 1
+
+    assert app._stop_user_tasks(501) == 1
+    await _released(sem, 2, within=0.1)
+    assert pool.cancelled and task.cancelled()
+    assert 501 not in app._ACTIVE_TASKS
+    await asyncio.sleep(0.05)
+    assert bot.edits[-1].endswith("task stopped by user.")
+    assert app._stop_user_tasks(501) == 0
+    app._USER_SEMAPHORES.pop(501, None)
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs /proc")
+async def test_cancelled_shell_command_kills_its_process_group(tmp_path, monkeypatch):
+    monkeypatch.setattr(shell_tool, "_is_security_enabled", lambda: False)
+    # The backgrounded sleep would outlive a plain kill of the shell
+    cmd = "sleep 30 & echo $! > child.pid; wait"
+    task = asyncio.create_task(shell_tool.run_shell_command(cmd, workspace=str(tmp_path)))
+    pid_file = tmp_path / "child.pid"
+    for _ in range(200):
+        if pid_file.exists() and pid_file.read_text().strip():
+            break
+        await asyncio.sleep(0.01)
+    pid = int(pid_file.read_text())
+    assert _alive(pid)
+
+    task.cancel()
+    start = time.perf_counter()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    while _alive(pid):
+        assert time.perf_counter() - start < 1.0, "child process survived the cancel"
+        await asyncio.sleep(0.01)
@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+
+from src.agents import agent_factory
+from src.bot import app
+from src.config import Config
+from src.db import checkpoints, connection, key_store
+from src.db.key_store import init_db
+from src.providers.base_provider import StructuredResponse, ToolCall
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "rk.db")
+    monkeypatch.setattr(connection, "DB_PATH", db_path)
+    monkeypatch.setattr(key_store, "DB_PATH", db_path)
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(checkpoint_resume="auto")))
+    await init_db()
+    return await key_store.upsert_user(4242, "alex")
+
+
+class ScriptedPool:
+    """Turn 0 asks for a search; later turns answer, or hang like a deploy in progress."""
+
+    def __init__(self, hang_after_first=False):
+        self.hang_after_first = hang_after_first
+        self.calls = []
+        self.hanging = asyncio.Event()
+
+    def order_providers(self, user_id, priorities):
+        return ["groq"]
+
+    async def request_with_key_structured(self, user_id, provider, payload, schemas):
+        self.calls.append(payload["messages"])
+        if not any(m["role"] == "tool" for m in payload["messages"]):
+            return StructuredResponse(tool_calls=[ToolCall("web_search", {"query": "rust"}, "c1")])
+        if self.hang_after_first:
+            self.hanging.set()
+            await asyncio.sleep(60)
+        return StructuredResponse(content="Rust 2.0 ships next week.")
+
+
+class FakeBot:
+    def __init__(self):
+        self.texts = []
+
+    async def edit_message_text(self, text="", **kw):
+        self.texts.append(text)
+
+    async def send_message(self, chat_id=None, text="", **kw):
+        self.texts.append(text)
+        return type("Sent", (), {"message_id": 9})()
+
+
+def test_state_blob_is_compact():
+    state = {"thought_history": [{"role": "tool", "content": "<div>result</div> " * 2000}], "agent_results": {}}
+    blob = checkpoints.encode_state(state)
+    assert checkpoints.decode_state(blob) == state and len(blob) < 1000
+
+
+async def test_interrupted_run_resumes_without_repeating_turns(db, monkeypatch):
+    user_id = db
+    searches = []
+
+    async def fake_tool(name, args, uid, **kw):
+        searches.append(args)
+        return "search result: Rust 2.0 ships next week"
+
+    monkeypatch.setattr(agent_factory, "execute_tool", fake_tool)
+    prompt = [{"role": "system", "content": "sys"}, {"role": "user", "content": "rust news?"}]
+
+    # First process: turn 0 runs the tool, then the restart cancels the run
+    pool = ScriptedPool(hang_after_first=True)
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    fragments = asyncio.get_running_loop().create_future()
+    fragments.set_result([])
+    task = asyncio.create_task(app.run_orchestration_background(
+        FakeBot(), 77, 1, user_id, prompt, "rust news?", [], None, fragments_task=fragments))
+    await asyncio.wait_for(pool.hanging.wait(), 5)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    [cp] = await checkpoints.interrupted()
+    assert (cp["user_id"], cp["chat_id"], cp["turn"]) == (user_id, 77, 1)
+    assert cp["thought_history"][-1]["content"].startswith("search result")
+    assert cp["budget"]["tool_calls"] == 1
+
+    # After the restart: resumed from turn 1, the search is not run again
+    pool = ScriptedPool()
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    bot = FakeBot()
+    await app._resume_interrupted_runs(bot, Config.get())
+    await asyncio.gather(*app._ACTIVE_TASKS.get(user_id, ()))
+
+    assert len(searches) == 1
+    assert len(pool.calls) == 1 and pool.calls[0][-1]["role"] == "tool"
+    assert "resuming your task from turn 2" in bot.texts[0]
+    assert bot.texts[-1] == "Rust 2.0 ships next week."
+    assert await checkpoints.interrupted() == []
+
+
+async def test_user_stop_drops_the_checkpoint(db, monkeypatch):
+    user_id = db
+    await checkpoints.save("run1", user_id, 77, "rust news?", 1, {
+        "thought_history": [{"role": "tool", "content": "x", "tool_call_id": "c1"}],
+        "agent_results": {}, "budget": {}})
+    pool = ScriptedPool(hang_after_first=True)
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    task = asyncio.create_task(app.run_orchestration_background(
+        FakeBot(), 77, 1, user_id, [], "rust news?", [], None, resume=await checkpoints.load("run1")))
+    await asyncio.wait_for(pool.hanging.wait(), 5)
+    app._CANCEL_FLAGS[user_id] = True  # what _stop_user_tasks sets before cancelling
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert await checkpoints.load("run1") is None
+
+
+async def test_orchestrator_checkpoints_and_resumes(db, monkeypatch):
+    from src.core import orchestrator
+
+    user_id = db
+    pool = ScriptedPool(hang_after_first=True)
+    monkeypatch.setattr(orchestrator, "get_pool", lambda: pool)
+    orch = orchestrator.Orchestrator(Config.get())
+    runs = []
+
+    async def execute(tool_name, arguments, user_id, system_prompt=""):
+        runs.append(tool_name)
+        return "search result"
+
+    monkeypatch.setattr(orch.tool_executor, "execute", execute)
+    task = asyncio.create_task(orch.run(user_id, 5001, "rust news?", "", "sys", run_id="w1", reply_chat_id=77))
+    await asyncio.wait_for(pool.hanging.wait(), 5)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    cp = await checkpoints.load("w1")
+    assert (cp["chat_id"], cp["turn"]) == (77, 1)
+
+    pool.hang_after_first = False
+    answer = await orch.run(user_id, 5001, "rust news?", "", "sys", resume=cp)
+    assert answer.startswith("Rust 2.0") and runs == ["web_search"]
+    assert await checkpoints.load("w1") is None
+
+
+async def test_resume_button_claims_the_checkpoint_once(db, monkeypatch):
+    user_id = db
+    await checkpoints.save("run2", user_id, 77, "rust news?", 1, {
+        "thought_history": [], "agent_results": {}, "budget": {}})
+    resumed, answers = [], []
+
+    async def fake_resume(bot, cp, cfg, message_id=None):
+        resumed.append(cp["run_id"])
+
+    class Query:
+        data = "resume_run:run2"
+        from_user = type("User", (), {"id": 4242, "username": "alex"})()
+        message = type("Msg", (), {"chat_id": 77, "message_id": 5})()
+
+        async def answer(self, text=None):
+            answers.append(text)
+
+    monkeypatch.setattr(app, "_resume_run", fake_resume)
+    update = type("Update", (), {"callback_query": Query()})()
+    context = type("Ctx", (), {"bot": FakeBot()})()
+    await asyncio.gather(app.resume_run_handler(update, context), app.resume_run_handler(update, context))
+
+    assert resumed == ["run2"]
+    assert sorted(answers, key=str) == [None, "This task was already resumed."]
+    # a restart releases the claim, so the run can be offered again
+    assert [cp["run_id"] for cp in await checkpoints.interrupted()] == ["run2"]
+    assert await checkpoints.claim("run2") and not await checkpoints.claim("run2")
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from src.bot import app
+from src.bot.coalesce import BurstCoalescer
+from src.config import Config
+from src.providers.base_provider import StructuredResponse
+
+
+async def test_burst_is_flushed_once_after_quiet_window():
+    flushed = []
+
+    async def flush(text):
+        flushed.append((text, time.monotonic()))
+
+    bursts = BurstCoalescer("test_bursts")
+    start = time.monotonic()
+    assert bursts.submit("chat", "so I was thinking", 0.1, 1.0, flush) is False
+    await asyncio.sleep(0.05)
+    assert bursts.submit("chat", "about moving to rust", 0.1, 1.0, flush) is True
+    assert bursts.submit("other", "hi", 0.1, 1.0, flush) is False
+    await asyncio.sleep(0.05)
+    assert bursts.submit("chat", "for the backend?", 0.1, 1.0, flush) is True
+    await asyncio.sleep(0.3)
+
+    texts = sorted(t for t, _ in flushed)
+    assert texts == ["hi", "so I was thinking\nabout moving to rust\nfor the backend?"]
+    merged_at = next(at for t, at in flushed if t != "hi")
+    assert merged_at - start >= 0.2  # deadline moved with each message
+    assert bursts.merged == 2 and bursts.pending("chat") == 0
+
+
+async def test_max_wait_caps_a_long_burst():
+    flushed = []
+
+    async def flush(text):
+        flushed.append(text)
+
+    bursts = BurstCoalescer("test_bursts")
+    for i in range(8):
+        bursts.submit("chat", str(i), 0.1, 0.25, flush)
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.15)
+    assert len(flushed) == 2 and flushed[0].startswith("0\n1")
+
+
+async def test_process_message_coalesces_before_handling(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(message_coalesce_ms=80)))
+    handled = []
+
+    async def fake_handle(update, context, override_text=None):
+        handled.append((update.message.text, override_text))
+
+    monkeypatch.setattr(app, "_handle_message", fake_handle)
+
+    def update(text):
+        return SimpleNamespace(message=SimpleNamespace(text=text), effective_user=SimpleNamespace(id=7),
+                               effective_chat=SimpleNamespace(id=70))
+
+    for text in ("check the logs", "on the staging box", "groq:gsk_abcdefghijklmnopqrstuvwxyz0123456789"):
+        await app._process_message(update(text), SimpleNamespace(bot=None))
+    await asyncio.sleep(0.2)
+    # API keys are never held back or merged
+    assert handled[0] == ("groq:gsk_abcdefghijklmnopqrstuvwxyz0123456789", None)
+    assert handled[1] == ("check the logs", "check the logs\non the staging box")
+
+
+class SlowPool:
+    def __init__(self):
+        self.calls = []
+        self.first_call = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def order_providers(self, user_id, priorities):
+        return ["groq"]
+
+    async def request_with_key_structured(self, user_id, provider, payload, schemas):
+        self.calls.append(payload["messages"])
+        if len(self.calls) == 1:
+            self.first_call.set()
+            await self.release.wait()
+            return StructuredResponse(content="Staging logs look clean.")
+        return StructuredResponse(content="Staging is clean, and prod has two 500s at 09:14.")
+
+
+class FakeBot:
+    def __init__(self):
+        self.texts = []
+
+    async def edit_message_text(self, text="", **kw):
+        self.texts.append(text)
+
+    async def send_message(self, chat_id=None, text="", **kw):
+        self.texts.append(text)
+
+
+async def test_message_during_run_joins_it(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(checkpoint_resume="off")))
+    pool = SlowPool()
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    sent = []
+
+    async def fake_send_final(bot, chat_id, message_id, text):
+        sent.append(text)
+
+    async def fake_add_chat_message(*args, **kwargs):
+        pass
+
+    from src.db import chat_store
+    monkeypatch.setattr(app, "_send_final", fake_send_final)
+    monkeypatch.setattr(chat_store, "add_chat_message", fake_add_chat_message)
+    monkeypatch.setattr(app, "_record_complexity_outcome", lambda *a: None)
+    fragments = asyncio.get_running_loop().create_future()
+    fragments.set_result([])
+
+    prompt = [{"role": "user", "content": "check the staging logs"}]
+    run = asyncio.create_task(app.run_orchestration_background(
+        FakeBot(), 70, 1, 801, prompt, "check the staging logs", [], None, fragments_task=fragments))
+    await asyncio.wait_for(pool.first_call.wait(), 2)
+    assert app._append_to_active_run(70, 801, "and prod too") is True
+    assert app._append_to_active_run(70, 999, "someone else") is False
+    pool.release.set()
+    await asyncio.wait_for(run, 5)
+
+    assert len(pool.calls) == 2
+    assert pool.calls[1][-2:] == [{"role": "assistant", "content": "Staging logs look clean."},
+                                  {"role": "user", "content": "and prod too"}]
+    assert sent == ["Staging is clean, and prod has two 500s at 09:14."]
+    assert app._append_to_active_run(70, 801, "late") is False
@@ -0,0 +1,63 @@
+import json
+
+from src.config import Config
+from src.core.complexity import classify_tiers
+from src.core.complexity_model import ComplexityModel, accuracy, load_model
+from src.db import connection, key_store
+from src.db.complexity_log import labeled_examples, log_decision, record_outcome
+from src.db.key_store import init_db, upsert_user
+
+SIMPLE = ["tell me about paris", "why is the sky blue", "what is stoicism",
+          "explain recursion to me", "who wrote hamlet", "what rhymes with orange"]
+COMPLEX = ["bitcoin price right now", "how much ram is free", "is my website up",
+           "ping google.com for me", "tail the nginx error log", "restart the worker service"]
+
+
+def _examples():
+    return [(t, False) for t in SIMPLE] + [(t, True) for t in COMPLEX]
+
+
+def test_model_separates_and_round_trips(tmp_path):
+    model = ComplexityModel.train(_examples(), epochs=30)
+    assert accuracy(model, _examples()) == 1.0
+
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    loaded = load_model(path)
+    assert json.loads(open(path).read())["version"] == 1
+    for text, _ in _examples():
+        assert abs(loaded.predict_proba(text) - model.predict_proba(text)) < 1e-3
+    assert load_model(str(tmp_path / "missing.json")) is None
+
+
+def test_model_tier_defers_to_llm_below_threshold(tmp_path):
+    path = str(tmp_path / "model.json")
+    ComplexityModel.train(_examples(), epochs=30).save(path)
+
+    sure = classify_tiers("how much ram is free", Config(complexity_model_path=path,
+                                                          complexity_model_threshold=0.55))
+    assert sure[:2] == (True, "model")
+    unsure = classify_tiers("how much ram is free", Config(complexity_model_path=path,
+                                                            complexity_model_threshold=0.9999))
+    assert unsure[:2] == (None, "model_unsure")
+    # Pattern tiers still win before the model runs
+    assert classify_tiers("hello", Config(complexity_model_path=path))[:2] == (False, "simple_pattern")
+
+
+async def test_outcome_labels_latest_decision(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "rk.db")
+    monkeypatch.setattr(connection, "DB_PATH", db_path)
+    monkeypatch.setattr(key_store, "DB_PATH", db_path)
+    await init_db()
+    alice, bob = await upsert_user(101, "alice"), await upsert_user(102, "bob")
+
+    await log_decision(alice, "tell me about paris", False, "llm")
+    await record_outcome(alice, [])
+    await log_decision(alice, "is my site up", False, "model", 0.3)
+    await log_decision(bob, "unanswered", True, "keyword")
+    await record_outcome(alice, ["curl", "declare_step"])
+    # a direct reply closes its decision without a label
+    await log_decision(bob, "thanks!", False, "simple_pattern")
+    await record_outcome(bob, None)
+
+    assert sorted(await labeled_examples()) == [("is my site up", True), ("tell me about paris", False)]
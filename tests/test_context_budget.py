@@ -0,0 +1,54 @@
+from src.config import Config
+from src.core.context_budget import ContextBudgeter, budget_stats, message_tokens
+
+
+def _history(turns: int, result_chars: int = 8000):
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "Research this."},
+    ]
+    for t in range(turns):
+        messages.append({"role": "assistant", "content": None, "tool_calls": [
+            {"id": f"c{t}", "type": "function", "function": {"name": "curl", "arguments": "{}"}},
+        ]})
+        messages.append({"role": "tool", "tool_call_id": f"c{t}",
+                         "content": f"result {t}\n" + "x" * result_chars})
+    return messages
+
+
+def test_small_history_is_sent_unchanged():
+    budgeter = ContextBudgeter(Config())
+    messages = _history(2, result_chars=100)
+    assert budgeter.fit(messages, "groq") is messages
+    assert budgeter.tokens_saved == 0
+
+
+def test_older_results_compressed_newest_kept_and_history_untouched():
+    cfg = Config(context_budget_tokens=4000, context_keep_recent_tools=2)
+    budgeter = ContextBudgeter(cfg)
+    messages = _history(8)
+    original = [dict(m) for m in messages]
+    out = budgeter.fit(messages, "groq")
+
+    assert messages == original
+    assert sum(message_tokens(m) for m in out) < sum(message_tokens(m) for m in messages)
+    tools = [m for m in out if m["role"] == "tool"]
+    assert tools[-1]["content"] == messages[-1]["content"]
+    assert tools[-2]["content"] == messages[-3]["content"]
+    assert all(len(m["content"]) < 1000 for m in tools[:-2])
+    assert tools[0]["content"].startswith("[elided")
+    assert [m.get("tool_call_id") for m in out] == [m.get("tool_call_id") for m in messages]
+
+    before = budget_stats()["tokens_saved"]
+    saved = budgeter.tokens_saved
+    assert saved > 0
+    assert budgeter.finish(1) == saved
+    assert budget_stats()["tokens_saved"] == before
+
+
+def test_budget_capped_by_provider_window():
+    cfg = Config(context_budget_tokens=50000, context_window_tokens={"ollama": 4096},
+                 context_output_reserve=1024)
+    budgeter = ContextBudgeter(cfg)
+    assert budgeter.budget_for("ollama") == 3072
+    assert budgeter.budget_for("gemini") == 50000
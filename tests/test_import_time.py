@@ -0,0 +1,42 @@
+"""Startup regression guard: importing the bot must not build the vector store.
+
+Runs `python -X importtime` in a fresh interpreter (so nothing is cached by
+the test process) and checks that no vector backend module gets imported.
+Wall-clock import cost is environment-dependent and left to
+`python -X importtime -c "import src.bot.app"` when investigating.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("qdrant_client", "fastembed", "onnxruntime")
+MODULES = ("src.bot.app", "src.db.chat_store")
+
+
+def _importtime(module: str):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        try:
+            cumulative[name.strip()] = int(cum) / 1e6
+        except ValueError:
+            continue  # header row
+    return cumulative
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_does_not_load_vector_backend(module):
+    imported = _importtime(module)
+    heavy = sorted(m for m in imported if m.split(".")[0] in HEAVY)
+    assert module in imported
+    assert not heavy, f"{module} eagerly imports {heavy[:5]}"
@@ -0,0 +1,46 @@
+from src.config import Config
+from src.db.index_policy import chunk_text, plan_chunks
+
+
+def _cfg(**kw):
+    return Config(**kw)
+
+
+def test_acks_commands_and_short_messages_are_skipped():
+    cfg = _cfg()
+    assert plan_chunks("user", "ok", 1, cfg) == []
+    assert plan_chunks("user", "Thanks!", 1, cfg) == []
+    assert plan_chunks("user", "/status", 1, cfg) == []
+    assert plan_chunks("assistant", "Sure, done.", 1, cfg) == []
+    assert plan_chunks("user", "my flight is on friday", 1, cfg) != []
+
+
+def test_roles_without_rule_are_not_indexed():
+    cfg = _cfg()
+    assert plan_chunks("system", "x" * 500, 1, cfg) == []
+    assert plan_chunks("tool", "x" * 500, 1, cfg) == []
+
+
+def test_long_messages_are_chunked_with_parent_ids():
+    cfg = _cfg(vector_chunk_chars=200, vector_chunk_overlap=40)
+    text = " ".join(f"Sentence number {i} talks about topic {i}." for i in range(40))
+    chunks = plan_chunks("user", text, 42, cfg)
+    assert len(chunks) > 1
+    assert all(len(c) <= 200 for c, _ in chunks)
+    assert [m["chunk"] for _, m in chunks] == list(range(len(chunks)))
+    assert all(m["parent_id"] == 42 and m["chunks"] == len(chunks) for _, m in chunks)
+
+
+def test_assistant_code_blocks_stripped_and_chunks_capped():
+    cfg = _cfg(vector_chunk_chars=100, vector_chunk_overlap=0)
+    code_only = "```\n" + "print('x')\n" * 200 + "```"
+    assert plan_chunks("assistant", code_only, 1, cfg) == []
+    long_answer = "This is a fairly long explanation sentence. " * 100
+    assert len(plan_chunks("assistant", long_answer, 1, cfg)) == 6
+
+
+def test_chunk_overlap():
+    text = "abcdefghij" * 10
+    chunks = chunk_text(text, 30, 10)
+    assert chunks[0][-10:] == chunks[1][:10]
+    assert "".join(c[:20] for c in chunks[:-1]) + chunks[-1] == text
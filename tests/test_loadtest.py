@@ -0,0 +1,25 @@
+import pytest
+
+from src.providers.base_provider import ProviderQuotaError, ProviderTransientError
+from tests.perf.loadtest import FakeProvider, LoadOptions, run_load
+
+
+async def test_fake_provider_error_rates():
+    counts = {}
+    quota = FakeProvider(opts=LoadOptions(latency=0, tokens=0, rate_429=1.0), counts=counts)
+    with pytest.raises(ProviderQuotaError, match="429"):
+        await quota.request({"messages": [{"role": "user", "content": "hi"}]})
+    timeout = FakeProvider(opts=LoadOptions(latency=0, tokens=0, rate_timeout=1.0), counts=counts)
+    with pytest.raises(ProviderTransientError):
+        await timeout.request_with_tools({"messages": []}, [])
+    ok = FakeProvider(opts=LoadOptions(latency=0, tokens=5))
+    assert (await ok.request({"messages": []}))["output"] == "lorem lorem lorem lorem lorem"
+    assert counts == {"calls": 2, "429": 1, "timeout": 1}
+
+
+async def test_offline_load_run(tmp_path):
+    report = await run_load(LoadOptions(users=3, messages=4, latency=0.01), workdir=tmp_path)
+    assert report["completed"] == 12 and report["errors"] == 0, report["error_samples"]
+    assert report["msgs_s"] > 0 and report["p99"] >= report["p50"] > 0
+    assert report["commits_per_msg"] > 0 and report["provider_calls"] > 0
+    assert report["bot_sends"] >= 12
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from structlog.testing import capture_logs
+
+from src.utils import tracing
+from src.utils.loop_monitor import LoopMonitor, install_event_loop
+
+
+async def blocking_handler():
+    time.sleep(0.4)  # a sync call inside a coroutine, as in the bug reports
+
+
+async def test_lag_is_sampled_and_blocking_stack_logged():
+    tracing.reset_spans()
+    monitor = LoopMonitor(interval_ms=20, threshold_ms=100)
+    with capture_logs() as logs:
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await asyncio.create_task(blocking_handler(), name="handler")
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    blocked = [e for e in logs if e["event"] == "event_loop_blocked"]
+    assert len(blocked) == 1
+    assert "blocking_handler" in blocked[0]["stack"] and "time.sleep" in blocked[0]["stack"]
+    assert blocked[0]["task"] == "handler"
+    assert monitor.stats()["stalls"] == 1 and monitor.max_lag_ms >= 300
+    lag = tracing.perf_summary(60)["loop_lag"]
+    assert lag["count"] >= 5 and lag["max"] >= 300 and lag["p50"] < 100
+
+
+def test_uvloop_is_opt_in():
+    assert install_event_loop("asyncio") == "asyncio"
+    policy = asyncio.get_event_loop_policy()
+    try:
+        chosen = install_event_loop("uvloop")
+        assert chosen in ("uvloop", "asyncio")
+        if chosen == "asyncio":  # not installed here: falls back, policy untouched
+            assert asyncio.get_event_loop_policy() is policy
+    finally:
+        asyncio.set_event_loop_policy(policy)
@@ -0,0 +1,136 @@
+import numpy as np
+
+from src.db.embedders import HashingEmbedder
+from src.db.numpy_index import NumpyVectorIndex
+
+
+def _index(tmp_path, **kw):
+    opts = dict(segment_rows=4, max_segments=2, ivf_min_rows=10_000, nprobe=4)
+    opts.update(kw)
+    return NumpyVectorIndex(root=str(tmp_path), embedder=HashingEmbedder(dim=256), **opts)
+
+
+def test_search_is_per_user_and_ranked(tmp_path):
+    idx = _index(tmp_path)
+    idx.add(1, ["my cat is called Miso", "I work as a plumber", "favourite food is ramen"],
+            [{"role": "user"}] * 3)
+    idx.add(2, ["my cat is called Biscuit"])
+
+    hits = idx.search(1, "what is my cat called", limit=2)
+    assert hits[0]["text"] == "my cat is called Miso"
+    assert hits[0]["metadata"] == {"role": "user"}
+    assert all("Biscuit" not in h["text"] for h in hits)
+    assert idx.search(3, "anything") == []
+    assert idx.count(3) == 0 and idx.values(3, "role") == set()
+    assert not (tmp_path / "u3").exists()  # reads never create a user directory
+
+
+def test_segments_compact_and_survive_reopen(tmp_path):
+    idx = _index(tmp_path)
+    texts = [f"note number {i} about topic{i}" for i in range(20)]
+    for t in texts:
+        idx.add(7, [t])
+    assert idx.count(7) == 20
+    # max_segments=2 with 4-row segments — compaction must have merged them
+    assert len(list((tmp_path / "u7").glob("seg_*.f32"))) <= 4
+
+    reopened = _index(tmp_path)
+    assert reopened.count(7) == 20
+    assert reopened.search(7, "topic13", limit=1)[0]["text"] == texts[13]
+
+
+def test_ivf_search_finds_exact_match(tmp_path):
+    idx = _index(tmp_path, segment_rows=64, max_segments=1, ivf_min_rows=100)
+    texts = [f"record {i} keyword{i} " + " ".join(f"w{(i * 7 + j) % 97}" for j in range(5))
+             for i in range(256)]
+    idx.add(1, texts)
+    user = idx._user(1)
+    assert any(seg._ivf is not None for seg in user.segments)
+    assert idx.search(1, texts[123], limit=1)[0]["text"] == texts[123]
+
+
+def test_embedder_change_resets_user_index(tmp_path):
+    _index(tmp_path).add(1, ["hello world"])
+    other = NumpyVectorIndex(root=str(tmp_path), embedder=HashingEmbedder(dim=128))
+    assert other.count(1) == 0
+    assert list(tmp_path.glob("u1.stale-*"))
+
+
+def test_hashing_embedder_is_normalized():
+    vecs = HashingEmbedder(dim=64).embed(["alpha beta", ""])
+    assert vecs.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vecs[0]), 1.0)
+    assert np.linalg.norm(vecs[1]) == 0.0
+
+
+def test_int8_compacted_segments_keep_ranking(tmp_path):
+    idx = _index(tmp_path, quantize=True)
+    texts = [f"entry {i} about subject{i}" for i in range(24)]
+    for t in texts:
+        idx.add(5, [t])
+    user = idx._user(5)
+    assert any(seg.quantized for seg in user.segments)
+    assert list((tmp_path / "u5").glob("seg_*.i8"))
+
+    reopened = _index(tmp_path, quantize=True)
+    hit = reopened.search(5, "subject3", limit=1)[0]
+    assert hit["text"] == texts[3]
+    assert 0.0 < hit["score"] <= 1.01
+
+
+def test_dedup_merges_near_duplicates(tmp_path):
+    idx = _index(tmp_path)
+    meta = {"role": "user"}
+    for _ in range(3):
+        idx.add(1, ["ok thanks"], [meta], dedup_threshold=0.97)
+    idx.add(1, ["ok thanks"], [{"role": "assistant"}], dedup_threshold=0.97)
+    assert idx.count(1) == 2
+    hits = idx.search(1, "ok thanks", limit=5)
+    user_hit = next(h for h in hits if h["metadata"]["role"] == "user")
+    assert user_hit["metadata"]["dup_count"] == 3
+
+
+def test_delete_tombstones_and_compaction_drops_rows(tmp_path):
+    idx = _index(tmp_path)
+    for i in range(12):
+        idx.add(1, [f"fact {i} value{i}"], [{"mem_type": "memory", "key": f"k{i}"}])
+    assert idx.delete(1, {"key": "k3"}) == 1
+    assert idx.count(1) == 11
+    assert all(h["metadata"]["key"] != "k3" for h in idx.search(1, "fact 3 value3", limit=11))
+    assert "k3" not in idx.values(1, "key")
+
+    assert idx.delete(1, {"mem_type": "memory"}) == 11
+    assert idx.count(1) == 0
+    assert _index(tmp_path).count(1) == 0  # tombstones persist
+
+
+def test_delete_whole_user(tmp_path):
+    idx = _index(tmp_path)
+    idx.add(4, ["a"])
+    idx.add(5, ["b"])
+    assert idx.users() == [4, 5]
+    assert idx.delete(4) == 1
+    assert idx.users() == [5]
+
+
+def test_compaction_is_size_tiered(tmp_path):
+    idx = _index(tmp_path, max_segments=4)
+    for i in range(64):
+        idx.add(1, [f"row {i}"], [{"batch": i // 16}])
+    user = idx._user(1)
+    # 4-row segments merge 4 at a time into 16, then 4 of those into 64
+    assert [seg.rows for seg in user.segments] == [64]
+    big = user.segments[0]
+
+    # new small segments merge among themselves; the big one is not rewritten
+    for i in range(32):
+        idx.add(1, [f"more {i}"])
+    assert big in user.segments and sorted(seg.rows for seg in user.segments) == [16, 16, 64]
+
+    # once over a quarter of it is tombstoned, it is rewritten on its own
+    idx.delete(1, {"batch": 0})
+    assert big in user.segments
+    idx.delete(1, {"batch": 1})
+    assert big not in user.segments and not big.vec_path.exists()
+    assert sorted(seg.rows for seg in user.segments) == [16, 16, 32]
+    assert idx.count(1) == 64
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.tools import plan_batches, run_tool_calls
+from src.providers.base_provider import ToolCall
+from src.providers.groq_provider import GroqProvider
+from src.providers.ollama_provider import OllamaProvider
+
+
+def test_exclusive_calls_split_batches():
+    names = ["web_search", "curl", "write_file", "read_file", "wikipedia_search", "run_shell_command"]
+    assert plan_batches(names) == [[0, 1], [2], [3, 4], [5]]
+    assert plan_batches(["save_memory", "save_memory"]) == [[0], [1]]
+
+
+async def test_parallel_calls_keep_order_and_take_slowest_time():
+    delays = {"a": 0.3, "b": 0.1, "c": 0.2}
+    calls = [ToolCall(name="web_search", arguments={"query": q}) for q in delays]
+
+    async def run_one(call):
+        q = call.arguments["query"]
+        await asyncio.sleep(delays[q])
+        return f"result {q}"
+
+    start = time.perf_counter()
+    results = await run_tool_calls(calls, run_one, max_parallel=4)
+    elapsed = time.perf_counter() - start
+    assert results == ["result a", "result b", "result c"]
+    assert elapsed < 0.45
+
+
+async def test_concurrency_is_bounded_and_exclusive_calls_run_alone():
+    running = 0
+    peak = 0
+    log = []
+
+    async def run_one(call):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        log.append((call.name, running))
+        await asyncio.sleep(0.01)
+        running -= 1
+        return call.name
+
+    calls = [ToolCall(name="web_search", arguments={}) for _ in range(6)]
+    calls.insert(3, ToolCall(name="write_file", arguments={}))
+    results = await run_tool_calls(calls, run_one, max_parallel=2)
+    assert results == [c.name for c in calls]
+    assert peak == 2
+    assert ("write_file", 1) in log
+
+
+def test_parallel_flag_only_sent_with_tools_to_supporting_providers():
+    groq = GroqProvider("k")
+    payload = {"model": "m", "messages": [], "parallel_tool_calls": True}
+    with_tools = groq._tools_payload(payload, [{"type": "function"}])
+    assert with_tools["parallel_tool_calls"] is True
+    assert "parallel_tool_calls" not in groq._tools_payload(payload, [])
+    assert "parallel_tool_calls" in payload  # caller's payload is not mutated
+    ollama = OllamaProvider("")
+    assert "parallel_tool_calls" not in ollama._tools_payload(payload, [{"type": "function"}])
+
+
+async def test_failed_call_cancels_and_awaits_its_siblings():
+    finished, cancelled = [], []
+
+    async def run_one(call):
+        q = call.arguments["query"]
+        if q == "bad":
+            await asyncio.sleep(0.05)
+            raise RuntimeError("tool blew up")
+        try:
+            await asyncio.sleep(1)
+            finished.append(q)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.01)  # cleanup still runs before the turn fails
+            cancelled.append(q)
+            raise
+        return q
+
+    calls = [ToolCall(name="web_search", arguments={"query": q}) for q in ("a", "bad", "b")]
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="tool blew up"):
+        await run_tool_calls(calls, run_one, max_parallel=4)
+    assert time.perf_counter() - start < 0.5
+    assert sorted(cancelled) == ["a", "b"] and finished == []
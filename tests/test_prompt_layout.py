@@ -0,0 +1,97 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from src.config import Config
+from src.core.context import ContextBuilder, prefix_hash
+from src.providers import gemini_provider
+from src.providers.gemini_provider import GeminiProvider
+from src.providers.provider_pool import ProviderPool
+from src.tools.schemas import get_all_schemas, serialize_tools
+
+SYSTEM = "You are Rika.\n--- OPERATIONAL RULES ---\n1. Be accurate."
+PINNED = {"name": "Alex", "tz": "UTC+2"}
+
+
+def _turn(history, text, clock):
+    return ContextBuilder.build_messages(
+        SYSTEM, f"[CTX] 2026-10-19 {clock} UTC | user:alex", text,
+        summary="Talked about deploys.", history=history, pinned=PINNED,
+    )
+
+
+def test_prefix_hash_stable_across_turns():
+    tools = serialize_tools("openrouter", get_all_schemas())
+    history = []
+    previous = None
+    for turn, clock in enumerate(["10:00", "10:01", "10:07", "11:30"]):
+        messages = _turn(history, f"question {turn}", clock)
+        assert messages[-1]["content"].startswith(f"[CTX] 2026-10-19 {clock}")
+        if previous is not None:
+            # Everything the previous request sent before its last message is
+            # byte-identical at the start of this one
+            assert prefix_hash(messages, tools, upto=len(previous) - 1) == prefix_hash(previous, tools)
+        previous = messages
+        history += [
+            {"role": "user", "content": f"question {turn}"},
+            {"role": "assistant", "content": f"answer {turn}"},
+        ]
+
+    # Same turn rebuilt a minute later: only the volatile tail differs
+    a, b = _turn(history, "again", "12:00"), _turn(history, "again", "12:01")
+    assert a[-1] != b[-1]
+    assert prefix_hash(a, tools) == prefix_hash(b, tools)
+
+
+async def test_conversation_sticks_to_last_provider_and_key():
+    pool = ProviderPool()
+    assert pool.order_providers(7, ["groq", "openrouter", "gemini"]) == ["groq", "openrouter", "gemini"]
+
+    key = {"id": -1, "usage_key": "gemini:AIza-test"}
+    await pool._record_usage(key, 7, "gemini")
+    assert pool.order_providers(7, ["groq", "openrouter", "gemini"]) == ["gemini", "groq", "openrouter"]
+    assert pool.order_providers(8, ["groq", "gemini"]) == ["groq", "gemini"]
+    assert pool._sticky_keys[(7, "gemini")][0] == "env:gemini:AIza-test"
+
+
+async def test_gemini_context_cache_is_reused(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(gemini_cache_min_tokens=10)))
+    monkeypatch.setattr(gemini_provider, "_CONTEXT_CACHES", {})
+    created = []
+
+    def create(model, config):
+        created.append(config)
+        return SimpleNamespace(name=f"cachedContents/{len(created)}")
+
+    client = SimpleNamespace(caches=SimpleNamespace(create=create))
+    provider = GeminiProvider("key-a")
+    long_system = SYSTEM * 20
+
+    first = await provider._context_cache(client, "gemini-2.0-flash", long_system)
+    second = await provider._context_cache(client, "gemini-2.0-flash", long_system)
+    assert first == second == "cachedContents/1"
+    assert len(created) == 1
+    assert await provider._context_cache(client, "gemini-2.0-flash", "short") is None
+
+    provider._drop_context_cache(first)
+    assert await provider._context_cache(client, "gemini-2.0-flash", long_system) == "cachedContents/2"
+
+
+async def test_gemini_context_cache_concurrent_misses_create_once(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config(gemini_cache_min_tokens=10)))
+    monkeypatch.setattr(gemini_provider, "_CONTEXT_CACHES", {})
+    created = []
+
+    def create(model, config):
+        time.sleep(0.05)  # runs in the executor; the other callers arrive meanwhile
+        created.append(config)
+        return SimpleNamespace(name="cachedContents/1")
+
+    client = SimpleNamespace(caches=SimpleNamespace(create=create))
+    provider = GeminiProvider("key-a")
+    names = await asyncio.gather(
+        *(provider._context_cache(client, "gemini-2.0-flash", SYSTEM * 20) for _ in range(5))
+    )
+    assert names == ["cachedContents/1"] * 5
+    assert len(created) == 1
+    assert not gemini_provider._CACHE_CREATES
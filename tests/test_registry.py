@@ -0,0 +1,87 @@
+import asyncio
+import gc
+import time
+
+from src.bot import app
+from src.config import Config
+from src.core import event_bus
+from src.core.models import EventType, SessionEvent
+from src.providers.provider_pool import ProviderPool
+from src.utils.registry import Registry, registry_evictions, registry_sizes
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def test_lru_ttl_and_in_use():
+    reg = Registry("test_locks", max_size=3, ttl=60, in_use=lambda lock: lock.locked())
+    held = reg.get_or_create("held", asyncio.Lock)
+    await held.acquire()
+    for key in ("a", "b", "c", "d"):
+        reg.get_or_create(key, asyncio.Lock)
+    # "held" is the oldest but locked; "a" and "b" went instead
+    assert set(reg) == {"held", "c", "d"}
+    assert reg.get_or_create("held", asyncio.Lock) is held
+
+    reg["c"]  # a read counts as use
+    reg.get_or_create("e", asyncio.Lock)
+    assert "c" in reg and "d" not in reg
+    assert registry_sizes()["test_locks"] == 3
+    assert registry_evictions()["test_locks"] == 3
+
+    reg.ttl = 0.01
+    time.sleep(0.02)
+    reg["f"] = asyncio.Lock()
+    assert set(reg) == {"held", "f"}
+    held.release()
+
+
+async def test_soak_100k_users_stays_bounded(monkeypatch):
+    cfg = Config(registry_max_entries=1000)
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: cfg))
+    pool = ProviderPool()
+    gc.collect()
+    before = _rss_mb()
+    try:
+        for uid in range(100_000):
+            app._get_semaphore(uid)
+            app._CANCEL_FLAGS[uid] = False
+            pool._get_lock(uid, "groq")
+            pool._sticky_providers[uid] = ("groq", 0)
+            event_bus.emit_nowait(uid, SessionEvent(EventType.THINKING))
+        gc.collect()
+        grown = _rss_mb() - before
+        sizes = registry_sizes()
+        for name in ("user_semaphores", "cancel_flags", "provider_locks", "sticky_providers", "event_buses"):
+            assert sizes[name] <= 1000, (name, sizes)
+        assert grown < 50, f"rss +{grown:.1f} MB"
+    finally:
+        app._USER_SEMAPHORES.clear()
+        app._CANCEL_FLAGS.clear()
+        event_bus._buses.clear()
+
+
+async def test_run_inbox_of_a_finished_run_is_evictable():
+    async def run():
+        return None
+
+    dead = asyncio.create_task(run())
+    await dead
+    live = asyncio.current_task()
+    reg = Registry("test_run_inboxes", max_size=1, ttl=60, in_use=app._RUN_INBOXES.in_use)
+    reg[("chat", 1)] = {"messages": [], "bubble": None, "task": live}
+    reg[("chat", 2)] = {"messages": [], "bubble": None, "task": dead}
+    reg[("chat", 3)] = {"messages": [], "bubble": None, "task": live}
+    # the live run's inbox stays; the one left behind by a dead run goes
+    assert set(reg) == {("chat", 1), ("chat", 3)}
+
+    app._RUN_INBOXES[(71, 5)] = {"messages": [], "bubble": None, "task": dead}
+    try:
+        assert app._append_to_active_run(71, 5, "hello?") is False
+    finally:
+        app._RUN_INBOXES.pop((71, 5), None)
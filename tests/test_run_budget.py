@@ -0,0 +1,64 @@
+from src.config import Config
+from src.core import event_bus
+from src.core.models import EventType
+from src.core.orchestrator import Orchestrator
+from src.core.run_budget import RunBudget
+from src.providers.base_provider import StructuredResponse, ToolCall
+
+
+def test_limits_per_user_and_accounting():
+    cfg = Config(run_budget={"max_tokens": 1000, "max_turns": 5, "max_seconds": 0, "max_tool_calls": 3},
+                 run_budget_per_user={"9": {"max_tokens": 50}})
+    budget = RunBudget(cfg, user_id=1)
+    payload = budget.charge(StructuredResponse(content="x" * 400, usage={}), input_estimate=300)
+    assert (payload["input"], payload["output"], payload["total"]) == (300, 100, 400)
+    assert budget.exhausted() is None
+    assert budget.allow_tools(2) == 2 and budget.allow_tools(2) == 1
+    assert budget.exhausted() == "tool_calls"
+
+    vip = RunBudget(cfg, user_id=9)
+    vip.charge(StructuredResponse(usage={"prompt_tokens": 40, "completion_tokens": 20}))
+    assert vip.exhausted() == "tokens"
+    assert RunBudget(cfg, max_turns=3).max_turns == 3
+
+
+class ToolHappyPool:
+    """Always asks for two searches while tools are offered."""
+
+    def __init__(self):
+        self.calls = []
+
+    def order_providers(self, user_id, priorities):
+        return ["groq"]
+
+    async def request_with_key_structured(self, user_id, provider, payload, schemas):
+        self.calls.append((list(payload["messages"]), list(schemas)))
+        if schemas:
+            return StructuredResponse(tool_calls=[
+                ToolCall(name="send_file", arguments={"path": f"r{len(self.calls)}.txt"}, call_id=f"a{len(self.calls)}"),
+                ToolCall(name="send_file", arguments={"path": "b.txt"}, call_id=f"b{len(self.calls)}"),
+            ], usage={"prompt_tokens": 100, "completion_tokens": 10})
+        return StructuredResponse(content="Here is what I found.", usage={"prompt_tokens": 100, "completion_tokens": 5})
+
+
+async def test_tool_budget_forces_a_final_answer():
+    cfg = Config(run_budget={"max_tokens": 0, "max_turns": 10, "max_seconds": 0, "max_tool_calls": 3})
+    orch = Orchestrator(cfg)
+    orch.pool = ToolHappyPool()
+    try:
+        answer = await orch.run(5, 77, "research", "", "system")
+        events = await event_bus.drain(77)
+    finally:
+        event_bus.teardown(77)
+
+    assert answer.startswith("Here is what I found.")
+    calls = orch.pool.calls
+    # two tool turns (2 + 1 of the 3 allowed calls), then one call without tools
+    assert len(calls) == 3 and calls[-1][1] == []
+    assert calls[-1][0][-1]["content"].startswith("[Budget reached: tool_calls]")
+    skipped = [m for m in calls[-1][0] if m["role"] == "tool" and m["content"].startswith("Skipped")]
+    assert len(skipped) == 1
+
+    budget_events = [e.payload for e in events if e.type == EventType.BUDGET]
+    assert [p["turns"] for p in budget_events[:3]] == [1, 2, 3]
+    assert budget_events[-1]["limit"] == "tool_calls" and budget_events[-1]["tool_calls"] == 3
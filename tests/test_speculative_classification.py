@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.bot import app
+from src.config import Config
+from src.core.complexity import classify_fast
+from src.db import connection, key_store
+
+DELAY = 0.3
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.json").write_text(json.dumps(
+        {"vector_backend": "numpy", "vector_embedder": "hashing"}
+    ))
+    db_path = str(tmp_path / "data" / "rk.db")
+    monkeypatch.setattr(connection, "DB_PATH", db_path)
+    monkeypatch.setattr(key_store, "DB_PATH", db_path)
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_test")
+    Config.invalidate()
+    yield tmp_path
+    Config.invalidate()
+
+
+class FakePool:
+    def __init__(self, verdict):
+        self.verdict = verdict
+        self.replies_started = 0
+        self.replies_cancelled = 0
+
+    async def request_with_key(self, user_id, provider, payload):
+        if "SIMPLE or COMPLEX" in payload["messages"][0]["content"]:
+            await asyncio.sleep(DELAY)
+            return {"output": self.verdict}
+        self.replies_started += 1
+        try:
+            await asyncio.sleep(DELAY)
+        except asyncio.CancelledError:
+            self.replies_cancelled += 1
+            raise
+        return {"output": "Paris is lovely in spring."}
+
+    async def get_available_providers(self, user_id):
+        return ["groq"]
+
+    def order_providers(self, user_id, priorities):
+        return list(priorities)
+
+
+def _update(text, sent):
+    async def reply(msg, **kw):
+        sent.append(msg)
+        return SimpleNamespace(message_id=1, chat_id=1)
+
+    user = SimpleNamespace(id=100, username="alex", first_name="Alex", last_name=None)
+    message = SimpleNamespace(text=text, reply_text=reply, reply_html=reply)
+    return SimpleNamespace(message=message, effective_user=user, effective_chat=SimpleNamespace(id=1))
+
+
+def test_ambiguous_message_is_not_decided_by_fast_tiers():
+    assert classify_fast("hello") is False
+    assert classify_fast("search the latest news") is True
+    assert classify_fast("tell me about paris") is None
+
+
+async def test_simple_verdict_uses_speculative_reply(workdir, monkeypatch):
+    pool = FakePool("SIMPLE")
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    sent = []
+    start = time.perf_counter()
+    await app._process_message(_update("tell me about paris", sent), SimpleNamespace(bot=None))
+    elapsed = time.perf_counter() - start
+
+    assert sent == ["Paris is lovely in spring."]
+    assert pool.replies_started == 1
+    # classify and reply overlapped: ~max(classify, reply), not the sum
+    assert elapsed < DELAY * 2
+
+
+async def test_complex_verdict_cancels_speculative_reply(workdir, monkeypatch):
+    pool = FakePool("COMPLEX")
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    handed_over = {}
+
+    async def fake_orchestration(*args, fragments_task=None, **kw):
+        handed_over["fragments"] = await fragments_task
+
+    monkeypatch.setattr(app, "_run_orchestration_guarded", fake_orchestration)
+    sent = []
+    await app._process_message(_update("tell me about paris", sent), SimpleNamespace(bot=None))
+    await asyncio.gather(*next(iter(app._ACTIVE_TASKS.values())))
+
+    assert pool.replies_cancelled == 1
+    assert "Paris is lovely in spring." not in sent
+    assert handed_over["fragments"] == []
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import respx
+
+from src.db import connection, key_store
+from src.db.key_store import init_db
+from src.tools.curl_tool import curl_fetch, curl_fetch_conditional
+from src.tools.result_cache import ToolResultCache, cache_key, cached_tool
+
+
+async def test_normalized_calls_share_one_fetch(monkeypatch):
+    cache = ToolResultCache(max_bytes=10_000)
+    monkeypatch.setattr("src.tools.result_cache._cache", cache)
+    calls = []
+
+    async def search(query: str, max_results: int = 5) -> str:
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return "Error: rate limited" if query == "fail" else f"results for {query}"
+
+    tool = cached_tool("web_search", search, ttl=60)
+    # Concurrent identical calls collapse into one request
+    first = await asyncio.gather(tool("Rust  async"), tool(" rust async", max_results="5"))
+    assert first == ["results for Rust  async"] * 2
+    assert await tool("RUST ASYNC") == "results for Rust  async"
+    assert await tool("rust async", 3) == "results for rust async"
+    assert len(calls) == 2
+
+    await tool("fail")
+    await tool("fail")
+    assert calls.count("fail") == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["shared"], stats["misses"]) == (1, 1, 4)
+
+
+async def test_lru_bounded_by_bytes():
+    cache = ToolResultCache(max_bytes=250)
+
+    async def fetch(n):
+        return str(n) * 100
+
+    for n in range(3):
+        await cache.call("curl", cache_key({"url": f"example.com/{n}"}), 60, lambda n=n: fetch(n))
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 200 and stats["evictions"] == 1
+    assert cache_key({"url": "Example.com/a"}) == cache_key({"url": "https://example.com/a"})
+
+
+@respx.mock
+async def test_curl_revalidates_with_etag(monkeypatch):
+    cache = ToolResultCache(max_bytes=100_000)
+    monkeypatch.setattr("src.tools.result_cache._cache", cache)
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html="<title>Doc</title><p>hello</p>", headers={"ETag": '"v1"'})
+
+    respx.get("https://example.com/doc").mock(side_effect=handler)
+    tool = cached_tool("curl", curl_fetch, ttl=0, conditional=curl_fetch_conditional)
+
+    first = await tool("example.com/doc")
+    assert "TITLE: Doc" in first
+    # ttl=0: every call revalidates, the 304 serves the stored page
+    assert await tool("https://example.com/doc") == first
+    assert seen == [None, '"v1"']
+    assert cache.stats()["revalidated"] == 1
+
+
+async def test_persisted_entries_survive_a_restart(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "rk.db")
+    monkeypatch.setattr(connection, "DB_PATH", db_path)
+    monkeypatch.setattr(key_store, "DB_PATH", db_path)
+    await init_db()
+
+    async def fetch():
+        return "Wikipedia (Paris): capital of France"
+
+    key = cache_key({"query": "Paris"})
+    await ToolResultCache(persist=True).call("wikipedia_search", key, 3600, fetch)
+
+    restarted = ToolResultCache(persist=True)
+
+    async def offline():
+        raise AssertionError("should be served from SQLite")
+
+    assert await restarted.call("wikipedia_search", key, 3600, offline) == "Wikipedia (Paris): capital of France"
+    assert restarted.stats()["hits"] == 1
@@ -0,0 +1,52 @@
+import dataclasses
+import json
+
+import pytest
+
+from src.agents.agent_factory import ConcreteAgent
+from src.agents.agent_models import AgentSpec
+from src.tools.schemas import SCHEMA_MAP, serialization_cache_info, serialize_tools
+
+
+def test_schemas_are_frozen():
+    schema = SCHEMA_MAP["use_skill"]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        schema.description = "changed"
+    with pytest.raises(TypeError):
+        schema.parameters["properties"]["x"] = {}
+
+
+def test_serialization_is_memoized_per_provider_and_strip_enum():
+    schemas = [SCHEMA_MAP["write_file"], SCHEMA_MAP["read_file"]]
+    groq = serialize_tools("groq", schemas, strip_enum=True)
+    assert serialize_tools("groq", list(schemas), strip_enum=True) is groq
+    plain = serialize_tools("openrouter", schemas)
+    assert plain is not groq
+    assert "enum" in plain[0]["function"]["parameters"]["properties"]["mode"]
+    assert "enum" not in groq[0]["function"]["parameters"]["properties"]["mode"]
+    assert plain[0]["function"]["parameters"]["required"] == ["path", "content"]
+
+
+async def test_prompt_size_stays_flat_over_1000_runs(monkeypatch):
+    import src.db.chat_store as chat_store
+
+    async def fake_skills(user_id):
+        return ["deploy", "backup"]
+
+    monkeypatch.setattr(chat_store, "list_skill_names", fake_skills)
+    agent = ConcreteAgent(AgentSpec(id="a", name="A", role="r", tools=["web_search"]))
+    original = SCHEMA_MAP["use_skill"].description
+
+    sizes = set()
+    misses_before = None
+    for i in range(1000):
+        schemas = await agent._get_tool_schemas(user_id=1)
+        sizes.add(len(json.dumps(serialize_tools("openrouter", schemas))))
+        if i == 0:
+            misses_before = serialization_cache_info()["misses"]
+
+    assert len(sizes) == 1
+    assert SCHEMA_MAP["use_skill"].description == original
+    assert serialization_cache_info()["misses"] == misses_before
+    use_skill = next(s for s in schemas if s.name == "use_skill")
+    assert use_skill.description.endswith("Available: deploy, backup")
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.bot import app
+from src.config import Config
+from src.core import event_bus
+from src.core.models import EventType
+from src.core.tools import ToolExecutor
+from src.utils import tracing
+from src.utils.tracing import bind_trace, perf_summary, span, trace_scope
+
+
+@pytest.fixture(autouse=True)
+def clean_spans(monkeypatch):
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: Config()))
+    tracing.reset_spans()
+    yield
+    tracing.reset_spans()
+    event_bus.teardown(42)
+
+
+async def test_spans_aggregate_and_reach_the_session_bus():
+    event_bus.get_bus(42)  # someone is listening on session 42
+
+    async def child():
+        bind_trace(turn=3)
+        async with span("provider", provider="groq"):
+            await asyncio.sleep(0.01)
+
+    with trace_scope(user_id=7, session_id=42):
+        await asyncio.gather(child(), child())
+        await ToolExecutor(Config()).execute("send_file", {"path": "a.txt"})
+        with span("db"):
+            pass
+    with trace_scope(session_id=43):  # no bus: aggregated, not queued
+        with span("db"):
+            pass
+    assert tracing.current_ids() == {}
+
+    summary = perf_summary(60)
+    assert summary["provider"]["count"] == 2
+    assert summary["provider"]["p50"] >= 10
+    assert summary["db"]["count"] == 2 and summary["tool"]["count"] == 1
+
+    events = await event_bus.drain(42)
+    spans = [e for e in events if e.type == EventType.SPAN]
+    assert [e.payload["span"] for e in spans] == ["provider", "provider", "tool", "db"]
+    assert spans[0].turn == 3 and spans[0].payload["user_id"] == 7
+    assert spans[2].payload["tool"] == "send_file"
+    assert 43 not in event_bus._buses
+
+
+async def test_perf_command_is_owner_only(monkeypatch):
+    monkeypatch.setenv("OWNER_USER_ID", "1")
+    for ms in (5, 10, 200):
+        tracing.record("telegram", ms)
+    replies = []
+
+    async def reply(msg, **kw):
+        replies.append(msg)
+
+    def update(uid):
+        return SimpleNamespace(effective_user=SimpleNamespace(id=uid),
+                               message=SimpleNamespace(reply_text=reply, reply_html=reply))
+
+    await app.perf_handler(update(2), SimpleNamespace(args=[]))
+    await app.perf_handler(update(1), SimpleNamespace(args=["5"]))
+    assert replies[0] == "Unauthorized."
+    assert "last 5 min" in replies[1]
+    assert "telegram" in replies[1] and "200.0" in replies[1]
@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+from src.agents.agent_models import BackgroundAgentConfig, WakeSignal
+from src.agents.background import manager as manager_mod
+from src.agents.background.timer import WatcherScheduler, _Entry
+from src.config import Config
+
+
+async def test_ticks_follow_grid_and_pool_is_bounded():
+    sched = WatcherScheduler(workers=2, jitter=0)
+    counts = {}
+    running = peak = 0
+
+    def job(key):
+        async def run():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            counts[key] = counts.get(key, 0) + 1
+            await asyncio.sleep(0.005)
+            running -= 1
+        return run
+
+    sched.start()
+    for i in range(6):
+        sched.add(f"w{i}", 0.05, job(f"w{i}"), first_delay=0)
+    await asyncio.sleep(0.52)
+    await sched.stop()
+
+    assert peak <= 2
+    # 0.52 s at 0.05 s is 11 grid ticks; a loaded loop drops ticks, never adds any
+    assert all(5 <= n <= 11 for n in counts.values()), counts
+    assert sched.stats()["overruns"] == 0
+
+
+def test_next_due_stays_on_grid_and_drops_missed_ticks():
+    sched = WatcherScheduler(jitter=0)
+    entry = _Entry("w", 10, None, nominal=100.0, seq=0)
+
+    # a late or slow check does not shift the next tick
+    assert sched._next_due(entry, now=103.7) == 110.0
+    assert sched._next_due(entry, now=110.2) == 120.0
+    # stalled past two ticks: realign to the grid, count them as missed
+    assert sched._next_due(entry, now=145.0) == 150.0
+    assert sched.stats()["missed"] == 2
+
+
+async def test_hung_check_times_out_and_frees_the_worker():
+    sched = WatcherScheduler(workers=1, jitter=0, check_timeout=0.1)
+    quick = asyncio.Event()
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    async def ok():
+        quick.set()
+
+    sched.start()
+    sched.add("hung", 10, hang, first_delay=0)
+    await asyncio.sleep(0.01)
+    sched.add("quick", 10, ok, first_delay=0)
+    await asyncio.wait_for(quick.wait(), 1)
+    stats = sched.stats()
+    assert stats["timeouts"] == 1 and stats["failed"] == 1
+    await sched.stop()
+
+
+async def test_overrun_is_skipped_and_remove_cancels():
+    sched = WatcherScheduler(workers=4, jitter=0)
+    active = peak = started = 0
+    cancelled = asyncio.Event()
+
+    async def slow():
+        nonlocal active, peak, started
+        active += 1
+        started += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.12)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        finally:
+            active -= 1
+
+    sched.start()
+    sched.add("slow", 0.05, slow, first_delay=0)
+    await asyncio.sleep(0.33)
+    stats = sched.stats()
+    assert peak == 1  # one watcher's checks never overlap
+    assert stats["overruns"] >= 2
+    assert started <= 3
+
+    assert sched.remove("slow") and "slow" not in sched
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert not sched.remove("slow")
+    await sched.stop()
+
+
+async def test_add_remove_many_compacts_heap():
+    sched = WatcherScheduler(jitter=0.1, seed=1)
+
+    async def noop():
+        return None
+
+    for i in range(10_000):
+        sched.add(f"w{i}", 60, noop)
+    for i in range(9_990):
+        sched.remove(f"w{i}")
+    assert len(sched) == 10
+    assert len(sched._heap) <= 128
+    # first ticks are spread over jitter * interval, not all at once
+    dues = sorted(item[0] for item in sched._heap if sched._live(item))
+    assert len(dues) == 10
+    assert dues[-1] - dues[0] > 0.5
+
+
+async def test_manager_checks_watchers_through_scheduler(monkeypatch):
+    cfg = Config(watcher_workers=4, watcher_jitter=0)
+    monkeypatch.setattr(Config, "get", classmethod(lambda cls: cfg))
+    triggered, disabled = [], []
+
+    async def trigger(agent_id):
+        triggered.append(agent_id)
+
+    async def disable(agent_id):
+        disabled.append(agent_id)
+
+    async def no_agents():
+        return []
+
+    monkeypatch.setattr(manager_mod, "update_agent_trigger_count", trigger)
+    monkeypatch.setattr(manager_mod, "disable_background_agent", disable)
+    monkeypatch.setattr(manager_mod, "load_all_background_agents", no_agents)
+
+    class AlwaysWatcher:
+        async def check(self):
+            return WakeSignal(event_type="threshold_breach", severity="info")
+
+    mgr = manager_mod.BackgroundAgentManager(bot=None)
+    monkeypatch.setattr(mgr, "_build_watcher", lambda c: AlwaysWatcher())
+
+    async def hold(self):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(manager_mod.BackgroundAgentManager, "_wake_processor_loop", hold)
+    await mgr.start()
+    agent = BackgroundAgentConfig(id="sys_test", user_id=7, chat_id=9, watcher_type="system",
+                                  name="sys", description="cpu", interval_seconds=1)
+    await mgr._spawn_watcher(agent)
+    started = time.monotonic()
+    while not triggered and time.monotonic() - started < 1:
+        await asyncio.sleep(0.01)
+
+    signal = mgr._wake_queue.get_nowait()
+    assert (signal.agent_id, signal.user_id, signal.chat_id) == ("sys_test", 7, 9)
+    assert await mgr.stop_agent("sys_test") and disabled == ["sys_test"]
+    assert not await mgr.stop_agent("sys_test")
+    assert mgr.scheduler_stats()["watchers"] == 0
+
+    mgr._processor.cancel()
+    await mgr._scheduler.stop()
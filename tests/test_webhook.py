@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from src.bot.webhook import WebhookServer
+from src.utils import tracing
+
+SECRET = "s3cret-token"
+
+
+def _update(i: int) -> dict:
+    return {"update_id": i, "message": {
+        "message_id": i, "date": 0, "text": f"hi {i}",
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 7, "is_bot": False, "first_name": "Alex"},
+    }}
+
+
+@pytest.fixture
+async def server():
+    tracing.reset_spans()
+    srv = WebhookServer(asyncio.Queue(), secret=SECRET, path="/telegram", max_queue=1000)
+    port = await srv.start("127.0.0.1", 0)
+    srv.base = f"http://127.0.0.1:{port}"
+    yield srv
+    await srv.close()
+
+
+async def test_validation_and_backpressure(server):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+    async with httpx.AsyncClient(base_url=server.base) as client:
+        assert (await client.post("/telegram", json=_update(1))).status_code == 403
+        assert (await client.post("/telegram", json=_update(1), headers={
+            "X-Telegram-Bot-Api-Secret-Token": "wrong"})).status_code == 403
+        assert (await client.post("/other", json=_update(1), headers=headers)).status_code == 404
+        assert (await client.post("/telegram", content=b"{nope", headers=headers)).status_code == 400
+        assert (await client.post("/telegram", json=_update(1), headers=headers)).status_code == 200
+
+        server.max_queue = 2
+        assert (await client.post("/telegram", json=_update(2), headers=headers)).status_code == 200
+        full = await client.post("/telegram", json=_update(3), headers=headers)
+        assert full.status_code == 503 and full.headers["retry-after"] == "1"
+
+    update = server.update_queue.get_nowait()
+    assert update.update_id == 1 and update.message.text == "hi 1"
+    stats = server.stats()
+    assert (stats["accepted"], stats["unauthorized"], stats["queue_full"]) == (2, 2, 1)
+
+
+async def test_concurrent_keepalive_ingestion(server):
+    n, connections = 200, 8
+    bodies = [json.dumps(_update(i)).encode() for i in range(n)]
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"}
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+
+    async with httpx.AsyncClient(base_url=server.base, limits=limits) as client:
+        async def sender(chunk):
+            for body in chunk:
+                r = await client.post("/telegram", content=body, headers=headers)
+                assert r.status_code == 200
+
+        await asyncio.gather(*(sender(bodies[i::connections]) for i in range(connections)))
+
+    assert server.update_queue.qsize() == n
+    assert sorted(server.update_queue.get_nowait().update_id for _ in range(n)) == list(range(n))
+    assert tracing.perf_summary(60)["webhook_ack"]["count"] == n
+
+
+async def test_slow_and_idle_connections_are_closed(server):
+    server.read_timeout, server.idle_timeout = 0.2, 0.3
+
+    async def closed_after(payload: bytes) -> float:
+        reader, writer = await asyncio.open_connection("127.0.0.1", int(server.base.rsplit(":", 1)[1]))
+        writer.write(payload)
+        await writer.drain()
+        start = time.perf_counter()
+        assert await asyncio.wait_for(reader.read(), timeout=2) == b""
+        writer.close()
+        return time.perf_counter() - start
+
+    assert await closed_after(b"") < 1                                   # idle, never sends
+    assert await closed_after(b"POST /telegram HTTP/1.1\r\nHost:") < 1   # head trickles in
+    assert await closed_after(
+        b"POST /telegram HTTP/1.1\r\nContent-Length: 100\r\n\r\n{"    # body never completes
+    ) < 1
+    assert server.stats()["timed_out"] == 2
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import signal
+
+import aiosqlite
+import pytest
+
+from src.core.models import EventType, SessionEvent
+from src.core.workers import WorkerPool
+from src.db import connection, key_store
+from src.db.key_store import init_db
+
+
+async def fake_job(job, emit):
+    emit(SessionEvent(EventType.THINKING, turn=0))
+    if job.get("crash"):
+        await asyncio.sleep(0.2)
+        os._exit(9)  # a worker killed mid-job (OOM killer, segfault)
+    await asyncio.sleep(job.get("sleep", 0))
+    emit(SessionEvent(EventType.TOOL_CALL, payload={"tool": "web_search"}, turn=0))
+    return f"{job['message']} from {os.getpid()}"
+
+
+@pytest.fixture
+async def pool():
+    p = WorkerPool(2, runner=fake_job, jobs_per_worker=1)
+    p.start()
+    yield p
+    await p.close()
+
+
+async def test_jobs_spread_over_workers_and_stream_events(pool):
+    events = []
+    results = await asyncio.gather(*(
+        pool.run({"message": f"job{i}", "sleep": 0.3}, events.append) for i in range(4)
+    ))
+    assert [r.split(" from ")[0] for r in results] == ["job0", "job1", "job2", "job3"]
+    pids = {r.split(" from ")[1] for r in results}
+    assert len(pids) == 2 and str(os.getpid()) not in pids
+    assert [e.type for e in events].count(EventType.TOOL_CALL) == 4
+    assert pool.stats()["in_flight"] == 0
+
+
+async def test_cancel_reaches_the_worker(pool):
+    slow = [asyncio.create_task(pool.run({"message": "slow", "sleep": 30})) for _ in range(2)]
+    await asyncio.sleep(1.0)
+    for task in slow:
+        task.cancel()
+    await asyncio.gather(*slow, return_exceptions=True)
+    # both workers (one slot each) are free again
+    done = await asyncio.wait_for(asyncio.gather(
+        pool.run({"message": "a"}), pool.run({"message": "b"}),
+    ), timeout=10)
+    assert [d.split(" from ")[0] for d in done] == ["a", "b"]
+
+
+async def test_dead_worker_fails_its_jobs_and_is_respawned(pool):
+    with pytest.raises(RuntimeError, match="worker process died"):
+        await asyncio.wait_for(pool.run({"message": "boom", "crash": True}), timeout=10)
+    # the replacement worker takes new jobs; both slots serve again
+    done = await asyncio.wait_for(asyncio.gather(
+        pool.run({"message": "a", "sleep": 0.2}), pool.run({"message": "b", "sleep": 0.2}),
+    ), timeout=20)
+    assert [d.split(" from ")[0] for d in done] == ["a", "b"]
+    stats = pool.stats()
+    assert stats["respawns"] == 1 and stats["alive"] == 2 and stats["in_flight"] == 0
+
+
+async def test_killed_idle_workers_are_replaced(pool):
+    # idle workers SIGKILLed while waiting for work must not wedge the pool
+    await asyncio.wait_for(pool.run({"message": "warm"}), timeout=20)
+    for proc in list(pool._procs):
+        os.kill(proc.pid, signal.SIGKILL)
+    done = await asyncio.wait_for(asyncio.gather(
+        pool.run({"message": "a"}), pool.run({"message": "b"}), pool.run({"message": "c"}),
+    ), timeout=20)
+    assert [d.split(" from ")[0] for d in done] == ["a", "b", "c"]
+    assert pool.stats()["respawns"] == 2
+
+
+async def test_job_a_dead_worker_never_started_runs_elsewhere(pool):
+    await asyncio.wait_for(pool.run({"message": "warm"}), timeout=20)
+    busy = asyncio.create_task(pool.run({"message": "busy", "sleep": 1}))
+    await asyncio.sleep(0)
+    idle = next(p for p in pool._procs if pool._load[p.worker_id] == 0)
+    os.kill(idle.pid, signal.SIGSTOP)  # it cannot read the job dispatched to it next
+    task = asyncio.create_task(pool.run({"message": "orphan"}))
+    await asyncio.sleep(0)
+    assert pool._owners[max(pool._owners)] == idle.worker_id
+    os.kill(idle.pid, signal.SIGKILL)
+    done = await asyncio.wait_for(asyncio.gather(busy, task), timeout=20)
+    assert [d.split(" from ")[0] for d in done] == ["busy", "orphan"]
+    assert pool.stats()["respawns"] == 1
+
+async def test_database_uses_wal(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "rk.db")
+    monkeypatch.setattr(connection, "DB_PATH", db_path)
+    monkeypatch.setattr(key_store, "DB_PATH", db_path)
+    await init_db()
+    async with aiosqlite.connect(db_path) as conn:
+        assert (await (await conn.execute("PRAGMA journal_mode")).fetchone())[0] == "wal"